@@ -1,10 +1,51 @@
 """Define specialized agents for military article generation"""
-from typing import Dict, List
+from typing import Dict, List, Optional
 import autogen
 from utils.web_search import perform_web_search
+from utils.response_cache import ResponseCache
+from utils.instrumentation import LLMCallRecorder
+from utils.rate_limiter import RateLimiter
+from terminology_handler import TerminologyManager
+from terminology_checker import build_terminology_report, format_terminology_report
 
-def create_agents(agent_config: Dict) -> Dict:
-    """Create the specialized agents for article generation"""
+def create_terminology_checker(terminology_manager: TerminologyManager, language: Optional[str] = None,
+                               min_terms: int = 3) -> autogen.ConversableAgent:
+    """TerminologyChecker that answers from the glossary instead of a model.
+
+    It replies to the latest message (the draft it follows in the speaker flow)
+    with a structured report from build_terminology_report: glossary terms used,
+    spelling variants to correct and related terms. No LLM call is made.
+    """
+    checker = autogen.ConversableAgent(
+        name="TerminologyChecker",
+        llm_config=False,
+        human_input_mode="NEVER",
+        code_execution_config=False,
+        description="Checks drafts against the official military glossary.",
+    )
+
+    def reply_with_report(recipient, messages=None, sender=None, config=None):
+        draft = (messages[-1].get("content") or "") if messages else ""
+        report = build_terminology_report(terminology_manager, draft, language, min_terms=min_terms)
+        return True, format_terminology_report(report)
+
+    checker.register_reply([autogen.Agent, None], reply_with_report, position=0)
+    return checker
+
+def create_agents(agent_config: Dict, response_cache: Optional[ResponseCache] = None,
+                  terminology_manager: Optional[TerminologyManager] = None, terminology_language: Optional[str] = None,
+                  recorder: Optional[LLMCallRecorder] = None, rate_limiter: Optional[RateLimiter] = None,
+                  min_terms: int = 3) -> Dict:
+    """Create the specialized agents for article generation
+
+    response_cache: LLM response cache shared by every agent (see utils/response_cache.py)
+    terminology_manager: when given, the TerminologyChecker is a local glossary checker
+    (see create_terminology_checker) instead of an LLM agent; terminology_language
+    is the glossary language of the drafts, detected from each draft when None, and
+    min_terms the number of glossary terms its report asks for per section.
+    recorder: records every model call of the LLM agents (see utils/instrumentation.py)
+    rate_limiter: request/token budget and retry policy shared by every agent (see utils/rate_limiter.py)
+    """
     
     # Writer agent - generates primary content
     writer = autogen.AssistantAgent(
@@ -27,7 +68,8 @@ Always verify technical accuracy and use established military writing convention
 - Formal military writing style
 - Logical flow between sections
 - Ensuring the generated section strictly follows the requested structure (e.g., heading levels, paragraph/bullet point mix) and word count guidelines from the outline.
-- Removing redundancies and improving conciseness. Ensure the main section title is NOT repeated in the content.""",
+- Removing redundancies and improving conciseness. Ensure the main section title is NOT repeated in the content.
+When the latest draft needs no further changes, reply with APPROVED. Otherwise, list the specific revisions the writer must make.""",
         llm_config=agent_config,
     )
     
@@ -67,16 +109,19 @@ Always verify technical accuracy and use established military writing convention
     )
     
     # Terminology checker - verifies military terms
-    terminology_checker = autogen.AssistantAgent(
-        name="TerminologyChecker",
-        system_message="""You ensure consistent and accurate military terminology:
+    if terminology_manager is not None:
+        terminology_checker = create_terminology_checker(terminology_manager, terminology_language, min_terms=min_terms)
+    else:
+        terminology_checker = autogen.AssistantAgent(
+            name="TerminologyChecker",
+            system_message="""You ensure consistent and accurate military terminology:
 - Verify terms against the official glossary
 - Suggest correct terminology usage
 - Check for consistency in both Arabic and French
 - Provide term definitions when needed
 - Ensure technical accuracy of term usage""",
-        llm_config=agent_config,
-    )
+            llm_config=agent_config,
+        )
     
     # Web Searcher agent - fetches updated data from the internet
     web_searcher_llm_config = agent_config.copy()
@@ -91,11 +136,11 @@ Always verify technical accuracy and use established military writing convention
                     "properties": {
                         "query": {
                             "type": "string",
-                            "description": "The search query to find information about.",
+                            "description": "The search query to find information about. Put several queries on separate lines to search them at once.",
                         },
                         "num_results": {
                             "type": "integer",
-                            "description": "The desired number of search results.",
+                            "description": "The desired number of search results per query.",
                             "default": 3,
                         },
                     },
@@ -123,6 +168,17 @@ Always verify technical accuracy and use established military writing convention
         }
     )
     
+    llm_agents = (writer, editor, researcher, outline_creator, formatter, terminology_checker, web_searcher)
+    if response_cache is not None:
+        for agent in llm_agents:
+            agent.client_cache = response_cache
+    if rate_limiter is not None:
+        for agent in llm_agents:
+            rate_limiter.wrap(agent, response_cache, on_retry=recorder.add_retry if recorder is not None else None)
+    if recorder is not None:
+        for agent in llm_agents:
+            recorder.instrument(agent, response_cache, rate_limiter)
+    
     return {
         "writer": writer,
         "editor": editor,
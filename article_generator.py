@@ -1,40 +1,92 @@
 """Generate articles based on outlines"""
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import autogen
-from terminology_handler import TerminologyManager
+from terminology_handler import TerminologyManager, get_terminology_manager, format_term_line
+from section_context import SectionContextBuilder
+from speaker_flow import SpeakerFlow, SECTION_TRANSITIONS
+from convergence import DraftConvergencePolicy, chat_poster
+from language_check import language_distribution
+from section_repair import SectionRepairer, find_paragraph_issues
+from utils.tokens import count_tokens
 import re
 
-from langdetect import detect, DetectorFactory
-from langdetect.lang_detect_exception import LangDetectException
-DetectorFactory.seed = 0
-
-def detect_language_distribution(text, target_lang, technical_terms=None):
-    """Detects the proportion of text in the target language vs. other languages."""
-    import re
-
-    # Split into sentences (simple split, can be improved)
-    sentences = re.split(r'(?<=[.!?؟])\s+', text)
-    total = 0
-    wrong_lang = 0
-    for sent in sentences:
-        sent = sent.strip()
-        if not sent:
-            continue
-        # Skip if sentence is just a technical term (heuristic: contains many Latin chars or is short)
-        if technical_terms:
-            if any(term in sent for term in technical_terms):
-                continue
-        try:
-            lang = detect(sent)
-        except LangDetectException:
-            continue
-        total += 1
-        if lang != target_lang:
-            wrong_lang += 1
-    if total == 0:
-        return 0.0
-    return wrong_lang / total
+def detect_language_distribution(text, target_lang, technical_terms=None, exempt_spans=None):
+    """Detects the proportion of sentences not in the target language.
+
+    Technical terms and exempt_spans are cut out of their sentences by offset
+    before the sentences are classified (see language_check.language_distribution).
+    """
+    return language_distribution(text, target_lang, technical_terms, exempt_spans)
+
+def repair_section(writer, content: str, terminology_manager: TerminologyManager, glossary_language: str,
+                   target_lang_code: str, target_language: str, technical_terms: Optional[List[str]] = None,
+                   max_attempts: int = 2, section_number: Optional[int] = None) -> str:
+    """Send only the paragraphs with wrong-language sentences or glossary variants back to the Writer.
+
+    Each paragraph is rewritten in a one-off exchange outside the section chat
+    and spliced back; glossary spellings are corrected again after each round.
+    """
+    def rewrite(prompt: str) -> str:
+        reply = writer.generate_reply(messages=[{"role": "user", "content": prompt}])
+        return reply.get("content") if isinstance(reply, dict) else reply
+
+    def find_issues(text: str):
+        variants = terminology_manager.find_term_variants(text, language=glossary_language)
+        return find_paragraph_issues(text, target_lang_code, target_language.capitalize(), technical_terms, variants)
+
+    def fix_spelling(text: str) -> str:
+        variants = terminology_manager.find_term_variants(text, language=glossary_language)
+        if not variants:
+            return text
+        return terminology_manager.check_and_replace_content(text, language=glossary_language, replacement_map=variants)[0]
+
+    repairer = SectionRepairer(rewrite, find_issues, target_language.capitalize(), max_attempts, fix_spelling)
+    repaired, report = repairer.repair(content)
+    print(f"INFO: [ArticleGenerator] Section {section_number} repair: {report['paragraphs_sent']} paragraphs "
+          f"rewritten in {report['attempts']} rounds ({report['prompt_tokens']} prompt tokens), "
+          f"{report['remaining']} still flagged")
+    return repaired
+
+def section_output_path(section_title: str, section_number: int, output_dir: str = "article_output/sections") -> str:
+    """File a generated section is written to"""
+    # The filename logic might need adjustment based on how section_number is now determined in main.py
+    if section_number == 0:
+        filename = "introduction.txt"
+    elif section_number == -1:
+        filename = "conclusion.txt"
+    else:
+        # Sanitize section_title for filename
+        safe_title_part = re.sub(r'[^\w\s-]', '', section_title.splitlines()[0])[:50].strip().replace(' ', '_')
+        filename = f"section_{section_number}_{safe_title_part}.txt" if safe_title_part else f"section_{section_number}.txt"
+    return os.path.join(output_dir, filename)
+
+def check_section_draft(
+    content: str,
+    terminology_manager: TerminologyManager,
+    glossary_language: str,
+    target_lang_code: str,
+    technical_terms: Optional[List[str]] = None,
+    min_terms: int = 3,
+    word_range: Tuple[int, int] = (300, 500)) -> List[str]:
+    """Run the local checks on a section draft and return the names of the failed ones.
+
+    terminology: at least min_terms distinct glossary terms are used
+    language: at most 20% of the sentences are in another language
+    word_count: the length is within 20% of word_range
+    """
+    failed = []
+    matches = terminology_manager.find_term_matches(content, language=glossary_language)
+    if len({match.term for match in matches}) < min_terms:
+        failed.append("terminology")
+    # Glossary terms are allowed whatever their language
+    term_spans = [(match.start, match.end) for match in matches]
+    if detect_language_distribution(content, target_lang_code, technical_terms, term_spans) > 0.2:
+        failed.append("language")
+    word_count = len(re.findall(r"\w+", content))
+    if not word_range[0] * 0.8 <= word_count <= word_range[1] * 1.2:
+        failed.append("word_count")
+    return failed
 
 def generate_article_section(
     agents: Dict,
@@ -42,8 +94,40 @@ def generate_article_section(
     section_number: int,
     section_outline_details: str, # This is the content/bullet points for this specific section from the outline
     previous_sections: Optional[List[str]] = None,
-    target_language: str = "ar"):
-    """Generate content for a specific article section"""
+    target_language: str = "ar",
+    terminology_manager: Optional[TerminologyManager] = None,
+    term_token_budget: int = 300,
+    max_prompt_terms: int = 10,
+    shared_context: Optional[str] = None,
+    context_builder: Optional[SectionContextBuilder] = None,
+    speaker_flow: Optional[SpeakerFlow] = None,
+    min_terms: int = 3,
+    word_range: Tuple[int, int] = (300, 500),
+    raise_errors: bool = False,
+    output_dir: str = "article_output",
+    repair_attempts: int = 2):
+    """Generate content for a specific article section.
+
+    terminology_manager: glossary to check the section against. Defaults to the
+    process-wide shared manager for the sample glossary.
+    term_token_budget / max_prompt_terms: bound the glossary terms put in the prompt,
+    which are chosen for their relevance to this section.
+    shared_context: context common to all sections (the article outline), given
+    in addition to or instead of previous_sections.
+    context_builder: fits previous_sections into a token budget, keeping recent
+    sections verbatim and summarizing older ones. Defaults to a 1500-token budget.
+    speaker_flow: deterministic speaker order of the section chat. Defaults to
+    Writer -> TerminologyChecker -> Editor -> Writer, for at most three drafts.
+    min_terms / word_range: targets of the local checks (see check_section_draft).
+    The chat stops as soon as the Editor approves a draft that passes the local
+    checks, and the last draft that passed them is kept.
+    raise_errors: re-raise generation errors instead of writing placeholder
+    content, so a checkpointed run can retry the section later.
+    output_dir: the section is written to <output_dir>/sections.
+    repair_attempts: when over 20% of the sentences are in another language or
+    glossary spelling variants are left, the offending paragraphs alone are sent
+    back to the Writer, for at most this many rounds (0 disables the repair).
+    """
     
     writer = agents["writer"]
     editor = agents["editor"]
@@ -52,11 +136,65 @@ def generate_article_section(
     web_searcher = agents["web_searcher"] # Get the new agent
     user_proxy = agents["user_proxy"]
     
+    # Speakers follow a fixed transition graph: no LLM call is spent choosing the next speaker
+    if speaker_flow is None:
+        speaker_flow = SpeakerFlow(SECTION_TRANSITIONS, final_speaker="Writer", final_turns=3)
+    section_agents = [user_proxy, writer, editor, researcher, terminology_checker, web_searcher]
+    speaker_flow.validate(agent.name for agent in section_agents)
+    
+    # Context from the outline and previous sections
+    previous_context = ""
+    if shared_context:
+        previous_context = "Full article outline (for context only; write only this section):\n" + shared_context + "\n\n"
+    context_tokens = 0
+    if previous_sections and len(previous_sections) > 0:
+        if context_builder is None:
+            context_builder = SectionContextBuilder()
+        sections_context, context_tokens = context_builder.build(previous_sections)
+        previous_context += "Previous sections content:\n" + sections_context
+    
+    # Get terminology data for the checker agent, reusing the already loaded glossary
+    if terminology_manager is None:
+        terminology_manager = get_terminology_manager("glossaire_2022_sample.csv")
+    
+    # Create a term list for guidelines from the glossary entries most relevant to this section,
+    # bounded by a token budget to keep prompt size manageable
+    glossary_language = "arabic" if target_language.lower() in ("ar", "arabic") else "french"
+    term_field = "arabic_term" if glossary_language == "arabic" else "french_term"
+    section_terms = terminology_manager.select_terms_for_section(
+        section_title, section_outline_details, glossary_language,
+        token_budget=term_token_budget, max_terms=max_prompt_terms
+    )
+    term_examples = [entry[term_field] for entry in section_terms]
+    term_list = "\n".join(format_term_line(entry, glossary_language) for entry in section_terms)
+    
+    # Local checks every draft must pass before the Editor's approval can end the chat
+    lang_map = {"arabic": "ar", "french": "fr", "english": "en"}
+    target_lang_code = lang_map.get(target_language.lower(), "ar")
+    convergence = DraftConvergencePolicy(
+        lambda draft: check_section_draft(
+            draft, terminology_manager, glossary_language, target_lang_code,
+            technical_terms=term_examples, min_terms=min_terms, word_range=word_range
+        ),
+        drafter_name=writer.name,
+        editor_name=editor.name,
+        check_hints={
+            "terminology": f"use at least {min_terms} distinct official glossary terms from the list.",
+            "language": f"write every sentence in {target_language}.",
+            "word_count": f"keep the section between {word_range[0]} and {word_range[1]} words.",
+        }
+    )
+    
     # Create group chat for this section
     section_group_chat = autogen.GroupChat(
-        agents=[user_proxy, writer, editor, researcher, terminology_checker, web_searcher], # Add web_searcher
+        agents=section_agents,
         messages=[],
-        max_round=10
+        max_round=speaker_flow.max_rounds(user_proxy.name),
+        # Failed checks of an approved draft are posted by the TerminologyChecker through the
+        # manager created below, so the Writer sees them before revising
+        speaker_selection_method=convergence.wrap(
+            speaker_flow, lambda groupchat, content: chat_poster(manager, terminology_checker)(groupchat, content)
+        )
     )
     
     # Get the agent config from one of the agents
@@ -68,20 +206,6 @@ def generate_article_section(
         llm_config=llm_config
     )
     
-    # Context from previous sections
-    previous_context = ""
-    if previous_sections and len(previous_sections) > 0:
-        previous_context = "Previous sections content:\n" + "\n".join(previous_sections)
-    
-    # Get terminology data for the checker agent
-    # Use the glossary path
-    glossary_path = "glossaire_2022_sample.csv"
-    terminology_manager = TerminologyManager(glossary_path)
-    
-    # Create a term list for guidelines (limit to a few examples to keep prompt size manageable)
-    term_examples = list(terminology_manager.arabic_terms.keys())[:5]
-    term_list = "\n".join([f"- {term}: {terminology_manager.arabic_terms[term]['arabic_def'][:100]}..." for term in term_examples])
-    
     # Prompt for section generation.
     # section_title is the main title for this section (e.g., "## Title").
     # section_outline_details contains the bullet points/notes for this section from the outline.
@@ -98,7 +222,7 @@ def generate_article_section(
     {previous_context}
 
     TERMINOLOGY GUIDELINES:
-    Use appropriate military terminology. Examples:
+    Use appropriate military terminology. Official glossary terms relevant to this section:
     {term_list}
     - Write the entire response in {target_language.upper()}, except for technical or military terms, which may be in English or French if there is no direct translation. Do NOT write full sentences or paragraphs in any language other than {target_language.upper()}. If you do, your answer will be rejected.
 
@@ -108,58 +232,61 @@ def generate_article_section(
     - Avoid using only bullet points for the entire section.
 
     Focus on creating informative, well-structured content that flows logically. Keep the writing clear, concise, and engaging.
-    The section should be approximately 300-500 words.
+    The section should be approximately {word_range[0]}-{word_range[1]} words.
     Ensure your response is ONLY the body content for this section.
     """
     
+    print(f"INFO: [ArticleGenerator] Section {section_number} prompt: {count_tokens(section_prompt)} tokens "
+          f"({context_tokens} for {len(previous_sections or [])} previous sections)")
+    
     try:
         # Generate section content
         user_proxy.initiate_chat(manager, message=section_prompt)
         
-        # Extract the final content from the conversation
+        # Keep the last Writer draft that passed the local checks, not just the last message
         chat_history = section_group_chat.messages
-        final_content = chat_history[-1]["content"]
+        final_content = convergence.best_draft(chat_history)
+        if final_content is None:
+            final_content = chat_history[-1]["content"]
+        converged = convergence.is_converged(chat_history)
+        print(f"INFO: [ArticleGenerator] Section {section_number} chat {'converged' if converged else 'stopped'} after {len(chat_history)} rounds")
         
         # Automatic terminology replacement step
-        # Example replacement map: {incorrect_term: correct_term}
-        # In production, this should be expanded or loaded from config
-        replacement_map = {
-            # Example: "غير صحيح": "صحيح",  # Replace with real mappings as needed
-            # "variant_term": "official_glossary_term"
-        }
-        final_content, suggestions = terminology_manager.check_and_replace_content(final_content, language="arabic", replacement_map=replacement_map)
+        # Spelling variants of glossary terms (hamza/alef, ta marbuta, tashkeel) map to the official term,
+        # each word keeping its article as written
+        replacement_map = terminology_manager.find_term_variants(final_content, language=glossary_language)
+        final_content, suggestions = terminology_manager.check_and_replace_content(final_content, language=glossary_language, replacement_map=replacement_map)
 
         # If we have suggestions or corrections, log them
         if suggestions:
             print(f"Terminology replacements/suggestions in section {section_number}: {suggestions}")
         
         # Language enforcement check
-        # Map language code to langdetect code
-        lang_map = {"arabic": "ar", "french": "fr", "english": "en"}
-        target_lang_code = lang_map.get(target_language.lower(), "ar") # Use passed target_language
-        # Use technical terms as exceptions
+        # Exempt the glossary terms the writer was told to use
         technical_terms = term_examples
         wrong_lang_ratio = detect_language_distribution(final_content, target_lang_code, technical_terms)
+        # Variants the replacement could not apply (overlapping spellings)
+        remaining_variants = terminology_manager.find_term_variants(final_content, language=glossary_language)
+        if repair_attempts > 0 and (wrong_lang_ratio > 0.2 or remaining_variants):
+            final_content = repair_section(
+                writer, final_content, terminology_manager, glossary_language,
+                target_lang_code, target_language, technical_terms, repair_attempts, section_number
+            )
+            wrong_lang_ratio = detect_language_distribution(final_content, target_lang_code, technical_terms)
         if wrong_lang_ratio > 0.2:
             print(f"WARNING: More than 20% of the generated section is not in the target language ({target_language}). Please review or regenerate this section.")
         
     except Exception as e:
         print(f"Error generating section {section_title}: {str(e)}")
+        if raise_errors:
+            raise
         # Fallback content
         final_content = f"# {section_title}\n\nThis section will cover important aspects of electronic warfare in countering drones."
     
     # Write section to file
-    # The filename logic might need adjustment based on how section_number is now determined in main.py
-    if section_number == 0:
-        filename = "introduction.txt"
-    elif section_number == -1:
-        filename = "conclusion.txt"
-    else:
-        # Sanitize section_title for filename
-        safe_title_part = re.sub(r'[^\w\s-]', '', section_title.splitlines()[0])[:50].strip().replace(' ', '_')
-        filename = f"section_{section_number}_{safe_title_part}.txt" if safe_title_part else f"section_{section_number}.txt"
-    os.makedirs("article_output/sections", exist_ok=True)
-    with open(f"article_output/sections/{filename}", "w", encoding="utf-8") as f:
+    output_path = section_output_path(section_title, section_number, os.path.join(output_dir, "sections"))
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
         f.write(final_content)
         
     return final_content
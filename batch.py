@@ -0,0 +1,172 @@
+"""Non-interactive batch generation of articles from a JSONL or CSV job file
+
+Usage:
+    python batch.py jobs.jsonl [--output-dir batch_output] [--workers 2] [--dry-run]
+
+Each job gives a topic and optionally target_audience, tone, word_count,
+language and id. Jobs run on a bounded worker pool that shares one glossary
+manager, one agent configuration and one LLM response cache; every job writes
+to its own directory and results.jsonl summarizes the batch.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+JOB_DEFAULTS = {
+    "target_audience": "military personel",
+    "tone": "formal",
+    "word_count": "500",
+    "language": "arabic",
+}
+JOB_LANGUAGES = ("arabic", "french")
+
+
+def load_jobs(path: str) -> List[Dict]:
+    """Read article jobs from a .jsonl file (one object per line) or a .csv file with a header row"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".csv"):
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            rows = [dict(row) for row in csv.DictReader(f, dialect=dialect)]
+        else:
+            rows = []
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON job: {e}")
+
+    jobs = []
+    seen_ids = set()
+    for number, row in enumerate(rows, 1):
+        row = {key.strip(): (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+        if not row.get("topic"):
+            raise ValueError(f"{path}: job {number} has no topic")
+        job = {field: row.get(field) or default for field, default in JOB_DEFAULTS.items()}
+        job["topic"] = row["topic"]
+        job["word_count"] = str(job["word_count"])
+        job["language"] = job["language"].lower()
+        if job["language"] not in JOB_LANGUAGES:
+            raise ValueError(f"{path}: job {number} has unsupported language '{job['language']}'")
+        job_id = re.sub(r"[^\w-]", "_", str(row.get("id") or f"job_{number:04d}"))
+        if job_id in seen_ids:
+            raise ValueError(f"{path}: duplicate job id '{job_id}'")
+        seen_ids.add(job_id)
+        job["id"] = job_id
+        jobs.append(job)
+    return jobs
+
+
+def run_batch(jobs: List[Dict], generate_job: Callable[[Dict, str], Dict], output_dir: str,
+              max_workers: int = 2) -> List[Dict]:
+    """Run generate_job(job, job_dir) for every job on a bounded pool.
+
+    A failing job is recorded and does not stop the others. Each result is
+    appended to <output_dir>/results.jsonl as soon as its job finishes;
+    results are returned in job order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+    open(results_path, "w", encoding="utf-8").close()
+    write_lock = threading.Lock()
+
+    def run_job(job: Dict) -> Dict:
+        job_dir = os.path.join(output_dir, job["id"])
+        started = time.perf_counter()
+        result = {"id": job["id"], "topic": job["topic"], "output_dir": job_dir}
+        try:
+            result.update(generate_job(job, job_dir) or {})
+            result["status"] = "done"
+        except Exception as e:
+            print(f"ERROR: [Batch] Job {job['id']} failed: {e}")
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["duration_s"] = round(time.perf_counter() - started, 2)
+        with write_lock:
+            with open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return result
+
+    results: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job") as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["id"]] = result
+            print(f"INFO: [Batch] {len(results)}/{len(jobs)} jobs finished ({result['id']}: {result['status']})")
+    return [results[job["id"]] for job in jobs]
+
+
+def format_results(results: List[Dict]) -> str:
+    """Summary table of a batch run"""
+    lines = [f"{'job':<20} {'status':<7} {'time s':>8} {'calls':>6} {'tokens':>9}  article"]
+    for result in results:
+        tokens = result.get("prompt_tokens", 0) + result.get("completion_tokens", 0)
+        lines.append(f"{result['id'][:20]:<20} {result['status']:<7} {result['duration_s']:>8.1f} "
+                     f"{result.get('llm_calls', 0):>6} {tokens:>9}  {result.get('article_path') or result.get('error', '')}")
+    done = sum(1 for result in results if result["status"] == "done")
+    lines.append(f"{done}/{len(results)} articles generated")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from config import get_config
+
+    config = get_config()
+    batch_config = config.get("batch", {})
+    parser = argparse.ArgumentParser(description="Generate military articles from a job file without interaction")
+    parser.add_argument("jobs", help="JSONL or CSV file of article jobs")
+    parser.add_argument("--output-dir", default=batch_config.get("output_dir", "batch_output"))
+    parser.add_argument("--workers", type=int, default=batch_config.get("max_parallel_jobs", 2),
+                        help="articles generated at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="validate and list the jobs without generating")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    print(f"Loaded {len(jobs)} jobs from {args.jobs}")
+    if args.dry_run:
+        for job in jobs:
+            print(f"- {job['id']}: {job['topic']} ({job['language']}, {job['word_count']} words)")
+        return 0
+
+    # Imported here so job files can be validated without the agent framework installed
+    from main import generate_article, create_response_cache
+    from terminology_handler import get_terminology_manager
+    from utils.web_search import configure_web_search
+
+    # One glossary, one response cache and one web search cache serve every job
+    terminology_config = config.get("terminology")
+    term_manager = get_terminology_manager(
+        terminology_config.get("glossary_path", "glossaire_2022_sample.csv"),
+        compact=terminology_config.get("compact_store", False)
+    )
+    response_cache = create_response_cache(config)
+    configure_web_search(config.get("web_search", {}))
+
+    def generate_job(job: Dict, job_dir: str) -> Dict:
+        params = {field: job[field] for field in ("topic", "target_audience", "tone", "word_count", "language")}
+        return generate_article(params, config, term_manager, response_cache, output_dir=job_dir)
+
+    results = run_batch(jobs, generate_job, args.output_dir, max_workers=args.workers)
+    print("\n" + format_results(results))
+    print(f"Results written to {os.path.join(args.output_dir, 'results.jsonl')}")
+    if response_cache is not None:
+        cache_stats = response_cache.stats()
+        print(f"LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    return 0 if all(result["status"] == "done" for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
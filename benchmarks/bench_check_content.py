@@ -0,0 +1,108 @@
+"""Benchmark TerminologyManager.check_content against the previous per-term regex loop
+
+Run from the repository root:
+
+    python benchmarks/bench_check_content.py [--terms 20000] [--repeat 3]
+
+Without ``--terms`` the sample glossary is used as-is. With it, the glossary is
+padded with synthetic terms to approximate a full national glossary.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from terminology_handler import TerminologyManager
+
+ARABIC_LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+
+
+def legacy_check_content(terms_dict, content, language='arabic'):
+    """The per-term regex loop check_content used before the shared matcher"""
+    suggestions = []
+    for term, entry in terms_dict.items():
+        pattern = r'\b' + re.escape(term) + r'\b'
+        for match in re.finditer(pattern, content, re.UNICODE | re.MULTILINE):
+            context_start = max(0, match.start() - 50)
+            context_end = min(len(content), match.end() + 50)
+            suggestions.append({
+                'term': term,
+                'definition': entry['arabic_def' if language == 'arabic' else 'french_def'],
+                'category': entry['category'],
+                'context': content[context_start:context_end]
+            })
+    return content, suggestions
+
+
+def add_synthetic_terms(manager, total_terms, rng):
+    """Pad the Arabic index with random multi-word terms up to ``total_terms`` entries"""
+    template = next(iter(manager.arabic_terms.values()))
+    while len(manager.arabic_terms) < total_terms:
+        words = [''.join(rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(3, 8)))
+                 for _ in range(rng.randint(1, 3))]
+        manager.arabic_terms[' '.join(words)] = template
+    manager._matchers = {}
+
+
+def build_section_text(manager, rng, words=5000):
+    """Mix glossary terms into filler text the way a generated section would"""
+    terms = list(manager.arabic_terms)
+    definitions = [entry['arabic_def'] for entry in manager.terminology.values()]
+    parts = []
+    while sum(len(part.split()) for part in parts) < words:
+        parts.append(rng.choice(definitions))
+        parts.append(rng.choice(terms))
+    return ' '.join(parts)
+
+
+def rebuild_matcher(manager):
+    manager._matchers = {}
+    return manager.get_matcher('arabic')
+
+
+def timed(function, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--glossary', default='glossaire_2022_sample.csv')
+    parser.add_argument('--terms', type=int, default=0, help='pad the glossary to this many Arabic terms')
+    parser.add_argument('--words', type=int, default=5000, help='approximate words of section text')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = TerminologyManager(args.glossary)
+    if args.terms:
+        add_synthetic_terms(manager, args.terms, rng)
+    content = build_section_text(manager, rng, args.words)
+
+    build_time, _ = timed(lambda: rebuild_matcher(manager), 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_time, legacy = timed(lambda: legacy_check_content(manager.arabic_terms, content), args.repeat)
+        matcher_time, current = timed(lambda: manager.check_content(content, 'arabic'), args.repeat)
+
+    assert legacy == current, 'matcher results differ from the per-term regex loop'
+    print(f"terms: {len(manager.arabic_terms)}  text: {len(content)} chars  hits: {len(current[1])}")
+    print(f"automaton build:       {build_time * 1000:9.2f} ms (once per glossary)")
+    print(f"per-term regex loop:   {legacy_time * 1000:9.2f} ms")
+    print(f"single-pass matcher:   {matcher_time * 1000:9.2f} ms")
+    print(f"speedup:               {legacy_time / matcher_time:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
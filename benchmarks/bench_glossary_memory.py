@@ -0,0 +1,120 @@
+"""Memory footprint of a loaded TerminologyManager, dict-per-entry layout versus compact store
+
+Run from the repository root:
+
+    python benchmarks/bench_glossary_memory.py [--sizes 10000 100000 1000000] [--layouts dict compact]
+
+For each size a glossary CSV is written by replicating the rows of
+glossaire_2022_sample.csv (each copy with its own number and numbered
+terms), so definitions and token frequencies are those of the real glossary.
+Each layout is first built from the CSV in a fresh process, which writes
+the snapshot (build time and peak memory); another fresh process then loads
+that snapshot, as every later run does, and is measured once the manager
+holds everything it keeps in memory: entries, both BM25 search indexes and
+the three term matchers (Arabic, French and normalized Arabic). Memory is the
+growth of the process's resident set (Linux /proc/self/status; tracemalloc
+would slow the build tenfold).
+"""
+import argparse
+import contextlib
+import csv
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from terminology_handler import GLOSSARY_COLUMNS
+
+SAMPLE_PATH = os.path.join(ROOT, 'glossaire_2022_sample.csv')
+
+
+def write_glossary(path, count):
+    """CSV of count rows copied round-robin from the sample glossary"""
+    with open(SAMPLE_PATH, 'r', encoding='utf-8-sig') as f:
+        rows = [row for row in csv.reader(f, delimiter=';')][1:]
+    rows = [row for row in rows if len(row) >= 7]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(GLOSSARY_COLUMNS)
+        for number in range(count):
+            row = list(rows[number % len(rows)]) + [''] * (len(GLOSSARY_COLUMNS) - len(rows[number % len(rows)]))
+            copy = number // len(rows)
+            row[0] = str(number + 1)
+            if copy:
+                row[2] = f"{row[2]} {copy}"
+                row[3] = f"{row[3]} {copy}"
+            writer.writerow(row[:len(GLOSSARY_COLUMNS)])
+
+
+def resident_mb(field='VmRSS'):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not found in /proc/self/status")
+
+
+def measure_layout(csv_path, layout):
+    """Load one manager in this process (from the snapshot once it exists); return its memory and time"""
+    from terminology_handler import TerminologyManager
+    gc.collect()
+    baseline = resident_mb()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Writing the snapshot builds the three matchers
+        manager = TerminologyManager(csv_path, compact=(layout == 'compact'))
+    elapsed = time.perf_counter() - started
+    assert manager._matchers.keys() == {'arabic', 'french', 'arabic_normalized'}
+    gc.collect()
+    return {'entries': len(manager.terminology), 'mb': resident_mb() - baseline,
+            'peak_mb': resident_mb('VmHWM') - baseline, 'seconds': elapsed}
+
+
+def run_child(csv_path, layout):
+    child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', csv_path, layout],
+                           capture_output=True, text=True)
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr.strip().splitlines()[-1] if child.stderr.strip() else child.returncode)
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--layouts', nargs='+', default=['dict', 'compact'], choices=['dict', 'compact'])
+    parser.add_argument('--child', nargs=2, metavar=('CSV', 'LAYOUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_layout(*args.child)))
+        return
+
+    print(f"{'entries':>10} {'layout':>8} {'loaded MB':>10} {'load s':>7} {'build peak MB':>14} {'build s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.sizes:
+            csv_path = os.path.join(directory, f"glossary_{count}.csv")
+            write_glossary(csv_path, count)
+            results = {}
+            for layout in args.layouts:
+                try:
+                    build = run_child(csv_path, layout)
+                    result = results[layout] = run_child(csv_path, layout)
+                except RuntimeError as e:
+                    print(f"{count:>10} {layout:>8}   failed: {e}", flush=True)
+                    continue
+                print(f"{count:>10} {layout:>8} {result['mb']:>10.1f} {result['seconds']:>7.1f} "
+                      f"{build['peak_mb']:>14.1f} {build['seconds']:>8.1f}", flush=True)
+            if len(results) == 2:
+                saving = 1 - results['compact']['mb'] / results['dict']['mb']
+                print(f"{count:>10} {'saving':>8} {saving:>9.0%}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
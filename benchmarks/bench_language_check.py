@@ -0,0 +1,82 @@
+"""Benchmark the script-based language check against the previous per-sentence langdetect loop
+
+Run from the repository root:
+
+    python benchmarks/bench_language_check.py [--sentences 40] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from langdetect import detect
+from langdetect.lang_detect_exception import LangDetectException
+from language_check import language_distribution
+
+ARABIC_SENTENCES = [
+    "تستخدم الحرب الإلكترونية لتعطيل الطائرات المسيرة المعادية.",
+    "يعتمد التشويش على إرسال إشارات قوية على نفس تردد الاتصال.",
+    "تتطلب العمليات الحديثة تنسيقا دقيقا بين الوحدات البرية والجوية.",
+    "يوفر الاستطلاع الإلكتروني معلومات مبكرة عن نوايا العدو.",
+]
+LATIN_SENTENCES = [
+    "The jammer disrupts the control link of the drone.",
+    "Le brouilleur perturbe la liaison de commande du drone.",
+]
+
+
+def legacy_distribution(text, target_lang, technical_terms=None):
+    """The per-sentence langdetect loop detect_language_distribution used before"""
+    total = wrong_lang = 0
+    for sent in re.split(r'(?<=[.!?؟])\s+', text):
+        sent = sent.strip()
+        if not sent:
+            continue
+        if technical_terms and any(term in sent for term in technical_terms):
+            continue
+        try:
+            lang = detect(sent)
+        except LangDetectException:
+            continue
+        total += 1
+        if lang != target_lang:
+            wrong_lang += 1
+    return wrong_lang / total if total else 0.0
+
+
+def timed(function, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sentences', type=int, default=40, help='sentences per section')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    sentences = [rng.choice(LATIN_SENTENCES) if rng.random() < 0.1 else rng.choice(ARABIC_SENTENCES)
+                 for _ in range(args.sentences)]
+    section = " ".join(sentences)
+    terms = ["الحرب الإلكترونية", "التشويش"]
+
+    legacy_time, legacy = timed(lambda: legacy_distribution(section, "ar", terms), args.repeat)
+    script_time, current = timed(lambda: language_distribution(section, "ar", terms), args.repeat)
+    print(f"sentences: {args.sentences}  text: {len(section)} chars")
+    print(f"langdetect per sentence: {legacy_time * 1000:9.2f} ms  (wrong-language ratio {legacy:.2f})")
+    print(f"script-based check:      {script_time * 1000:9.2f} ms  (wrong-language ratio {current:.2f})")
+    print(f"speedup:                 {legacy_time / script_time:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Query latency of TermSearchIndex on a large glossary made of real sample rows
+
+Run from the repository root:
+
+    python benchmarks/bench_term_search.py [--entries 100000] [--repeat 5]
+
+The rows of glossaire_2022_sample.csv are replicated (each copy gets its own
+id and a numbered term) up to --entries entries, so token frequencies are
+those of real terms and definitions: function words such as "de" or "في"
+appear in nearly every entry. Queries are short topics, a section outline
+and a draft the size of a generated section, the latter as
+build_terminology_report sends it. The search runs on numpy when it is
+installed and in pure Python otherwise; the header says which.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import terminology_handler
+from terminology_handler import TermSearchIndex, TerminologyManager
+
+GLOSSARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'glossaire_2022_sample.csv')
+
+QUERIES = {
+    'french': [
+        "stratégie de la défense",
+        "la direction stratégique de l'offensive",
+        "emploi des forces armées en temps de guerre",
+    ],
+    'arabic': [
+        "الإستراتيجية العسكرية للدولة",
+        "الاتجاه الإستراتيجي في الحرب",
+        "استخدام القوات المسلحة",
+    ],
+}
+
+
+def replicated_entries(manager, language, count):
+    """count entries copied round-robin from the sample glossary"""
+    term_field = 'arabic_term' if language == 'arabic' else 'french_term'
+    sample = [dict(entry) for entry in manager.terminology.values()]
+    entries = []
+    for number in range(count):
+        entry = dict(sample[number % len(sample)])
+        copy = number // len(sample)
+        entry['id'] = f"{entry['id']}-{copy}"
+        if copy:
+            entry[term_field] = f"{entry[term_field]} {copy}"
+        entries.append(entry)
+    return entries
+
+
+def draft_query(manager, language, rng, words=400):
+    """Text the size of a section draft, assembled from definitions"""
+    definitions = [entry['arabic_def' if language == 'arabic' else 'french_def'] for entry in manager.terminology.values()]
+    parts = []
+    while sum(len(part.split()) for part in parts) < words:
+        parts.append(rng.choice(definitions))
+    return ' '.join(' '.join(parts).split()[:words])
+
+
+def time_query(index, query, limit, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        index.search(query, limit)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = TerminologyManager(GLOSSARY_PATH, use_snapshot=False)
+    rng = random.Random(42)
+    backend = 'pure Python' if terminology_handler.numpy is None else f"numpy {terminology_handler.numpy.__version__}"
+    print(f"{args.entries} entries, top {args.limit}, median of {args.repeat} runs, {backend} search")
+    for language, queries in QUERIES.items():
+        term_field, def_field = ('arabic_term', 'arabic_def') if language == 'arabic' else ('french_term', 'french_def')
+        started = time.perf_counter()
+        index = TermSearchIndex(replicated_entries(manager, language, args.entries), term_field, def_field)
+        print(f"\n{language}: index built in {time.perf_counter() - started:.1f} s")
+        for query in queries + [draft_query(manager, language, rng)]:
+            label = query if len(query) < 50 else f"draft of {len(query.split())} words"
+            top = index.search(query, args.limit)
+            exact = index.search(query, None)[:args.limit]
+            same = [entry['id'] for entry, _ in top] == [entry['id'] for entry, _ in exact]
+            print(f"  {label:<48} {time_query(index, query, args.limit, args.repeat):>9.2f} ms"
+                  f"  full ranking {time_query(index, query, None, 1):>8.2f} ms  same top: {same}")
+
+
+if __name__ == '__main__':
+    main()
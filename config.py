@@ -33,16 +33,78 @@ def get_config(local_url: str = "http://localhost:11434/v1") -> Dict:
             "max_sections": 5,
             "section_word_limit": 500,
             "intro_word_limit": 250,
-            "conclusion_word_limit": 250
+            "conclusion_word_limit": 250,
+            "max_parallel_sections": 6,     # Sections generated concurrently
+            "section_context": "outline",   # "outline", "previous" or "conclusion" (see section_scheduler)
+            "context_token_budget": 1500,   # Token budget for previous sections in each section prompt
+            "context_recent_sections": 1,   # Most recent previous sections kept verbatim
+            "context_summary_tokens": 80,   # Length of the summaries replacing older sections
+            "repair_attempts": 2            # Rounds of paragraph rewrites for language/terminology violations (0: off)
         },
         
         # Military terminology settings
         "terminology": {
             "glossary_path": "glossaire_2022_sample.csv",
+            "compact_store": False,      # Columnar glossary store for very large glossaries
+            "local_checker": True,       # TerminologyChecker reports from the glossary instead of an LLM
             "languages": ["arabic", "french"],
             "default_language": "arabic",
             "min_terms_per_section": 3,  # Minimum military terms to include per section
-            "max_related_terms": 5       # Maximum related terms to suggest
+            "max_related_terms": 5,      # Maximum related terms to suggest
+            "prompt_token_budget": 300,  # Token budget for glossary terms in each section prompt
+            "max_prompt_terms": 10       # Maximum glossary terms in each section prompt
+        },
+        
+        # Speaker order of the group chats (see speaker_flow). Each flow may set "transitions"
+        # (agent name -> next agent name), "final_speaker" and "final_turns": the chat ends once
+        # final_speaker has spoken final_turns times
+        "group_chat": {
+            "section_flow": {"final_speaker": "Writer", "final_turns": 3},  # Ends earlier once the Editor approves (see convergence)
+            "outline_flow": {"final_speaker": "OutlineCreator", "final_turns": 2}
+        },
+        
+        # Persistent LLM response cache shared by all agents (see utils/response_cache.py)
+        "response_cache": {
+            "enabled": True,
+            "path": "article_output/.llm_cache.sqlite",
+            "max_size_mb": 200           # Least recently used responses are evicted beyond this size
+        },
+        
+        # WebSearcher tool (see utils/web_search.py)
+        "web_search": {
+            "backend": "duckduckgo",     # "duckduckgo", "fixture" (fixture_path: JSON of query -> results) or "corpus" (corpus_dir)
+            "cache": True,
+            "cache_path": "article_output/.web_search_cache.sqlite",
+            "ttl_hours": 24,             # Cached results are searched again after this
+            "max_parallel_queries": 4    # Queries given together are searched concurrently
+        },
+        
+        # LLM call tracing (see utils/instrumentation.py)
+        "instrumentation": {
+            "trace_file": "llm_trace.jsonl",   # Written to the article's output directory
+            "prometheus_file": None            # e.g. "llm_metrics.prom"
+        },
+        
+        # Shared limits for every LLM call of the process (see utils/rate_limiter.py)
+        "rate_limit": {
+            "requests_per_minute": 60,
+            "tokens_per_minute": 100000,
+            "max_retries": 5,                  # Retries on 429, 5xx and timeouts
+            "base_delay": 1.0,                 # Backoff doubles from here, with jitter...
+            "max_delay": 60.0,                 # ...up to this many seconds
+            "expected_completion_tokens": 800  # Budgeted per call until the real usage is known
+        },
+        
+        # Checkpointing: reruns with the same inputs skip the outline and finished sections
+        "checkpoint": {
+            "enabled": True,
+            "manifest_file": "run_manifest.json"   # Written to the article's output directory
+        },
+        
+        # Batch mode (batch.py): articles generated at the same time, each with its own directory
+        "batch": {
+            "max_parallel_jobs": 2,
+            "output_dir": "batch_output"
         },
         
         # Output settings
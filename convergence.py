@@ -0,0 +1,110 @@
+"""Early termination of group chats once the editor approves a draft that passes local checks"""
+from typing import Any, Callable, Dict, List, Optional
+
+APPROVAL_MARKER = "APPROVED"
+
+
+class DraftConvergencePolicy:
+    """Decide when a drafting chat has converged and which draft to keep.
+
+    check_draft(content) runs the local checks on a draft and returns the names
+    of the failed checks (empty when the draft is accepted). The chat has
+    converged when the last message is the editor's approval and the latest
+    draft passes the local checks. Check results are cached per draft, since
+    they are evaluated after every round.
+
+    When the editor approves a draft that fails the checks, the chat goes on
+    and the failed checks are posted into it before the drafter's next turn,
+    with the hint of each check from check_hints when there is one.
+    """
+
+    def __init__(
+        self,
+        check_draft: Callable[[str], List[str]],
+        drafter_name: str = "Writer",
+        editor_name: str = "Editor",
+        approval_marker: str = APPROVAL_MARKER,
+        check_hints: Optional[Dict[str, str]] = None):
+        self.check_draft = check_draft
+        self.check_hints = dict(check_hints or {})
+        self.drafter_name = drafter_name
+        self.editor_name = editor_name
+        self.approval_marker = approval_marker
+        self._failures: Dict[str, List[str]] = {}
+
+    def failed_checks(self, content: str) -> List[str]:
+        if content not in self._failures:
+            self._failures[content] = list(self.check_draft(content))
+        return self._failures[content]
+
+    def drafts(self, messages: List[Dict]) -> List[str]:
+        """The drafter's messages, oldest first"""
+        return [message.get("content") or "" for message in messages if message.get("name") == self.drafter_name]
+
+    def _approved_draft(self, messages: List[Dict]) -> Optional[str]:
+        """The latest draft if the last message is the editor's approval, else None"""
+        if not messages or messages[-1].get("name") != self.editor_name:
+            return None
+        if self.approval_marker not in (messages[-1].get("content") or ""):
+            return None
+        drafts = self.drafts(messages)
+        return drafts[-1] if drafts else None
+
+    def is_converged(self, messages: List[Dict]) -> bool:
+        draft = self._approved_draft(messages)
+        return draft is not None and not self.failed_checks(draft)
+
+    def rejection_feedback(self, messages: List[Dict]) -> Optional[str]:
+        """Message explaining why an approved draft is not accepted, or None if there is nothing to explain"""
+        draft = self._approved_draft(messages)
+        failures = self.failed_checks(draft) if draft is not None else []
+        if not failures:
+            return None
+        lines = [f"The draft was approved but fails these local checks: {', '.join(failures)}."]
+        lines += [f"- {name}: {self.check_hints[name]}" for name in failures if name in self.check_hints]
+        lines.append(f"{self.drafter_name}, revise the draft to pass them.")
+        return "\n".join(lines)
+
+    def best_draft(self, messages: List[Dict]) -> Optional[str]:
+        """The last draft that passes the local checks, else the last draft, else None"""
+        drafts = self.drafts(messages)
+        for draft in reversed(drafts):
+            if not self.failed_checks(draft):
+                return draft
+        return drafts[-1] if drafts else None
+
+    def wrap(self, select_speaker: Callable, post_message: Optional[Callable[[Any, str], None]] = None) -> Callable:
+        """Speaker selection method that ends the chat (returns None) once converged.
+
+        When the chat goes on after an approval of a failing draft, the
+        rejection feedback is posted with post_message(groupchat, content)
+        (appended to groupchat.messages by default) before the next speaker is returned.
+        """
+        def select(last_speaker, groupchat):
+            if self.is_converged(groupchat.messages):
+                return None
+            feedback = self.rejection_feedback(groupchat.messages)
+            next_speaker = select_speaker(last_speaker, groupchat)
+            if feedback and next_speaker is not None:
+                if post_message is None:
+                    groupchat.messages.append({"role": "user", "name": "LocalChecks", "content": feedback})
+                else:
+                    post_message(groupchat, feedback)
+            return next_speaker
+        return select
+
+
+def chat_poster(manager, sender) -> Callable[[Any, str], None]:
+    """post_message for DraftConvergencePolicy.wrap: add a message from sender to an autogen group chat.
+
+    The message is appended to the chat history and sent by the manager to
+    every other agent, as GroupChatManager does with the agents' own replies,
+    so the next speaker sees it in its context.
+    """
+    def post(groupchat, content: str) -> None:
+        message = {"role": "user", "name": sender.name, "content": content}
+        groupchat.messages.append(dict(message))
+        for agent in groupchat.agents:
+            if agent is not sender:
+                manager.send(dict(message), agent, request_reply=False, silent=True)
+    return post
@@ -0,0 +1,206 @@
+"""Compact in-memory layout for large military glossaries"""
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List
+
+# Fields of a glossary entry, as built by TerminologyManager._process_term_entry
+ENTRY_FIELDS = ('id', 'arabic_term', 'french_term', 'arabic_def', 'french_def', 'category', 'subcategory')
+DEFINITION_FIELDS = ('arabic_def', 'french_def')
+
+# Definitions are stored zlib-compressed in blocks of this many rows
+DEFINITION_BLOCK_ROWS = 64
+
+
+class CompactGlossary:
+    """Columnar glossary store: one row per CSV entry, no per-entry dicts.
+
+    Terms and ids are kept as plain string columns (they double as lookup
+    keys), categories and subcategories as codes into one interned string
+    table. Definitions, the bulk of a glossary, are UTF-8 encoded and
+    compressed in blocks of DEFINITION_BLOCK_ROWS rows; a block is inflated
+    only when one of its definitions is read, and the last block read per
+    column is kept, so scanning entries in order decompresses each block once. ``terminology``, ``arabic_terms``,
+    ``french_terms`` and ``categories`` are read-only mappings with the same
+    keys, order and entry fields as the dict indexes of ``TerminologyManager``;
+    entries are lightweight views created on access.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.arabic_term_column: List[str] = []
+        self.french_term_column: List[str] = []
+        self._strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self._category_codes = array('I')
+        self._subcategory_codes = array('I')
+        self._definition_blocks: Dict[str, List[bytes]] = {field: [] for field in DEFINITION_FIELDS}
+        self._open_blocks = {field: bytearray() for field in DEFINITION_FIELDS}
+        self._definition_offsets = {field: array('I') for field in DEFINITION_FIELDS}
+        self._inflated: Dict[str, tuple] = {}
+        self._rows_by_id: Dict[str, int] = {}
+        self._rows_by_arabic: Dict[str, int] = {}
+        self._rows_by_french: Dict[str, int] = {}
+        self._rows_by_category: Dict[int, array] = {}
+        self.terminology = CompactTermIndex(self, self._rows_by_id)
+        self.arabic_terms = CompactTermIndex(self, self._rows_by_arabic)
+        self.french_terms = CompactTermIndex(self, self._rows_by_french)
+        self.categories = CompactCategoryIndex(self)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _intern(self, value: str) -> int:
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(sys.intern(value))
+            self._string_codes[value] = code
+        return code
+
+    def add(self, term_entry: Dict[str, str]) -> None:
+        """Append one entry and index it the way _process_term_entry indexes dict entries"""
+        row = len(self.ids)
+        self.ids.append(term_entry['id'])
+        self.arabic_term_column.append(term_entry['arabic_term'])
+        self.french_term_column.append(term_entry['french_term'])
+        category_code = self._intern(term_entry['category'])
+        self._category_codes.append(category_code)
+        self._subcategory_codes.append(self._intern(term_entry['subcategory']))
+        for field in DEFINITION_FIELDS:
+            block = self._open_blocks[field]
+            self._definition_offsets[field].append(len(block))
+            block += term_entry[field].encode('utf-8')
+            if (row + 1) % DEFINITION_BLOCK_ROWS == 0:
+                self._definition_blocks[field].append(zlib.compress(bytes(block)))
+                self._open_blocks[field] = bytearray()
+
+        self._rows_by_arabic[term_entry['arabic_term']] = row
+        self._rows_by_french[term_entry['french_term']] = row
+        self._rows_by_id[term_entry['id']] = row
+        self._rows_by_category.setdefault(category_code, array('I')).append(row)
+
+    def field(self, row: int, name: str) -> str:
+        """Value of one field of one row"""
+        if name == 'arabic_term':
+            return self.arabic_term_column[row]
+        if name == 'french_term':
+            return self.french_term_column[row]
+        if name in self._definition_offsets:
+            return self._definition(row, name)
+        if name == 'category':
+            return self._strings[self._category_codes[row]]
+        if name == 'subcategory':
+            return self._strings[self._subcategory_codes[row]]
+        if name == 'id':
+            return self.ids[row]
+        raise KeyError(name)
+
+    def _definition(self, row: int, field: str) -> str:
+        block_number = row // DEFINITION_BLOCK_ROWS
+        blocks = self._definition_blocks[field]
+        if block_number == len(blocks):
+            data = self._open_blocks[field]
+        else:
+            cached = self._inflated.get(field)
+            if cached is not None and cached[0] == block_number:
+                data = cached[1]
+            else:
+                data = zlib.decompress(blocks[block_number])
+                self._inflated[field] = (block_number, data)
+        offsets = self._definition_offsets[field]
+        next_row = row + 1
+        end = offsets[next_row] if next_row % DEFINITION_BLOCK_ROWS and next_row < len(offsets) else len(data)
+        return bytes(data[offsets[row]:end]).decode('utf-8')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_inflated'] = {}
+        return state
+
+    def entry(self, row: int) -> 'CompactEntry':
+        return CompactEntry(self, row)
+
+
+class CompactEntry(Mapping):
+    """Read-only view of one glossary row, usable wherever an entry dict is read"""
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: CompactGlossary, row: int):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key: str) -> str:
+        return self._store.field(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ENTRY_FIELDS)
+
+    def __len__(self) -> int:
+        return len(ENTRY_FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CompactRows(Sequence):
+    """Entries of a list of rows, materialized one at a time"""
+    __slots__ = ('_store', '_rows')
+
+    def __init__(self, store: CompactGlossary, rows):
+        self._store = store
+        self._rows = rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.entry(row) for row in self._rows[index]]
+        return self._store.entry(self._rows[index])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class CompactTermIndex(Mapping):
+    """Read-only key -> entry mapping over a CompactGlossary (by id or by term)"""
+    __slots__ = ('_store', '_rows')
+
+    def __init__(self, store: CompactGlossary, rows: Dict[str, int]):
+        self._store = store
+        self._rows = rows
+
+    def __getitem__(self, key: str) -> CompactEntry:
+        return self._store.entry(self._rows[key])
+
+    def __contains__(self, key) -> bool:
+        return key in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def entries(self) -> CompactRows:
+        """The mapping's values as an indexable sequence, without building a list of views"""
+        return CompactRows(self._store, array('I', self._rows.values()))
+
+
+class CompactCategoryIndex(Mapping):
+    """Read-only category -> entries mapping over a CompactGlossary"""
+    __slots__ = ('_store',)
+
+    def __init__(self, store: CompactGlossary):
+        self._store = store
+
+    def __getitem__(self, category: str) -> CompactRows:
+        code = self._store._string_codes.get(category)
+        if code is None or code not in self._store._rows_by_category:
+            raise KeyError(category)
+        return CompactRows(self._store, self._store._rows_by_category[code])
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._store._strings[code] for code in self._store._rows_by_category)
+
+    def __len__(self) -> int:
+        return len(self._store._rows_by_category)
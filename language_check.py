@@ -0,0 +1,126 @@
+"""Fast language distribution check for generated sections, based on Unicode scripts"""
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from langdetect import detect, DetectorFactory
+from langdetect.lang_detect_exception import LangDetectException
+DetectorFactory.seed = 0
+
+# Sentence ends, or a line break (headings and list items rarely end with punctuation)
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?؟])\s+|\n+')
+# Arabic letters, without tashkeel, Arabic-Indic digits and punctuation
+_ARABIC_LETTER = re.compile(r'[\u0621-\u064a\u066e-\u06d3\u06fa-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff\ufe70-\ufefc]')
+# Basic Latin and accented Latin letters, without the × and ÷ signs
+_LATIN_LETTER = re.compile(r'[A-Za-z\u00c0-\u00d6\u00d8-\u00f6\u00f8-\u024f]')
+_LATIN_WORD = re.compile(r"[A-Za-z\u00c0-\u00d6\u00d8-\u00f6\u00f8-\u024f]+")
+
+# Frequent function words that tell French from English without a statistical model
+_FRENCH_WORDS = frozenset("""le la les un une des du de au aux et est sont dans pour par sur avec qui que
+ne pas ce cette ces son sa ses leur leurs il elle ils elles nous vous ont été être plus mais ou où""".split())
+_ENGLISH_WORDS = frozenset("""the an of and is are in for by with which that who not this these its their
+it they we you have has been be more but or to from as at""".split())
+
+SpanList = Sequence[Tuple[int, int]]
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the non-empty sentences of the text"""
+    spans = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+@lru_cache(maxsize=32)
+def _term_pattern(terms: Tuple[str, ...]) -> Optional["re.Pattern"]:
+    terms = sorted({term for term in terms if term}, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(term) for term in terms)) if terms else None
+
+
+def term_spans(text: str, terms: Optional[Iterable[str]]) -> List[Tuple[int, int]]:
+    """Offsets of every occurrence of the given terms, longest term first at each position"""
+    pattern = _term_pattern(tuple(terms or ()))
+    return [match.span() for match in pattern.finditer(text)] if pattern else []
+
+
+def _remove_spans(text: str, start: int, end: int, spans: SpanList, first: int) -> Tuple[str, int]:
+    """text[start:end] without the parts covered by spans (sorted by start, from index first).
+
+    Returns the remaining text and the index of the first span that may reach later sentences.
+    """
+    parts = []
+    position = start
+    index = first
+    while index < len(spans) and spans[index][1] <= start:
+        index += 1
+    next_first = index
+    while index < len(spans) and spans[index][0] < end:
+        span_start, span_end = spans[index]
+        if span_start > position:
+            parts.append(text[position:span_start])
+        position = max(position, span_end)
+        index += 1
+    if position < end:
+        parts.append(text[position:end])
+    return ''.join(parts), next_first
+
+
+def latin_language(sentence: str, fallback: Callable[[str], str] = detect) -> Optional[str]:
+    """'fr' or 'en' for a Latin-script sentence; the fallback detector settles ties only"""
+    french = english = 0
+    for word in _LATIN_WORD.findall(sentence.lower()):
+        if word in _FRENCH_WORDS:
+            french += 1
+        if word in _ENGLISH_WORDS:
+            english += 1
+    if french != english:
+        return 'fr' if french > english else 'en'
+    try:
+        return fallback(sentence)
+    except LangDetectException:
+        return None
+
+
+def language_distribution(text: str, target_lang: str, technical_terms: Optional[Iterable[str]] = None,
+                          exempt_spans: Optional[SpanList] = None, min_letters: int = 3,
+                          fallback: Callable[[str], str] = detect) -> float:
+    """Share of the sentences that are not in target_lang ('ar', 'fr' or 'en').
+
+    Each sentence is classified by counting Arabic and Latin letters, once the
+    technical terms and exempt_spans (e.g. glossary term matches) are cut out by
+    offset; sentences with fewer than min_letters letters left are ignored.
+    Only Latin-script sentences that must be told apart between French and
+    English go further: function words decide, and the fallback detector
+    (langdetect) is called when they do not.
+    """
+    spans = sorted(list(exempt_spans or []) + term_spans(text, technical_terms))
+    total = 0
+    wrong_lang = 0
+    first = 0
+    for start, end in sentence_spans(text):
+        sentence, first = _remove_spans(text, start, end, spans, first)
+        arabic = len(_ARABIC_LETTER.findall(sentence))
+        latin = len(_LATIN_LETTER.findall(sentence))
+        if arabic + latin < min_letters:
+            continue
+        if arabic >= latin:
+            lang = 'ar'
+        elif target_lang == 'ar':
+            # Any Latin-script language is wrong in an Arabic article
+            lang = 'latin'
+        else:
+            lang = latin_language(sentence, fallback)
+            if lang is None:
+                continue
+        total += 1
+        if lang != target_lang:
+            wrong_lang += 1
+    if total == 0:
+        return 0.0
+    return wrong_lang / total
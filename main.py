@@ -1,18 +1,24 @@
 """Main script for running the article generation system with military terminology support"""
 from config import get_config
 from agents import create_agents
-from article_generator import generate_article_section
+from article_generator import generate_article_section, section_output_path
 from outline_generator import generate_outline
-from terminology_handler import TerminologyManager
+from section_scheduler import SectionScheduler, section_dependencies
+from section_context import SectionContextBuilder
+from speaker_flow import SpeakerFlow, SECTION_TRANSITIONS, OUTLINE_TRANSITIONS
+from terminology_handler import TerminologyManager, get_terminology_manager, IncrementalTermVerifier
+from utils.response_cache import ResponseCache
+from utils.instrumentation import LLMCallRecorder
+from utils.rate_limiter import get_rate_limiter
+from utils.web_search import configure_web_search
+from run_manifest import RunManifest, fingerprint
+from typing import Dict, Optional
 import re
 import os
 
-def main():
-    # Get configuration
-    config = get_config()
-
-    # Separate llm_config from other configurations
-    llm_config = {
+def get_llm_config(config: Dict) -> Dict:
+    """Separate llm_config from other configurations"""
+    return {
         "seed": config.get("seed"),
         "temperature": config.get("temperature"),
         "config_list": config.get("config_list"),
@@ -20,58 +26,90 @@ def main():
         "cache_seed": config.get("cache_seed"),
     }
 
-    # Extract other configuration sections
-    code_execution_config = config.get("code_execution_config")
+def create_response_cache(config: Dict) -> Optional[ResponseCache]:
+    """Shared LLM response cache from the response_cache config section, or None when disabled"""
+    response_cache_config = config.get("response_cache", {})
+    if not response_cache_config.get("enabled", False):
+        return None
+    # Reruns reuse every LLM call whose request has not changed
+    return ResponseCache(
+        response_cache_config.get("path", "article_output/.llm_cache.sqlite"),
+        max_size_mb=response_cache_config.get("max_size_mb", 200)
+    )
+
+def generate_article(params: Dict, config: Dict, term_manager: TerminologyManager,
+                     response_cache: Optional[ResponseCache] = None, output_dir: Optional[str] = None) -> Dict:
+    """Generate one article: outline, sections and the final terminology check.
+
+    params: topic, target_audience, tone, word_count and language of the article.
+    Everything is written under output_dir (default: output.dir from the config).
+    The glossary manager and response cache can be shared by several articles
+    generated at once (see batch.py); every article of the process shares one
+    rate limiter for the provider's request and token limits. Returns the output paths and run statistics.
+    """
+    llm_config = get_llm_config(config)
     article_structure_config = config.get("article_structure")
     terminology_config = config.get("terminology")
-    output_config = config.get("output")
+    group_chat_config = config.get("group_chat", {})
+    instrumentation_config = config.get("instrumentation", {})
+    checkpoint_config = config.get("checkpoint", {})
+    output_dir = output_dir or config.get("output", {}).get("dir", "article_output")
+    os.makedirs(output_dir, exist_ok=True)
+    outline_path = os.path.join(output_dir, "outline.txt")
+    article_path = os.path.join(output_dir, "complete_article.txt")
 
-    # Default article parameters
-    default_topic = "دور وأهمية الحرب الالكترونية في التصدي للطائرات بدون طيار"
-    default_audience = "military personel"
-    default_tone = "formal"
-    default_word_count = "500"
-    default_language = "arabic"
-    
-    # Get article parameters with defaults
-    print("\n=== Military Article Generation System ===\n")
-    topic = input(f"Enter article topic [{default_topic}]: ") or default_topic
-    target_audience = input(f"Enter target audience [{default_audience}]: ") or default_audience
-    tone = input(f"Enter desired tone (formal, technical, etc.) [{default_tone}]: ") or default_tone
+    topic = params["topic"]
+    target_audience = params["target_audience"]
+    tone = params["tone"]
+    word_count = params["word_count"]
+    language = params["language"]
+
+    # Every model call is traced per stage and agent
+    recorder = LLMCallRecorder(os.path.join(output_dir, instrumentation_config.get("trace_file", "llm_trace.jsonl")))
+    # ...and goes through the process-wide request/token budget, with retries on transient errors
+    rate_limiter = get_rate_limiter(config.get("rate_limit", {}))
 
-    word_count = input(f"Enter target word count [{default_word_count}]: ") or default_word_count
-    language = input(f"Enter language (arabic/french) [{default_language}]: ").lower() or default_language
-    
-    # Initialize terminology manager with military glossary
-    glossary_path = "glossaire_2022_sample.csv"
-    term_manager = TerminologyManager(glossary_path)
-    print(f"\nLoaded {len(term_manager.terminology)} military terms from glossary")
-    
-    # Get relevant terminology suggestions for the topic
-    relevant_terms = term_manager.suggest_terms_for_topic(topic, language)
-    if relevant_terms:
-        print("\nRelevant military terms for your topic:")
-        for term in relevant_terms[:5]:  # Show top 5 relevant terms
-            if language == "arabic":
-                print(f"- {term['arabic_term']}: {term['arabic_def']}")
-            else:
-                print(f"- {term['french_term']}: {term['french_def']}")
-    
     # Create agents
     print("\nInitializing specialized agents...")
-    agents = create_agents(llm_config)
+    # The TerminologyChecker answers from the glossary itself unless configured as an LLM agent
+    checker_manager = term_manager if terminology_config.get("local_checker", True) else None
+    glossary_language = "arabic" if language == "arabic" else "french"
+    # The checker's report asks for the same number of glossary terms as the section checks enforce
+    min_terms = terminology_config.get("min_terms_per_section", 3)
+    agents = create_agents(llm_config, response_cache=response_cache,
+                           terminology_manager=checker_manager, terminology_language=glossary_language,
+                           recorder=recorder, rate_limiter=rate_limiter, min_terms=min_terms)
 
-    # Generate the outline
-    print("\nGenerating article outline...")
-    outline_content = generate_outline(agents, topic, target_audience, tone, word_count, language) # Pass language
+    # A rerun with the same inputs resumes from the manifest: the outline and finished sections are reused
+    manifest = None
+    if checkpoint_config.get("enabled", True):
+        manifest = RunManifest(os.path.join(output_dir, checkpoint_config.get("manifest_file", "run_manifest.json")))
+        manifest.start({
+            "topic": topic,
+            "target_audience": target_audience,
+            "tone": tone,
+            "word_count": word_count,
+            "language": language,
+            "models": [entry.get("model") for entry in llm_config.get("config_list") or []],
+            "temperature": llm_config.get("temperature"),
+        })
 
-    # Create output directory if it doesn't exist
-    os.makedirs("article_output", exist_ok=True)
+    outline_content = manifest.saved_outline() if manifest else None
+    if outline_content is not None:
+        print(f"\nReusing the outline of the interrupted run from {outline_path}")
+    else:
+        # Generate the outline
+        print("\nGenerating article outline...")
+        outline_flow = SpeakerFlow.from_config(group_chat_config.get("outline_flow"), OUTLINE_TRANSITIONS, "OutlineCreator")
+        with recorder.stage("outline"):
+            outline_content = generate_outline(agents, topic, target_audience, tone, word_count, language, terminology_manager=term_manager, speaker_flow=outline_flow)
 
-    # Save outline
-    with open("article_output/outline.txt", "w", encoding="utf-8") as f:
-        f.write(outline_content)
-    print("Outline saved to article_output/outline.txt")
+        # Save outline
+        with open(outline_path, "w", encoding="utf-8") as f:
+            f.write(outline_content)
+        print(f"Outline saved to {outline_path}")
+        if manifest and outline_content:
+            manifest.record_outline(outline_path, outline_content)
 
     # Parse the outline into sections (title and details)
     parsed_outline_sections = []
@@ -104,39 +142,105 @@ def main():
         # Fallback: treat the whole outline as a single section to generate if needed
         # This part can be enhanced based on how critical structured sections are.
 
-    complete_article_parts = []
-    previous_content_for_context = []
-
-    # Generate each section based on the parsed outline
+    # Determine section_number for article_generator (0 for intro, -1 for conclusion, 1+ for body)
+    # This is a heuristic and might need refinement based on outline conventions
     for i, section_data in enumerate(parsed_outline_sections):
-        section_title_from_outline = section_data["title"]
-        section_details_from_outline = section_data["details"]
-
-        print(f"\nGenerating content for section: {section_title_from_outline}...")
-
-        # Determine section_number for article_generator (0 for intro, -1 for conclusion, 1+ for body)
-        # This is a heuristic and might need refinement based on outline conventions
-        num = i
-        title_lower = section_title_from_outline.lower()
+        title_lower = section_data["title"].lower()
         if "introduction" in title_lower or "مقدمة" in title_lower:
-            num = 0
+            section_data["number"] = 0
         elif "conclusion" in title_lower or "خاتمة" in title_lower or "الخاتمة" in title_lower :
-            num = -1
+            section_data["number"] = -1
         else:
-            num = i + 1 # Assuming 0 is intro, so body sections start from 1
-
-        section_body_content = generate_article_section(
-            agents,
-            section_title_from_outline, # This is the key title to generate content FOR
-            num,
-            section_details_from_outline, # Pass only the details for this section
-            previous_content_for_context,
-            target_language=language
-        )
-        # Assemble the section with its title
-        full_section_text = f"{section_title_from_outline}\n\n{section_body_content}"
-        complete_article_parts.append(full_section_text)
-        previous_content_for_context.append(full_section_text) # Add full section for context
+            section_data["number"] = i + 1 # Assuming 0 is intro, so body sections start from 1
+
+    # Sections are tracked in the manifest by heading, so editing one outline section
+    # only invalidates that section (and the sections that take it as context)
+    heading_counts = {}
+    for section_data in parsed_outline_sections:
+        heading_counts[section_data["title"]] = heading_counts.get(section_data["title"], 0) + 1
+        count = heading_counts[section_data["title"]]
+        section_data["key"] = section_data["title"] if count == 1 else f"{section_data['title']} #{count}"
+
+    sections_dir = os.path.join(output_dir, "sections")
+
+    # Previous sections are passed within a token budget: recent ones verbatim, older ones summarized
+    context_builder = SectionContextBuilder(
+        token_budget=article_structure_config.get("context_token_budget", 1500),
+        recent_sections=article_structure_config.get("context_recent_sections", 1),
+        summary_tokens=article_structure_config.get("context_summary_tokens", 80)
+    )
+
+    section_flow = SpeakerFlow.from_config(group_chat_config.get("section_flow"), SECTION_TRANSITIONS, "Writer")
+
+    def generate_section(section_agents, section_data, previous_sections):
+        previous_texts = [f"{earlier['title']}\n\n{body}" for earlier, body in previous_sections]
+        # Everything the section is generated from except the shared outline, which is only context
+        input_hash = fingerprint({
+            "title": section_data["title"],
+            "details": section_data["details"],
+            "number": section_data["number"],
+            "previous_sections": previous_texts,
+        })
+        if manifest:
+            finished = manifest.completed_section(section_data["key"], input_hash)
+            if finished is not None:
+                print(f"\nReusing finished section: {section_data['title']}")
+                return finished
+            manifest.mark_section(section_data["key"], input_hash, "running")
+
+        print(f"\nGenerating content for section: {section_data['title']}...")
+        try:
+            with recorder.stage(f"section {section_data['number']}"):
+                section_body_content = generate_article_section(
+                    section_agents,
+                    section_data["title"], # This is the key title to generate content FOR
+                    section_data["number"],
+                    section_data["details"], # Pass only the details for this section
+                    previous_texts,
+                    target_language=language,
+                    terminology_manager=term_manager,
+                    term_token_budget=terminology_config.get("prompt_token_budget", 300),
+                    max_prompt_terms=terminology_config.get("max_prompt_terms", 10),
+                    shared_context=outline_content,
+                    context_builder=context_builder,
+                    speaker_flow=section_flow,
+                    min_terms=min_terms,
+                    word_range=(300, article_structure_config.get("section_word_limit", 500)),
+                    raise_errors=manifest is not None,
+                    output_dir=output_dir,
+                    repair_attempts=article_structure_config.get("repair_attempts", 2)
+                )
+        except Exception as e:
+            if manifest:
+                manifest.mark_section(section_data["key"], input_hash, "failed", error=str(e))
+            raise
+        if manifest:
+            manifest.mark_section(section_data["key"], input_hash, "done",
+                                  output_path=section_output_path(section_data["title"], section_data["number"], sections_dir))
+        return section_body_content
+
+    # Generate sections concurrently; a section waits only for the sections it takes as context
+    context_mode = article_structure_config.get("section_context", "outline")
+    dependencies = section_dependencies([section["number"] for section in parsed_outline_sections], context_mode)
+    scheduler = SectionScheduler(
+        lambda: create_agents(llm_config, response_cache=response_cache,
+                              terminology_manager=checker_manager, terminology_language=glossary_language,
+                              recorder=recorder, rate_limiter=rate_limiter, min_terms=min_terms),
+        max_workers=article_structure_config.get("max_parallel_sections", 6)
+    )
+    try:
+        section_bodies = scheduler.run(parsed_outline_sections, generate_section, dependencies)
+    except Exception:
+        if manifest:
+            print(f"\nSection generation failed. Rerun with the same inputs to resume from {manifest.path}.")
+        raise
+
+    # Assemble the sections with their titles, in outline order
+    complete_article_parts = []
+    article_parts_for_verification = []  # Titles and bodies, in order, as checked individually
+    for section_data, section_body_content in zip(parsed_outline_sections, section_bodies):
+        complete_article_parts.append(f"{section_data['title']}\n\n{section_body_content}")
+        article_parts_for_verification.extend([section_data["title"], section_body_content])
 
     # Combine into complete article
     print("\nAssembling complete article...")
@@ -144,16 +248,88 @@ def main():
 
     # Final terminology check
     print("\nPerforming final terminology verification...")
-    # Using check_and_replace_content for consistency, assuming an empty map if no global replacements
-    final_article, suggestions = term_manager.check_and_replace_content(complete_article, language=language, replacement_map={})
+    # Sections were already checked as they were generated: reuse those results and
+    # only rescan the joins between sections (the joined parts equal complete_article)
+    verifier = IncrementalTermVerifier(term_manager, language)
+    final_article, suggestions = verifier.check_document(article_parts_for_verification, separator="\n\n")
     if suggestions:
         print(f"Made {len(suggestions)} terminology adjustments in the final document")
 
     # Save complete article
-    with open("article_output/complete_article.txt", "w", encoding="utf-8") as f:
+    with open(article_path, "w", encoding="utf-8") as f:
         f.write(final_article)
     
-    print("\nArticle generation complete! Output saved to article_output/complete_article.txt")
+    print(f"\nArticle generation complete! Output saved to {article_path}")
+    # Where time and tokens went, per stage and agent
+    print("\nLLM calls:")
+    print(recorder.format_summary())
+    print(f"Trace written to {recorder.trace_path}")
+    limiter_stats = rate_limiter.stats()
+    print(f"Rate limiter: {limiter_stats['retries']} retries, {limiter_stats['queue_wait_total_s']:.1f}s queued "
+          f"(max {limiter_stats['queue_wait_max_s']:.1f}s per call)")
+    if instrumentation_config.get("prometheus_file"):
+        recorder.write_prometheus(os.path.join(output_dir, instrumentation_config["prometheus_file"]))
+
+    totals = recorder.summarize().values()
+    return {
+        "output_dir": output_dir,
+        "outline_path": outline_path,
+        "article_path": article_path,
+        "trace_path": recorder.trace_path,
+        "sections": len(parsed_outline_sections),
+        "llm_calls": sum(row["calls"] for row in totals),
+        "prompt_tokens": sum(row["prompt_tokens"] for row in totals),
+        "completion_tokens": sum(row["completion_tokens"] for row in totals),
+    }
+
+def main():
+    # Get configuration
+    config = get_config()
+    terminology_config = config.get("terminology")
+
+    # Default article parameters
+    default_topic = "دور وأهمية الحرب الالكترونية في التصدي للطائرات بدون طيار"
+    default_audience = "military personel"
+    default_tone = "formal"
+    default_word_count = "500"
+    default_language = "arabic"
+    
+    # Get article parameters with defaults
+    print("\n=== Military Article Generation System ===\n")
+    topic = input(f"Enter article topic [{default_topic}]: ") or default_topic
+    target_audience = input(f"Enter target audience [{default_audience}]: ") or default_audience
+    tone = input(f"Enter desired tone (formal, technical, etc.) [{default_tone}]: ") or default_tone
+
+    word_count = input(f"Enter target word count [{default_word_count}]: ") or default_word_count
+    language = input(f"Enter language (arabic/french) [{default_language}]: ").lower() or default_language
+    
+    # Load the military glossary once; every stage below shares this instance
+    glossary_path = terminology_config.get("glossary_path", "glossaire_2022_sample.csv")
+    term_manager = get_terminology_manager(glossary_path, compact=terminology_config.get("compact_store", False))
+    print(f"\nLoaded {len(term_manager.terminology)} military terms from glossary")
+    
+    # Get relevant terminology suggestions for the topic
+    relevant_terms = term_manager.suggest_terms_for_topic(topic, language, limit=terminology_config.get("max_related_terms", 5))
+    if relevant_terms:
+        print("\nRelevant military terms for your topic:")
+        for term in relevant_terms:  # Already ranked by relevance
+            if language == "arabic":
+                print(f"- {term['arabic_term']}: {term['arabic_def']}")
+            else:
+                print(f"- {term['french_term']}: {term['french_def']}")
+    
+    response_cache = create_response_cache(config)
+    configure_web_search(config.get("web_search", {}))
+    generate_article({
+        "topic": topic,
+        "target_audience": target_audience,
+        "tone": tone,
+        "word_count": word_count,
+        "language": language,
+    }, config, term_manager, response_cache)
+    if response_cache is not None:
+        cache_stats = response_cache.stats()
+        print(f"LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} cached responses")
 
 if __name__ == "__main__":
     main()
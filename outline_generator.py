@@ -1,13 +1,18 @@
 """Generate outlines for military articles with terminology support"""
 import os
 import autogen
-from typing import Dict, List
+from typing import Dict, List, Optional
 import re
+from terminology_handler import TerminologyManager
+from speaker_flow import SpeakerFlow, OUTLINE_TRANSITIONS
 
 class OutlineGenerator:
-    def __init__(self, agents: Dict[str, autogen.ConversableAgent], agent_config: Dict):
+    def __init__(self, agents: Dict[str, autogen.ConversableAgent], agent_config: Dict, terminology_manager: Optional[TerminologyManager] = None, speaker_flow: Optional[SpeakerFlow] = None):
         self.agents = agents
         self.agent_config = agent_config
+        self.terminology_manager = terminology_manager
+        # Deterministic speaker order: OutlineCreator -> TerminologyChecker -> Editor -> OutlineCreator
+        self.speaker_flow = speaker_flow or SpeakerFlow(OUTLINE_TRANSITIONS, final_speaker="OutlineCreator")
 
     def generate_outline(self, topic: str, target_audience: str, tone: str, word_count: int, language: str = "arabic") -> str:
         """Generate an article outline based on topic and parameters"""
@@ -18,11 +23,14 @@ class OutlineGenerator:
         terminology_checker = self.agents["terminology_checker"]
         user_proxy = self.agents["user_proxy"]
         
-        # Create group chat for outline creation
+        # Create group chat for outline creation; the speaker flow picks speakers without LLM calls
+        outline_agents = [user_proxy, outline_creator, editor, terminology_checker]
+        self.speaker_flow.validate(agent.name for agent in outline_agents)
         outline_group_chat = autogen.GroupChat(
-            agents=[user_proxy, outline_creator, editor, terminology_checker],
+            agents=outline_agents,
             messages=[],
-            max_round=10 # Increased rounds for potentially better refinement
+            max_round=self.speaker_flow.max_rounds(user_proxy.name),
+            speaker_selection_method=self.speaker_flow
         )
         
         # Get the LLM config from one of the agents
@@ -44,6 +52,14 @@ class OutlineGenerator:
             section_words = remaining_words / num_main_sections if num_main_sections > 0 else remaining_words
         except ValueError:
             intro_words, section_words, conclusion_words = 100, 300, 100 # Fallback
+
+        # Point the outline at official glossary terms when a glossary is available
+        glossary_hint = ""
+        if self.terminology_manager is not None:
+            term_field = 'arabic_term' if language == 'arabic' else 'french_term'
+            topic_terms = [entry[term_field] for entry in self.terminology_manager.suggest_terms_for_topic(topic, language, limit=5)]
+            if topic_terms:
+                glossary_hint = "- Where relevant, use these official glossary terms: " + ", ".join(topic_terms)
         
         # Generate outline prompt with military terminology focus
         prompt = f"""
@@ -81,6 +97,7 @@ class OutlineGenerator:
         - The outline must be written entirely in {language.upper()}.
         - Ensure technical accuracy and use precise military terminology where appropriate within the outline points.
         - The structure should be logical and easy for other agents to follow to write the full article.
+        {glossary_hint}
         """
         
         try:
@@ -100,9 +117,9 @@ class OutlineGenerator:
             print(f"Error generating outline: {str(e)}")
             return ""
 
-def generate_outline(agents, topic, target_audience, tone, word_count, language="arabic"):
+def generate_outline(agents, topic, target_audience, tone, word_count, language="arabic", terminology_manager=None, speaker_flow=None):
     """Wrapper function to create an OutlineGenerator and call generate_outline"""
     # Get the agent config from one of the agents rather than using an index
     agent_config = next(iter(agents.values())).llm_config
-    generator = OutlineGenerator(agents, agent_config)
+    generator = OutlineGenerator(agents, agent_config, terminology_manager, speaker_flow)
     return generator.generate_outline(topic, target_audience, tone, word_count, language)
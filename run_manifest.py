@@ -0,0 +1,107 @@
+"""Run manifest for checkpointing and resuming article generation"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+MANIFEST_VERSION = 1
+
+
+def fingerprint(value: Any) -> str:
+    """Stable SHA-256 of a JSON-serializable value"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """Record a run's inputs, outline and per-section progress in a JSON file.
+
+    The manifest holds the run parameters, the outline hash and path, and for
+    each section (keyed by its outline heading) the hash of its inputs, its
+    output path and its status. A rerun with the same parameters reuses the
+    outline and every section whose inputs are unchanged and whose output file
+    still exists; changing the parameters starts a fresh manifest. Writes are
+    atomic and thread-safe, so concurrently generated sections can report.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data: Dict = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: [RunManifest] Ignoring unreadable manifest {path}: {e}")
+                self.data = {}
+        if self.data.get("version") != MANIFEST_VERSION:
+            self.data = {}
+
+    def start(self, params: Dict) -> bool:
+        """Begin a run with these parameters; returns True when resuming a run with the same ones"""
+        params_hash = fingerprint(params)
+        with self._lock:
+            resumed = self.data.get("params_hash") == params_hash
+            if not resumed:
+                self.data = {"version": MANIFEST_VERSION, "params": params, "params_hash": params_hash,
+                             "outline": None, "sections": {}}
+            self.data["updated"] = time.time()
+            self._save()
+        if resumed:
+            done = sum(1 for entry in self.data["sections"].values() if entry.get("status") == "done")
+            print(f"INFO: [RunManifest] Resuming run from {self.path}: {done} sections already done.")
+        return resumed
+
+    def saved_outline(self) -> Optional[str]:
+        """The outline of this run if it was generated and its file still exists.
+
+        The file is read as it is now, so manual edits to the outline are picked up.
+        """
+        outline = self.data.get("outline")
+        if not outline or not os.path.exists(outline["path"]):
+            return None
+        with open(outline["path"], "r", encoding="utf-8") as f:
+            content = f.read()
+        if fingerprint(content) != outline["hash"]:
+            print("INFO: [RunManifest] Outline changed since the last run; only affected sections will be regenerated.")
+            self.record_outline(outline["path"], content)
+        return content
+
+    def record_outline(self, path: str, content: str) -> None:
+        with self._lock:
+            self.data["outline"] = {"path": path, "hash": fingerprint(content)}
+            self._save()
+
+    def completed_section(self, key: str, input_hash: str) -> Optional[str]:
+        """Output of a finished section with the same inputs, or None if it must be (re)generated"""
+        entry = self.data.get("sections", {}).get(key)
+        if not entry or entry.get("status") != "done" or entry.get("input_hash") != input_hash:
+            return None
+        if not os.path.exists(entry["output_path"]):
+            return None
+        with open(entry["output_path"], "r", encoding="utf-8") as f:
+            return f.read()
+
+    def mark_section(self, key: str, input_hash: str, status: str,
+                     output_path: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Record a section's status: "running", "done" or "failed" """
+        with self._lock:
+            self.data.setdefault("sections", {})[key] = {
+                "input_hash": input_hash,
+                "status": status,
+                "output_path": output_path,
+                "error": error,
+                "updated": time.time(),
+            }
+            self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
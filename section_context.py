@@ -0,0 +1,108 @@
+"""Token-budgeted context of previously generated sections for section prompts"""
+import hashlib
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.tokens import count_tokens
+
+_SENTENCE_END = re.compile(r'(?<=[.!?؟])\s+')
+
+
+def extractive_summary(body: str, max_tokens: int) -> str:
+    """Leading sentences of a section body, up to max_tokens, without markdown headings or bullets"""
+    text = " ".join(
+        line.strip().lstrip("-*• ").strip()
+        for line in body.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    )
+    summary = []
+    used = 0
+    for sentence in _SENTENCE_END.split(text):
+        cost = count_tokens(sentence)
+        if summary and used + cost > max_tokens:
+            break
+        if not summary and cost > max_tokens:
+            # A single overlong sentence is cut at a word boundary
+            words = []
+            for word in sentence.split():
+                if count_tokens(" ".join(words + [word])) > max_tokens:
+                    break
+                words.append(word)
+            return " ".join(words) + " …"
+        summary.append(sentence)
+        used += cost
+    return " ".join(summary)
+
+
+class SectionContextBuilder:
+    """Render previous sections as prompt context within a token budget.
+
+    Every section keeps its heading. The most recent sections are kept verbatim
+    when they fit, older ones are replaced by a compact summary, and when even
+    summaries no longer fit only the headings of the oldest sections remain.
+    Summaries are cached per section body, so each one is computed once even
+    when shared between concurrently generated sections.
+
+    summarizer(body, max_tokens) produces the summaries; defaults to the
+    leading sentences of the body (no LLM call).
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        recent_sections: int = 1,
+        summary_tokens: int = 80,
+        summarizer: Optional[Callable[[str, int], str]] = None):
+        self.token_budget = token_budget
+        self.recent_sections = recent_sections
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or extractive_summary
+        self._summaries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def summary(self, body: str) -> str:
+        """Cached compact summary of a section body"""
+        key = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._summaries.get(key)
+        if cached is None:
+            cached = self.summarizer(body, self.summary_tokens)
+            with self._lock:
+                self._summaries[key] = cached
+        return cached
+
+    @staticmethod
+    def split_section(section: str) -> Tuple[str, str]:
+        """Heading (first line) and body of a "title\\n\\nbody" section"""
+        heading, _, body = section.strip().partition("\n")
+        return heading.strip(), body.strip()
+
+    def build(self, previous_sections: List[str]) -> Tuple[str, int]:
+        """Return the context text for the given sections (in article order) and its token count"""
+        if not previous_sections:
+            return "", 0
+        sections = [self.split_section(section) for section in previous_sections]
+        rendered = [heading for heading, _ in sections]
+        remaining = self.token_budget - sum(count_tokens(heading) + 1 for heading in rendered)
+
+        # Newest sections get the remaining budget first
+        for index in range(len(sections) - 1, -1, -1):
+            heading, body = sections[index]
+            if not body:
+                continue
+            heading_cost = count_tokens(heading)
+            if len(sections) - index <= self.recent_sections:
+                verbatim = f"{heading}\n{body}"
+                cost = count_tokens(verbatim) - heading_cost
+                if cost <= remaining:
+                    rendered[index] = verbatim
+                    remaining -= cost
+                    continue
+            summarized = f"{heading}\nSummary: {self.summary(body)}"
+            cost = count_tokens(summarized) - heading_cost
+            if cost <= remaining:
+                rendered[index] = summarized
+                remaining -= cost
+
+        context = "\n\n".join(rendered)
+        return context, count_tokens(context)
@@ -0,0 +1,108 @@
+"""Paragraph-level repair of language and terminology violations in a generated section"""
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from language_check import language_distribution
+from utils.tokens import count_tokens
+
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n')
+
+
+class ParagraphIssue(NamedTuple):
+    """A paragraph to send back to the Writer, with its [start, end) offsets in the section"""
+    start: int
+    end: int
+    problems: List[str]
+
+
+def paragraph_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the non-blank paragraphs (blocks separated by blank lines)"""
+    spans = []
+    start = 0
+    for match in list(_PARAGRAPH_BREAK.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        if text[start:end].strip():
+            spans.append((start, end))
+        if match:
+            start = match.end()
+    return spans
+
+
+def find_paragraph_issues(text: str, target_lang: str, target_language: str,
+                          technical_terms: Optional[Iterable[str]] = None,
+                          variants: Optional[Dict[str, str]] = None) -> List[ParagraphIssue]:
+    """Paragraphs with a sentence not in target_lang, or with a glossary spelling variant left.
+
+    target_lang is the language code ('ar', 'fr' or 'en') and target_language
+    the name used in the instructions; variants maps each variant as written to
+    its official glossary term (see TerminologyManager.find_term_variants).
+    """
+    technical_terms = list(technical_terms or [])
+    issues = []
+    for start, end in paragraph_spans(text):
+        paragraph = text[start:end]
+        problems = []
+        if language_distribution(paragraph, target_lang, technical_terms) > 0:
+            problems.append(f"Some sentences are not in {target_language}: write every sentence in {target_language}.")
+        for written, official in (variants or {}).items():
+            if written in paragraph:
+                problems.append(f'Replace "{written}" with the official glossary term "{official}".')
+        if problems:
+            issues.append(ParagraphIssue(start, end, problems))
+    return issues
+
+
+def repair_prompt(paragraph: str, problems: List[str], target_language: str) -> str:
+    problem_list = "\n".join(f"- {problem}" for problem in problems)
+    return f"""Rewrite the paragraph below from a military article section to fix these problems:
+{problem_list}
+
+Keep its meaning, facts, structure (headings, bullet points) and approximate length.
+Keep the official glossary terms as they are. Write in {target_language}.
+Reply with the corrected paragraph only, without any comment.
+
+PARAGRAPH:
+{paragraph}"""
+
+
+class SectionRepairer:
+    """Fix the offending paragraphs of a section instead of regenerating it.
+
+    find_issues(text) lists the paragraphs to fix; each one is sent on its own
+    to rewrite(prompt) -> str (the Writer) with the list of its problems, and
+    the reply is spliced in place of the paragraph. After each round,
+    fix_text(text) may apply deterministic corrections (glossary spellings)
+    before the section is checked again. At most max_attempts rounds are run.
+    """
+
+    def __init__(self, rewrite: Callable[[str], str], find_issues: Callable[[str], List[ParagraphIssue]],
+                 target_language: str, max_attempts: int = 2,
+                 fix_text: Optional[Callable[[str], str]] = None):
+        self.rewrite = rewrite
+        self.find_issues = find_issues
+        self.target_language = target_language
+        self.max_attempts = max_attempts
+        self.fix_text = fix_text
+
+    def repair(self, text: str) -> Tuple[str, Dict]:
+        """Return the repaired text and a report of the rounds, paragraphs and prompt tokens spent"""
+        report = {"attempts": 0, "paragraphs_sent": 0, "prompt_tokens": 0, "remaining": 0}
+        issues = self.find_issues(text)
+        while issues and report["attempts"] < self.max_attempts:
+            report["attempts"] += 1
+            # Splice from the end so the offsets of earlier paragraphs stay valid
+            for issue in sorted(issues, key=lambda issue: issue.start, reverse=True):
+                prompt = repair_prompt(text[issue.start:issue.end], issue.problems, self.target_language)
+                report["paragraphs_sent"] += 1
+                report["prompt_tokens"] += count_tokens(prompt)
+                try:
+                    replacement = (self.rewrite(prompt) or "").strip()
+                except Exception as e:
+                    print(f"WARNING: [SectionRepairer] Paragraph rewrite failed: {e}")
+                    continue
+                if replacement:
+                    text = text[:issue.start] + replacement + text[issue.end:]
+            if self.fix_text is not None:
+                text = self.fix_text(text)
+            issues = self.find_issues(text)
+        report["remaining"] = len(issues)
+        return text, report
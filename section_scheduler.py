@@ -0,0 +1,96 @@
+"""Schedule article section generation concurrently while keeping outline order"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# How sections get context from the sections generated before them
+CONTEXT_MODES = ("outline", "previous", "conclusion")
+
+
+def section_dependencies(section_numbers: Sequence[int], context_mode: str = "outline") -> List[List[int]]:
+    """Indexes of the earlier sections each section receives as context.
+
+    section_numbers: the section_number of each section in outline order
+    (0 for the introduction, -1 for the conclusion, 1+ for body sections).
+    context_mode:
+      "outline"    - no section waits for another; the outline is the shared context
+      "previous"   - every section sees all earlier sections (sequential generation)
+      "conclusion" - only the conclusion sees the sections before it
+    """
+    if context_mode not in CONTEXT_MODES:
+        raise ValueError(f"Unknown section context mode '{context_mode}', expected one of {CONTEXT_MODES}")
+    dependencies = []
+    for index, number in enumerate(section_numbers):
+        if context_mode == "previous" or (context_mode == "conclusion" and number == -1):
+            dependencies.append(list(range(index)))
+        else:
+            dependencies.append([])
+    return dependencies
+
+
+class SectionScheduler:
+    """Generate sections on a thread pool as soon as their context sections are done.
+
+    Each worker thread gets its own agents from agent_factory, since autogen agents
+    keep per-conversation state and must not be shared between concurrent chats.
+    """
+
+    def __init__(self, agent_factory: Callable[[], Dict], max_workers: int = 6):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.agent_factory = agent_factory
+        self.max_workers = max_workers
+        self._local = threading.local()
+
+    def _worker_agents(self) -> Dict:
+        agents = getattr(self._local, "agents", None)
+        if agents is None:
+            agents = self.agent_factory()
+            self._local.agents = agents
+        return agents
+
+    def _generate(self, generate: Callable, section: Dict, context: List[Tuple[Dict, str]]) -> str:
+        return generate(self._worker_agents(), section, context)
+
+    def run(
+        self,
+        sections: Sequence[Dict],
+        generate: Callable[[Dict, Dict, List[Tuple[Dict, str]]], str],
+        dependencies: Optional[Sequence[Sequence[int]]] = None) -> List[str]:
+        """Generate every section and return the results in outline order.
+
+        generate(agents, section, context) produces one section; context holds a
+        (section, result) pair for each section in dependencies[i], in outline order.
+        Dependencies must point to earlier sections. Defaults to no dependencies.
+        """
+        if dependencies is None:
+            dependencies = [[] for _ in sections]
+        if len(dependencies) != len(sections):
+            raise ValueError("dependencies must have one entry per section")
+        for index, needed in enumerate(dependencies):
+            if any(not 0 <= dep < index for dep in needed):
+                raise ValueError(f"Section {index} can only depend on earlier sections: {list(needed)}")
+
+        results: List[Optional[str]] = [None] * len(sections)
+        done = set()
+        waiting = list(range(len(sections)))
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="section") as executor:
+            try:
+                while waiting or running:
+                    # Start every section whose context sections are finished, in outline order
+                    for index in [i for i in waiting if all(dep in done for dep in dependencies[i])]:
+                        waiting.remove(index)
+                        context = [(sections[dep], results[dep]) for dep in sorted(dependencies[index])]
+                        future = executor.submit(self._generate, generate, sections[index], context)
+                        running[future] = index
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index = running.pop(future)
+                        results[index] = future.result()
+                        done.add(index)
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        return results
@@ -0,0 +1,84 @@
+"""Deterministic speaker transitions for the outline and section group chats"""
+from typing import Dict, Iterable, Optional
+
+# Agent names (see agents.create_agents) -> the agent that speaks next
+SECTION_TRANSITIONS = {
+    "ArticleRequester": "Writer",
+    "Writer": "TerminologyChecker",
+    "TerminologyChecker": "Editor",
+    "Editor": "Writer",
+}
+OUTLINE_TRANSITIONS = {
+    "ArticleRequester": "OutlineCreator",
+    "OutlineCreator": "TerminologyChecker",
+    "TerminologyChecker": "Editor",
+    "Editor": "OutlineCreator",
+}
+
+
+class SpeakerFlow:
+    """Speaker selection state machine for autogen.GroupChat.
+
+    Used as ``speaker_selection_method``: the next speaker follows from the last
+    one through a fixed transition table, so no LLM call is spent choosing it and
+    every run takes the same path. The chat ends (the method returns None) once
+    final_speaker has spoken final_turns times, when a message contains
+    "TERMINATE", or when the last speaker has no transition.
+    """
+
+    def __init__(self, transitions: Dict[str, str], final_speaker: str, final_turns: int = 2):
+        if final_turns < 1:
+            raise ValueError("final_turns must be at least 1")
+        self.transitions = dict(transitions)
+        self.final_speaker = final_speaker
+        self.final_turns = final_turns
+
+    @classmethod
+    def from_config(cls, flow_config: Optional[Dict], default_transitions: Dict[str, str], default_final_speaker: str) -> "SpeakerFlow":
+        """Build a flow from a config section with optional transitions, final_speaker and final_turns"""
+        flow_config = flow_config or {}
+        return cls(
+            flow_config.get("transitions", default_transitions),
+            flow_config.get("final_speaker", default_final_speaker),
+            flow_config.get("final_turns", 2)
+        )
+
+    def validate(self, agent_names: Iterable[str]) -> None:
+        """Raise ValueError if the flow names an agent that is not in the chat"""
+        known = set(agent_names)
+        named = set(self.transitions) | set(self.transitions.values()) | {self.final_speaker}
+        unknown = sorted(named - known)
+        if unknown:
+            raise ValueError(f"Speaker flow refers to agents not in the group chat: {unknown}")
+
+    def is_finished(self, messages) -> bool:
+        """Local termination condition, evaluated on the chat messages"""
+        if messages and "TERMINATE" in (messages[-1].get("content") or ""):
+            return True
+        turns = sum(1 for message in messages if message.get("name") == self.final_speaker)
+        return turns >= self.final_turns
+
+    def __call__(self, last_speaker, groupchat):
+        if self.is_finished(groupchat.messages):
+            return None
+        next_name = self.transitions.get(last_speaker.name)
+        if next_name is None:
+            return None
+        return groupchat.agent_by_name(next_name)
+
+    def max_rounds(self, first_speaker: str) -> int:
+        """Rounds the chat takes when it starts with first_speaker's message and follows the flow"""
+        rounds, turns = 1, 0
+        speaker = first_speaker
+        seen = set()
+        while (speaker, turns) not in seen:
+            seen.add((speaker, turns))
+            speaker = self.transitions.get(speaker)
+            if speaker is None:
+                break
+            rounds += 1
+            if speaker == self.final_speaker:
+                turns += 1
+                if turns >= self.final_turns:
+                    break
+        return rounds
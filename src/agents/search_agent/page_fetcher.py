@@ -0,0 +1,260 @@
+"""Concurrent fetching of web pages with pooled connections and streaming text extraction"""
+import asyncio
+import codecs
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# Elements whose text is never part of the main content
+SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "template"}
+# Elements that end a block of text
+BLOCK_TAGS = {"p", "div", "li", "br", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "article", "blockquote"}
+# Void elements have no end tag, so they must not open a skipped region
+VOID_TAGS = {"br", "img", "input", "meta", "link", "hr", "source", "wbr", "area", "base", "col", "embed", "track"}
+
+
+class PageTextExtractor(HTMLParser):
+    """Collect the title, main text and links of a page as it is fed, without building a tree.
+
+    Text inside SKIPPED_TAGS is dropped. Once max_text_chars of text are
+    collected, done is set so the caller can stop reading the page.
+    """
+
+    def __init__(self, max_text_chars: int = 20000, base_url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.max_text_chars = max_text_chars
+        self.base_url = base_url
+        self.title = ""
+        # (href, classes of the enclosing elements, classes of the enclosing elements it is the first link of)
+        self.links: List[Tuple[str, List[str], List[str]]] = []
+        self._blocks: List[str] = []
+        self._current: List[str] = []
+        self._text_chars = 0
+        self._skip_depth = 0
+        self._in_title = False
+        self._classes: List[List] = []  # Open elements: [tag, classes, contains a link yet]
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a" and attributes.get("href"):
+            classes = [cls for _, element_classes, _ in self._classes for cls in element_classes]
+            first_of = [cls for _, element_classes, has_link in self._classes if not has_link for cls in element_classes]
+            for element in self._classes:
+                element[2] = True
+            self.links.append((urljoin(self.base_url, attributes["href"]), classes, first_of))
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        if tag not in VOID_TAGS:
+            self._classes.append([tag, (attributes.get("class") or "").split(), False])
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        # Pop up to the matching start tag; unclosed inner elements are closed with it
+        for index in range(len(self._classes) - 1, -1, -1):
+            if self._classes[index][0] == tag:
+                del self._classes[index:]
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth and not self.done:
+            self._current.append(data)
+
+    def _end_block(self):
+        block = " ".join("".join(self._current).split())
+        self._current = []
+        if block and not self.done:
+            self._blocks.append(block)
+            self._text_chars += len(block)
+            if self._text_chars >= self.max_text_chars:
+                self.done = True
+
+    @property
+    def text(self) -> str:
+        self._end_block()
+        return "\n".join(self._blocks)[:self.max_text_chars]
+
+
+class FetchResult(NamedTuple):
+    url: str
+    status: Optional[int]
+    title: str
+    text: str
+    links: List[Tuple[str, List[str], List[str]]]
+    error: Optional[str] = None
+    from_cache: bool = False
+
+
+class ConnectionPool:
+    """Keep-alive http.client connections, at most max_per_host idle ones per host"""
+
+    def __init__(self, timeout: float, max_per_host: int):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def get(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+            self.connections_opened += 1
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(netloc, timeout=self.timeout)
+
+    def put(self, scheme: str, netloc: str, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+class PageFetcher:
+    """Fetch many pages at once and extract their title, main text and links.
+
+    Requests run on a thread pool of max_concurrency connections driven by
+    asyncio, with at most max_per_host requests to the same host at a time.
+    Connections are kept alive and reused per host. Each page is read in
+    chunks and fed to a PageTextExtractor, which stops reading once enough
+    text is collected. Results are cached by URL (any object with get/set,
+    such as utils.response_cache.ResponseCache; an in-memory dict by default).
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_per_host: int = 4, timeout: float = 10.0,
+                 max_text_chars: int = 20000, max_bytes: int = 2_000_000, max_redirects: int = 3,
+                 cache=None, user_agent: str = "Mozilla/5.0 (compatible; MilitaryArticleResearcher/1.0)"):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_text_chars = max_text_chars
+        self.max_bytes = max_bytes
+        self.max_redirects = max_redirects
+        self.cache = cache
+        self._memory_cache: Dict[str, FetchResult] = {}
+        self.user_agent = user_agent
+        self.pool = ConnectionPool(timeout, max_per_host)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fetch")
+
+    def _cached(self, url: str) -> Optional[FetchResult]:
+        if self.cache is not None:
+            cached = self.cache.get(f"page:{url}")
+            return FetchResult(*cached)._replace(from_cache=True) if cached is not None else None
+        cached = self._memory_cache.get(url)
+        return cached._replace(from_cache=True) if cached is not None else None
+
+    def _store(self, url: str, result: FetchResult) -> None:
+        """Cache a successful fetch under the requested URL (result.url is the one after redirects)"""
+        if result.error is not None or result.status != 200:
+            return
+        if self.cache is not None:
+            self.cache.set(f"page:{url}", tuple(result))
+        else:
+            self._memory_cache[url] = result
+
+    def _request(self, url: str) -> FetchResult:
+        """Blocking fetch of one page, following redirects; runs on the thread pool"""
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                return FetchResult(url, None, "", "", [], error=f"unsupported URL scheme '{parts.scheme}'")
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            connection = self.pool.get(parts.scheme, parts.netloc)
+            try:
+                response = self._send(connection, path)
+            except (OSError, http.client.HTTPException):
+                # A kept-alive connection the server closed: retry once on a fresh one
+                connection.close()
+                connection = self.pool.get(parts.scheme, parts.netloc)
+                response = self._send(connection, path)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                self.pool.put(parts.scheme, parts.netloc, connection)
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            return self._read_page(url, parts, connection, response)
+        return FetchResult(url, None, "", "", [], error="too many redirects")
+
+    def _send(self, connection: http.client.HTTPConnection, path: str) -> http.client.HTTPResponse:
+        connection.request("GET", path, headers={
+            "User-Agent": self.user_agent, "Accept": "text/html,*/*;q=0.5", "Accept-Encoding": "identity",
+        })
+        return connection.getresponse()
+
+    def _read_page(self, url, parts, connection, response) -> FetchResult:
+        charset = response.msg.get_content_charset() or "utf-8"
+        try:
+            decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        extractor = PageTextExtractor(self.max_text_chars, base_url=url)
+        received = 0
+        while not extractor.done and received < self.max_bytes:
+            chunk = response.read1(65536) if hasattr(response, "read1") else response.read(65536)
+            if not chunk:
+                break
+            received += len(chunk)
+            extractor.feed(decoder.decode(chunk))
+        if response.length == 0:
+            # Marks the response complete, which http.client requires before the connection is reused
+            response.read()
+        if response.isclosed() and not response.will_close:
+            self.pool.put(parts.scheme, parts.netloc, connection)
+        else:
+            # The rest of the page is not needed: drop the connection rather than read it
+            connection.close()
+        return FetchResult(url, response.status, " ".join(extractor.title.split()), extractor.text, extractor.links)
+
+    async def fetch(self, url: str, host_limits: Optional[Dict[str, asyncio.Semaphore]] = None) -> FetchResult:
+        cached = self._cached(url)
+        if cached is not None:
+            return cached
+        host_limits = host_limits if host_limits is not None else {}
+        host = urlsplit(url).netloc
+        limit = host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            loop = asyncio.get_running_loop()
+            try:
+                result = await asyncio.wait_for(loop.run_in_executor(self._executor, self._request, url),
+                                                timeout=self.timeout * (self.max_redirects + 1))
+            except Exception as e:
+                return FetchResult(url, None, "", "", [], error=f"{type(e).__name__}: {e}")
+        self._store(url, result)
+        return result
+
+    async def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        """Fetch the URLs concurrently; results are in URL order and failures carry an error"""
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        return list(await asyncio.gather(*(self.fetch(url, host_limits) for url in urls)))
+
+    def fetch_many(self, urls: List[str]) -> List[FetchResult]:
+        """Blocking wrapper of fetch_all for synchronous callers"""
+        return asyncio.run(self.fetch_all(urls))
+
+    def close(self) -> None:
+        self.pool.close()
+        self._executor.shutdown(wait=False)
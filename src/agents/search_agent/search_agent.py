@@ -1,16 +1,34 @@
-import requests
-from bs4 import BeautifulSoup
+from urllib.parse import quote_plus, parse_qs, urlsplit
+from src.agents.search_agent.page_fetcher import PageFetcher
 
 class SearchAgent:
-    def __init__(self, query):
+    def __init__(self, query, fetcher=None, search_url="https://www.google.com/search?q={query}"):
         self.query = query
+        # One fetcher (connection pool and page cache) can serve several agents
+        self.fetcher = fetcher or PageFetcher()
+        self.search_url = search_url
 
     def search(self):
-        # ...existing code...
-        response = requests.get(f"https://www.google.com/search?q={self.query}")
-        soup = BeautifulSoup(response.text, 'html.parser')
+        """First link of each organic result (element with class 'g') of the search page"""
+        page = self.fetcher.fetch_many([self.search_url.format(query=quote_plus(self.query))])[0]
+        if page.error:
+            print(f"WARNING: [SearchAgent] Search failed: {page.error}")
+            return []
         results = []
-        for g in soup.find_all(class_='g'):
-            link = g.find('a')['href']
-            results.append(link)
+        for href, _, first_of in page.links:
+            # Later links of a result ("Similar", "Cached") are not results
+            if 'g' not in first_of:
+                continue
+            # Result links may be wrapped in a redirect: /url?q=<target>
+            target = parse_qs(urlsplit(href).query).get('q', [href])[0] if urlsplit(href).path == '/url' else href
+            if target not in results:
+                results.append(target)
         return results
+
+    def fetch_sources(self, limit=12):
+        """Title and main text of the top results, fetched concurrently"""
+        pages = self.fetcher.fetch_many(self.search()[:limit])
+        return [
+            {'url': page.url, 'title': page.title, 'text': page.text}
+            for page in pages if not page.error and page.status == 200
+        ]
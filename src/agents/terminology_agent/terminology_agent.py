@@ -1,8 +1,10 @@
-import csv
 import re
+from terminology_handler import get_terminology_manager
 
 class TerminologyAgent:
     def __init__(self, glossary_file):
+        # Share the process-wide glossary instead of parsing a second copy
+        self.term_manager = get_terminology_manager(glossary_file)
         self.glossary = self.load_glossary(glossary_file)
         self.arabic_terms = {}
         self.french_terms = {}
@@ -10,36 +12,14 @@ class TerminologyAgent:
         self.process_glossary()
 
     def load_glossary(self, glossary_file):
-        glossary = []
-        with open(glossary_file, mode='r', encoding='utf-8') as infile:
-            reader = csv.reader(infile, delimiter=';')
-            next(reader)  # Skip header
-            for row in reader:
-                if len(row) >= 7:
-                    glossary.append({
-                        'id': row[0],
-                        'arabic_term': row[2],
-                        'french_term': row[3],
-                        'arabic_def': row[4],
-                        'french_def': row[5],
-                        'category': row[6]
-                    })
-        return glossary
+        """Glossary entries in file order, taken from the shared manager"""
+        return list(get_terminology_manager(glossary_file).terminology.values())
 
     def process_glossary(self):
-        """Process glossary into usable dictionaries"""
-        for entry in self.glossary:
-            # Index by Arabic term
-            self.arabic_terms[entry['arabic_term']] = entry
-            
-            # Index by French term
-            self.french_terms[entry['french_term']] = entry
-            
-            # Group by category
-            category = entry['category']
-            if category not in self.categorized_terms:
-                self.categorized_terms[category] = []
-            self.categorized_terms[category].append(entry)
+        """Use the shared manager's indexes as lookup dictionaries"""
+        self.arabic_terms = self.term_manager.arabic_terms
+        self.french_terms = self.term_manager.french_terms
+        self.categorized_terms = self.term_manager.categories
 
     def check_terminology_usage(self, chapter, language='arabic'):
         """Check if terminology is used correctly in the chapter"""
@@ -1,15 +1,35 @@
-from googletrans import Translator
+from terminology_handler import get_terminology_manager
+from src.agents.translation_agent.translation_memory import TranslationMemory, TranslationPipeline, GoogleTransBackend
+
+DEFAULT_MEMORY_PATH = "article_output/.translation_memory.sqlite"
 
 class TranslationAgent:
-    def __init__(self, resources, target_language):
+    def __init__(self, resources, target_language, source_language=None, backend=None,
+                 memory=None, terminology_manager=None, memory_path=DEFAULT_MEMORY_PATH,
+                 glossary_path="glossaire_2022_sample.csv"):
+        """Translate resources into target_language.
+
+        Without source_language the backend detects it ('auto'), and each
+        sentence's own language keys the translation memory. The memory is
+        kept on disk at memory_path and seeded with the Arabic/French pairs of
+        the glossary (the shared manager of glossary_path unless
+        terminology_manager is given), so military terms always get their
+        official translation. backend defaults to googletrans and can be
+        replaced by any object with translate_batch().
+        """
         self.resources = resources
         self.target_language = target_language
-        self.translator = Translator()
+        self.source_language = source_language or 'auto'
+        if terminology_manager is None:
+            terminology_manager = get_terminology_manager(glossary_path)
+        self.memory = memory if memory is not None else TranslationMemory(memory_path)
+        self.memory.seed_from_glossary(terminology_manager)
+        self.pipeline = TranslationPipeline(backend or GoogleTransBackend(), self.memory, terminology_manager)
 
     def translate(self):
-        # ...existing code...
-        translated_resources = []
-        for resource in self.resources:
-            translated = self.translator.translate(resource, dest=self.target_language)
-            translated_resources.append(translated.text)
+        """Translated resources, in order; repeated sentences and known segments cost no backend call"""
+        translated_resources = self.pipeline.translate_texts(list(self.resources), self.source_language, self.target_language)
+        stats = self.pipeline.stats
+        print(f"INFO: [TranslationAgent] {stats['segments']} segments, {stats['memory_hits']} from memory, "
+              f"{stats['backend_segments']} translated in {stats['backend_calls']} backend calls")
         return translated_resources
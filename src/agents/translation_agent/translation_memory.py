@@ -0,0 +1,243 @@
+"""Sentence-level translation with a glossary-seeded translation memory and a pluggable backend"""
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+from terminology_handler import TerminologyManager, normalize_arabic
+from terminology_checker import draft_language
+from language_check import latin_language
+
+# Sentence ends and line breaks, kept so translated texts are reassembled with their layout
+_SEGMENT_BREAK = re.compile(r'((?<=[.!?؟])[ \t]+|\s*\n\s*)')
+_PLACEHOLDER = "[[{}]]"
+# Placeholders as backends may return them: inner spaces added, or half of the brackets lost
+_RETURNED_PLACEHOLDER = re.compile(r'\[\s*\[\s*(\d+)\s*\]\s*\]')
+_LEFTOVER_PLACEHOLDER = re.compile(r'\[\s*\[|\]\s*\]|\[\s*\d+\s*\]')
+GLOSSARY_LANGUAGES = {"ar": "arabic", "fr": "french"}
+
+
+def normalize_segment(segment: str, language: str) -> str:
+    """Key for fuzzy-exact matches: case, spacing, outer punctuation and Arabic spelling variants ignored"""
+    text = unicodedata.normalize("NFKC", segment).casefold()
+    if language == "ar":
+        text = normalize_arabic(text)
+    return " ".join(text.split()).strip(" .!?؟,;:،؛\"'«»")
+
+
+def segment_language(segment: str) -> str:
+    """'ar' for Arabic-script segments, else the Latin-script language ('fr', 'en', ...), or 'auto' if unknown"""
+    if draft_language(segment) == "arabic":
+        return "ar"
+    return latin_language(segment) or "auto"
+
+
+def split_segments(text: str) -> List[str]:
+    """Alternating segments and separators: even indexes are sentences, odd ones the breaks between them"""
+    return _SEGMENT_BREAK.split(text)
+
+
+class TranslationMemory:
+    """Persistent store of translated segments, looked up by exact text, then by normalized text.
+
+    path=None keeps the memory in-process. Entries remember their origin
+    ("glossary" or "backend"); glossary pairs are never overwritten by backend output.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or ":memory:"
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS segments (source_lang TEXT, target_lang TEXT, source TEXT, "
+                "normalized TEXT, target TEXT, origin TEXT, PRIMARY KEY (source_lang, target_lang, source))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS segments_normalized ON segments (source_lang, target_lang, normalized)"
+            )
+
+    def lookup(self, segment: str, source_lang: str, target_lang: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT target FROM segments WHERE source_lang = ? AND target_lang = ? AND source = ?",
+                (source_lang, target_lang, segment)
+            ).fetchone()
+            if row is None:
+                row = self._connection.execute(
+                    "SELECT target FROM segments WHERE source_lang = ? AND target_lang = ? AND normalized = ? "
+                    "ORDER BY origin = 'glossary' DESC LIMIT 1",
+                    (source_lang, target_lang, normalize_segment(segment, source_lang))
+                ).fetchone()
+        return row[0] if row else None
+
+    def add(self, pairs: List[Tuple[str, str]], source_lang: str, target_lang: str, origin: str = "backend") -> None:
+        rows = [(source_lang, target_lang, source, normalize_segment(source, source_lang), target, origin)
+                for source, target in pairs if source.strip() and target.strip()]
+        verb = "INSERT OR REPLACE" if origin == "glossary" else "INSERT OR IGNORE"
+        with self._lock, self._connection:
+            self._connection.executemany(f"{verb} INTO segments VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def seed_from_glossary(self, manager: TerminologyManager) -> int:
+        """Add every Arabic/French glossary pair in both directions; returns the number of pairs"""
+        pairs = [(entry["arabic_term"], entry["french_term"]) for entry in manager.terminology.values()
+                 if entry.get("arabic_term") and entry.get("french_term")]
+        self.add(pairs, "ar", "fr", origin="glossary")
+        self.add([(french, arabic) for arabic, french in pairs], "fr", "ar", origin="glossary")
+        return len(pairs)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class GoogleTransBackend:
+    """googletrans, translating each batch of segments in one call"""
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, segments: List[str], source_lang: str, target_lang: str) -> List[str]:
+        translations = self.translator.translate(segments, src=source_lang, dest=target_lang)
+        return [translation.text for translation in translations]
+
+
+class IdentityBackend:
+    """Offline stand-in that leaves segments untranslated"""
+
+    def translate_batch(self, segments: List[str], source_lang: str, target_lang: str) -> List[str]:
+        return list(segments)
+
+
+class TranslationPipeline:
+    """Translate texts sentence by sentence, sending the backend only what the memory cannot answer.
+
+    Segments are deduplicated across all texts of a call. Each unique segment
+    is looked up in the translation memory (exact, then normalized); glossary
+    terms in the remaining segments are replaced by placeholders and put back
+    as their official translation, so the backend never translates them
+    freely. Those segments go to the backend in batches of batch_size, and the
+    results are added to the memory. A result whose placeholders cannot all be
+    restored is discarded and its sentence translated again unprotected.
+    """
+
+    def __init__(self, backend, memory: Optional[TranslationMemory] = None,
+                 terminology_manager: Optional[TerminologyManager] = None, batch_size: int = 50):
+        self.backend = backend
+        self.memory = memory if memory is not None else TranslationMemory()
+        self.terminology_manager = terminology_manager
+        self.batch_size = batch_size
+        self.stats = {"segments": 0, "unique_segments": 0, "memory_hits": 0, "backend_segments": 0, "backend_calls": 0,
+                      "unprotected_retries": 0}
+
+    def _protect_terms(self, segment: str, source_lang: str, target_lang: str) -> Tuple[str, Dict[str, str]]:
+        """Replace glossary terms with numbered placeholders; returns the text and placeholder -> translation"""
+        language = GLOSSARY_LANGUAGES.get(source_lang)
+        if self.terminology_manager is None or language is None or target_lang not in GLOSSARY_LANGUAGES:
+            return segment, {}
+        replacements = {}
+        parts = []
+        position = 0
+        for match in self.terminology_manager.find_term_matches(segment, language=language):
+            if match.start < position:
+                continue
+            translation = self.memory.lookup(match.term, source_lang, target_lang)
+            if translation is None:
+                continue
+            placeholder = _PLACEHOLDER.format(len(replacements))
+            replacements[placeholder] = translation
+            parts.append(segment[position:match.start] + placeholder)
+            position = match.end
+        parts.append(segment[position:])
+        return "".join(parts), replacements
+
+    @staticmethod
+    def _restore_terms(result: str, replacements: Dict[str, str]) -> Optional[str]:
+        """Put the term translations back in place of their placeholders.
+
+        Returns None unless every placeholder was found exactly once and nothing
+        that looks like a placeholder is left.
+        """
+        restored = []
+
+        def restore(match):
+            placeholder = _PLACEHOLDER.format(match.group(1))
+            if placeholder not in replacements:
+                return match.group(0)
+            restored.append(placeholder)
+            return replacements[placeholder]
+
+        result = _RETURNED_PLACEHOLDER.sub(restore, result)
+        if sorted(restored) != sorted(replacements) or _LEFTOVER_PLACEHOLDER.search(result):
+            return None
+        return result
+
+    def translate_texts(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """Translate texts from source_lang, or from each segment's own language when source_lang is 'auto'.
+
+        With 'auto' the backend still detects the language itself; the detected
+        language only keys the memory and the glossary, and segments already in
+        target_lang are kept as they are.
+        """
+        split_texts = [split_segments(text) for text in texts]
+        translations: Dict[str, str] = {}
+        pending: List[str] = []
+        segment_langs: Dict[str, str] = {}
+        for parts in split_texts:
+            for segment in parts[0::2]:
+                if not segment.strip():
+                    continue
+                self.stats["segments"] += 1
+                if segment in translations or segment in segment_langs:
+                    continue
+                self.stats["unique_segments"] += 1
+                segment_lang = segment_language(segment) if source_lang == "auto" else source_lang
+                if segment_lang == target_lang:
+                    translations[segment] = segment
+                    continue
+                remembered = self.memory.lookup(segment, segment_lang, target_lang)
+                if remembered is not None:
+                    self.stats["memory_hits"] += 1
+                    translations[segment] = remembered
+                else:
+                    pending.append(segment)
+                    segment_langs[segment] = segment_lang
+
+        for batch_start in range(0, len(pending), self.batch_size):
+            batch = pending[batch_start:batch_start + self.batch_size]
+            protected = [self._protect_terms(segment, segment_langs[segment], target_lang) for segment in batch]
+            self.stats["backend_calls"] += 1
+            self.stats["backend_segments"] += len(batch)
+            results = self.backend.translate_batch([text for text, _ in protected], source_lang, target_lang)
+            new_pairs: List[Tuple[str, str]] = []
+            unprotected = []
+            for segment, (_, replacements), result in zip(batch, protected, results):
+                restored = self._restore_terms(result, replacements) if replacements else result
+                if restored is None:
+                    # The backend mangled a placeholder: translate the original sentence instead
+                    unprotected.append(segment)
+                    continue
+                translations[segment] = restored
+                new_pairs.append((segment, restored))
+            if unprotected:
+                self.stats["backend_calls"] += 1
+                self.stats["unprotected_retries"] += len(unprotected)
+                results = self.backend.translate_batch(unprotected, source_lang, target_lang)
+                for segment, result in zip(unprotected, results):
+                    translations[segment] = result
+                    new_pairs.append((segment, result))
+            for lang in {segment_langs[segment] for segment, _ in new_pairs}:
+                self.memory.add([pair for pair in new_pairs if segment_langs[pair[0]] == lang], lang, target_lang)
+
+        output = []
+        for parts in split_texts:
+            output.append("".join(translations.get(part, part) if index % 2 == 0 else part
+                                  for index, part in enumerate(parts)))
+        return output
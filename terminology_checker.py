@@ -0,0 +1,70 @@
+"""Deterministic terminology review of drafts, posted into group chats by the TerminologyChecker"""
+from typing import Dict, List, Optional
+from terminology_handler import TerminologyManager
+
+
+def draft_language(content: str) -> str:
+    """Glossary language of a draft: 'arabic' when Arabic letters outnumber Latin ones, else 'french'"""
+    arabic = latin = 0
+    for ch in content:
+        if '\u0600' <= ch <= '\u06ff':
+            arabic += 1
+        elif ch.isascii() and ch.isalpha():
+            latin += 1
+    return 'arabic' if arabic >= latin else 'french'
+
+
+def build_terminology_report(manager: TerminologyManager, content: str, language: Optional[str] = None,
+                             min_terms: int = 3, max_suggestions: int = 5) -> Dict:
+    """Check a draft against the glossary.
+
+    Spelling variants of glossary terms are found in normalized form and
+    corrected with check_and_replace_content; the report lists the glossary
+    terms used, the corrections to apply, and related glossary terms the draft
+    does not use yet.
+    """
+    language = language or draft_language(content)
+    variants = manager.find_term_variants(content, language=language)
+    corrected, results = manager.check_and_replace_content(content, language=language, replacement_map=variants)
+    # Without replacements check_and_replace_content returns the identified terms instead
+    corrections = [result for result in results if 'replaced_with' in result]
+
+    used_terms: List[str] = []
+    for match in manager.find_term_matches(corrected, language=language):
+        if match.term not in used_terms:
+            used_terms.append(match.term)
+
+    term_field = 'arabic_term' if language == 'arabic' else 'french_term'
+    suggested_terms = []
+    for entry, _ in manager.search_terms(content, language, limit=max_suggestions + len(used_terms)):
+        if entry[term_field] not in used_terms:
+            suggested_terms.append(entry[term_field])
+        if len(suggested_terms) >= max_suggestions:
+            break
+
+    return {
+        'language': language,
+        'glossary_terms_used': used_terms,
+        'corrections': corrections,
+        'suggested_terms': suggested_terms,
+        'meets_minimum': len(used_terms) >= min_terms,
+        'min_terms': min_terms,
+    }
+
+
+def format_terminology_report(report: Dict) -> str:
+    """Render a terminology report as the chat message the Writer and Editor read"""
+    lines = ["TERMINOLOGY REPORT (official glossary check)"]
+    used = report['glossary_terms_used']
+    lines.append(f"- Glossary terms used ({len(used)}): {', '.join(used) if used else 'none'}")
+    if not report['meets_minimum']:
+        lines.append(f"- Use at least {report['min_terms']} official glossary terms.")
+    if report['corrections']:
+        lines.append("- Replace these spellings with the official glossary terms:")
+        for correction in report['corrections']:
+            lines.append(f"  - '{correction['found']}' -> '{correction['replaced_with']}' ({correction['count']}x)")
+    else:
+        lines.append("- No spelling variants of glossary terms found.")
+    if report['suggested_terms']:
+        lines.append(f"- Related glossary terms to consider: {', '.join(report['suggested_terms'])}")
+    return "\n".join(lines)
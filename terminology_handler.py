@@ -1,61 +1,815 @@
 """Handle military terminology processing and validation"""
+import bisect
 import csv
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import operator
+import os
+import pickle
 import re
-from typing import Dict, List, Tuple, Optional
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Optional, Union
+from glossary_store import CompactGlossary, CompactTermIndex
+from utils.tokens import count_tokens
+
+try:
+    import numpy
+except ImportError:  # Optional: term search falls back to pure-Python MaxScore pruning
+    numpy = None
+
+
+class TermMatch(NamedTuple):
+    """A glossary term found in a text, with its [start, end) offsets"""
+    term: str
+    start: int
+    end: int
+
+
+def _is_word_char(ch: str) -> bool:
+    """Same character class as ``\\w`` in a Unicode ``re`` pattern"""
+    return ch.isalnum() or ch == '_'
+
+
+# Tashkeel (fathatan through sukun, plus superscript alef) and tatweel carry no lexical difference
+_ARABIC_IGNORED = frozenset([chr(code) for code in range(0x064B, 0x0653)] + ['\u0670', '\u0640'])
+_ARABIC_FOLDED = {'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ة': 'ه'}
+_ARABIC_WORD = re.compile(r'[\w\u064B-\u0652\u0670\u0640]+')
+
+
+def normalize_arabic_with_offsets(text: str) -> Tuple[str, List[int], List[int]]:
+    """Normalize Arabic spelling variants and map every output character back to the input.
+
+    Hamza/madda alef forms fold to a bare alef, ta marbuta to ha, tashkeel and
+    tatweel are dropped, and a leading definite article "ال" is removed from
+    words of four letters or more. Returns the normalized text plus, for each
+    of its characters, the start and end offset of the input span it stands for;
+    a word's first character starts at the word start, article included.
+    """
+    chars: List[str] = []
+    starts: List[int] = []
+    ends: List[int] = []
+    copied_up_to = 0
+    for word in _ARABIC_WORD.finditer(text):
+        for index in range(copied_up_to, word.start()):
+            chars.append(text[index])
+            starts.append(index)
+            ends.append(index + 1)
+        word_chars = []
+        word_offsets = []
+        for index in range(word.start(), word.end()):
+            ch = text[index]
+            if ch not in _ARABIC_IGNORED:
+                word_chars.append(_ARABIC_FOLDED.get(ch, ch))
+                word_offsets.append(index)
+        if len(word_chars) >= 4 and word_chars[0] == 'ا' and word_chars[1] == 'ل':
+            del word_chars[:2], word_offsets[:2]
+        if word_chars:
+            chars.extend(word_chars)
+            starts.append(word.start())
+            starts.extend(word_offsets[1:])
+            ends.extend(offset + 1 for offset in word_offsets)
+        copied_up_to = word.end()
+    for index in range(copied_up_to, len(text)):
+        chars.append(text[index])
+        starts.append(index)
+        ends.append(index + 1)
+    return ''.join(chars), starts, ends
+
+
+_ARABIC_TRANSLATION = str.maketrans({**_ARABIC_FOLDED, **{ch: None for ch in _ARABIC_IGNORED}})
+_ARABIC_ARTICLE = re.compile(r'(?<!\w)ال(?=\w\w)')
+
+
+def normalize_arabic(text: str) -> str:
+    """Normalized form of an Arabic term or text, see :func:`normalize_arabic_with_offsets`.
+
+    Same output without the offset bookkeeping, for indexing terms and queries.
+    """
+    return _ARABIC_ARTICLE.sub('', text.translate(_ARABIC_TRANSLATION))
+
+
+# Leading definite article of a word, tashkeel and tatweel included
+_ARABIC_ARTICLE_PREFIX = re.compile(r'^[اأإآٱ][\u064B-\u0652\u0670\u0640]*ل[\u064B-\u0652\u0670\u0640]*')
+
+
+def _has_article(word: str) -> bool:
+    """Whether normalization drops a leading article from this Arabic word"""
+    letters = [_ARABIC_FOLDED.get(ch, ch) for ch in word if ch not in _ARABIC_IGNORED]
+    return len(letters) >= 4 and letters[0] == 'ا' and letters[1] == 'ل'
+
+
+def with_definiteness(term: str, written: str) -> Optional[str]:
+    """The term with each word made definite or indefinite like the matching word of written.
+
+    written is a span that normalizes to the same form as term, so their words
+    line up; None is returned if they do not.
+    """
+    written_words = _ARABIC_WORD.findall(written)
+    if len(_ARABIC_WORD.findall(term)) != len(written_words):
+        return None
+    written_iter = iter(written_words)
+
+    def adjust(match):
+        word = match.group(0)
+        definite = _has_article(next(written_iter))
+        if _has_article(word) == definite:
+            return word
+        return 'ال' + word if definite else _ARABIC_ARTICLE_PREFIX.sub('', word, count=1)
+
+    return _ARABIC_WORD.sub(adjust, term)
+
+
+class TermMatcher:
+    """Aho-Corasick automaton that finds every glossary term in one pass over a text.
+
+    Hits follow the rules of running ``re.finditer(r'\\b' + re.escape(term) + r'\\b', text)``
+    once per term: both ends must sit on a word boundary and occurrences of the
+    same term never overlap.
+
+    The trie is laid out breadth-first from the sorted terms, so the children
+    of a state are consecutive states: ``_labels[s]`` is the character leading
+    into state s, and the children of s are the states ``_first_child[s]`` to
+    ``_first_child[s + 1]``, found with ``str.find`` on ``_labels``. Failure and
+    output links are arrays too, a few bytes per state instead of a dict.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        # An empty term would match at every word boundary; there is nothing to find
+        self.terms: List[str] = sorted(set(term for term in terms if term))
+        self._lengths = array('I', map(len, self.terms))
+        self._head_is_word = bytes(_is_word_char(term[0]) for term in self.terms)
+        self._tail_is_word = bytes(_is_word_char(term[-1]) for term in self.terms)
+        self.max_term_length = max(self._lengths, default=0)
+        self._build_trie()
+        self._build_failure_links()
+
+    def _build_trie(self) -> None:
+        """Breadth-first trie: a state is the range of sorted terms sharing its prefix"""
+        terms = self.terms
+        labels = ['\0']
+        first_child = array('I')
+        term_at = array('i', [-1])
+        ranges = [(0, len(terms))]
+        depth_of = [0]
+        for state, (low, high) in enumerate(ranges):
+            depth = depth_of[state]
+            first_child.append(len(ranges))
+            # Terms ending here sort before the longer ones sharing the prefix
+            if low < high and len(terms[low]) == depth:
+                term_at[state] = low
+                low += 1
+            while low < high:
+                ch = terms[low][depth]
+                group_end = low + 1
+                while group_end < high and terms[group_end][depth] == ch:
+                    group_end += 1
+                labels.append(ch)
+                ranges.append((low, group_end))
+                depth_of.append(depth + 1)
+                term_at.append(-1)
+                low = group_end
+            ranges[state] = None
+        first_child.append(len(ranges))
+        self._labels = ''.join(labels)
+        self._first_child = first_child
+        self._term_at = term_at
+
+    def _build_failure_links(self) -> None:
+        """Link each state to its longest proper suffix state, in breadth-first (state) order"""
+        labels, first_child, term_at = self._labels, self._first_child, self._term_at
+        state_count = len(labels)
+        fail = array('I', [0]) * state_count
+        # Nearest state down the failure chain that ends a term, -1 if none
+        out_link = array('i', [-1]) * state_count
+        for state in range(state_count):
+            for child in range(first_child[state], first_child[state + 1]):
+                ch = labels[child]
+                fallback = state
+                target = 0
+                while fallback:
+                    fallback = fail[fallback]
+                    found = labels.find(ch, first_child[fallback], first_child[fallback + 1])
+                    if found >= 0:
+                        target = found
+                        break
+                fail[child] = target
+                out_link[child] = target if term_at[target] >= 0 else out_link[target]
+        self._fail = fail
+        self._out_link = out_link
+
+    def find_all(self, text: str) -> List[TermMatch]:
+        """Return every term occurrence in ``text``, ordered by end offset"""
+        scanner = self.scanner()
+        return scanner.feed(text) + scanner.close()
+
+    def find_in_range(self, text: str, start: int, end: int) -> List[TermMatch]:
+        """Return the occurrences lying within ``text[start:end]``.
+
+        Word boundaries are judged against the surrounding text, so the hits are
+        exactly those a scan of the whole text would report inside the range.
+        """
+        scan_from = max(0, start - 1)
+        scanner = self.scanner()
+        piece = text[scan_from:min(len(text), end + 1)]
+        hits = scanner.feed(piece) + scanner.close()
+        return [TermMatch(hit.term, hit.start + scan_from, hit.end + scan_from)
+                for hit in hits if hit.start + scan_from >= start and hit.end + scan_from <= end]
+
+    def scanner(self) -> 'TermScanner':
+        """Start an incremental scan that accepts the text in successive pieces"""
+        return TermScanner(self)
+
+
+class TermScanner:
+    """Incremental scan state of a :class:`TermMatcher` over a text fed in pieces.
+
+    Offsets are absolute over everything fed so far, and terms spanning two
+    pieces are found as if the text had been passed in one call. A hit is
+    returned once the character after it is known, since that character
+    decides the closing word boundary.
+    """
+
+    def __init__(self, matcher: TermMatcher):
+        self.matcher = matcher
+        self.offset = 0
+        self._state = 0
+        self._tail = ''
+        self._pending: List[Tuple[int, int]] = []
+        self._last_end: Dict[int, int] = {}
+
+    def feed(self, chunk: str) -> List[TermMatch]:
+        """Scan the next piece of text and return the hits confirmed so far"""
+        matcher = self.matcher
+        labels, first_child, fail = matcher._labels, matcher._first_child, matcher._fail
+        term_at, out_link = matcher._term_at, matcher._out_link
+        terms, lengths = matcher.terms, matcher._lengths
+        head_is_word, tail_is_word = matcher._head_is_word, matcher._tail_is_word
+        last_end = self._last_end
+        pending = self._pending
+        state = self._state
+        # Keep enough of the previous piece to look up the character before any term start
+        buffer = self._tail + chunk
+        base = self.offset - len(self._tail)
+        matches = []
+        for position in range(len(self._tail), len(buffer)):
+            ch = buffer[position]
+            if pending:
+                next_is_word = _is_word_char(ch)
+                for term_id, start in pending:
+                    if next_is_word != tail_is_word[term_id] and start >= last_end.get(term_id, 0):
+                        last_end[term_id] = start + lengths[term_id]
+                        matches.append(TermMatch(terms[term_id], start, start + lengths[term_id]))
+                pending = []
+            while True:
+                child = labels.find(ch, first_child[state], first_child[state + 1])
+                if child >= 0 or not state:
+                    state = max(child, 0)
+                    break
+                state = fail[state]
+            # The state's own term, then the shorter ones ending here
+            output = state if term_at[state] >= 0 else out_link[state]
+            while output >= 0:
+                term_id = term_at[output]
+                local_start = position + 1 - lengths[term_id]
+                prev_is_word = local_start + base > 0 and _is_word_char(buffer[local_start - 1])
+                if prev_is_word != head_is_word[term_id]:
+                    pending.append((term_id, base + local_start))
+                output = out_link[output]
+        self._state = state
+        self._pending = pending
+        self.offset += len(chunk)
+        self._tail = buffer[-matcher.max_term_length:] if matcher.max_term_length else ''
+        return matches
+
+    def close(self) -> List[TermMatch]:
+        """Finish the scan; the end of the text counts as a non-word character"""
+        matches = []
+        for term_id, start in self._pending:
+            if self.matcher._tail_is_word[term_id] and start >= self._last_end.get(term_id, 0):
+                end = start + self.matcher._lengths[term_id]
+                self._last_end[term_id] = end
+                matches.append(TermMatch(self.matcher.terms[term_id], start, end))
+        self._pending = []
+        return matches
+
+
+class ReplacementEngine:
+    """Compiled ``replacement_map`` applied to a text in one left-to-right pass.
+
+    At each position the longest key that sits on word boundaries wins, and the
+    scan resumes after it, so replaced text is never rescanned for other keys.
+    Glossary hits in the rewritten text can be collected during the same pass by
+    passing a :class:`TermMatcher` to :meth:`apply`.
+    """
+
+    def __init__(self, replacement_map: Dict[str, str]):
+        self.replacement_map = dict(replacement_map)
+        self.keys: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._key_at: List[int] = [-1]
+        for key in self.replacement_map:
+            if key:
+                self._add_key(key)
+
+    def _add_key(self, key: str) -> None:
+        state = 0
+        for ch in key:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._key_at.append(-1)
+            state = next_state
+        self._key_at[state] = len(self.keys)
+        self.keys.append(key)
+
+    def apply(self, text: str, matcher: Optional[TermMatcher] = None) -> Tuple[str, Dict[str, int], List[TermMatch]]:
+        """Replace every key occurrence in ``text``.
+
+        Returns the rewritten text, the number of replacements per key, and the
+        ``matcher`` hits found in the rewritten text (empty without a matcher).
+        """
+        goto, key_at, keys = self._goto, self._key_at, self.keys
+        root = goto[0]
+        scanner = matcher.scanner() if matcher is not None else None
+        pieces: List[str] = []
+        hits: List[TermMatch] = []
+        counts: Dict[str, int] = {}
+        text_length = len(text)
+        copied_up_to = 0
+        position = 0
+        while position < text_length:
+            ch = text[position]
+            state = root.get(ch)
+            # Every key starting here shares its first character, hence its opening boundary
+            if state is None or (position > 0 and _is_word_char(text[position - 1])) == _is_word_char(ch):
+                position += 1
+                continue
+            best_key, best_end = -1, position
+            cursor = position + 1
+            while True:
+                if key_at[state] >= 0:
+                    next_is_word = cursor < text_length and _is_word_char(text[cursor])
+                    if next_is_word != _is_word_char(text[cursor - 1]):
+                        best_key, best_end = key_at[state], cursor
+                if cursor >= text_length:
+                    break
+                state = goto[state].get(text[cursor])
+                if state is None:
+                    break
+                cursor += 1
+            if best_key < 0:
+                position += 1
+                continue
+            key = keys[best_key]
+            replacement = self.replacement_map[key]
+            for piece in (text[copied_up_to:position], replacement):
+                pieces.append(piece)
+                if scanner is not None:
+                    hits.extend(scanner.feed(piece))
+            counts[key] = counts.get(key, 0) + 1
+            position = copied_up_to = best_end
+        rest = text[copied_up_to:]
+        pieces.append(rest)
+        if scanner is not None:
+            hits.extend(scanner.feed(rest))
+            hits.extend(scanner.close())
+        return ''.join(pieces), counts, hits
+
+
+# Function words of both glossary languages. Each appears in most definitions (both indexes
+# hold the Arabic category too), so they rank nothing and would make every search walk most
+# of the index.
+_FRENCH_STOPWORDS = (
+    "a à au aux avec c ce ces cet cette d dans de des du elle elles en est et être il ils l la le les leur leurs "
+    "n ne ont ou où par pas pour qu que qui s sa se ses son sont sur un une y"
+).split()
+_ARABIC_STOPWORDS = "في من على عن إلى أو و هو هي هذا هذه ذلك تلك التي الذي الذين أن إن مع ما لا قد كان كانت ثم حيث كما".split()
+SEARCH_STOPWORDS = frozenset(normalize_arabic(word).lower() for word in _FRENCH_STOPWORDS + _ARABIC_STOPWORDS)
+
+
+def tokenize_for_search(text: str) -> List[str]:
+    """Lowercased word tokens in normalized Arabic form, shared by indexing and querying.
+
+    Function words (SEARCH_STOPWORDS) are left out.
+    """
+    return [token for token in re.findall(r'\w+', normalize_arabic(text).lower()) if token not in SEARCH_STOPWORDS]
+
+
+class TermSearchIndex:
+    """BM25 inverted index over glossary entries for ranked topic lookups.
+
+    Each entry is indexed on its term, definition and category, with matches in
+    the term weighted above the category and the definition. Scores per
+    (token, entry) are computed once at build time, so a query only sums the
+    postings of its own tokens. Entries are then boosted by the share of their
+    term words found in the query (double for all of them), so the term itself
+    outranks entries that merely mention it.
+
+    Function words are not indexed (SEARCH_STOPWORDS), nor, in glossaries of
+    MIN_ENTRIES_FOR_DF_CAP entries or more, tokens found in over MAX_DF_RATIO of
+    the entries; a draft-sized query keeps its MAX_QUERY_TOKENS rarest tokens.
+
+    The postings of a token are two arrays sorted by entry (ids and float32
+    scores) plus the ids of the entries whose term contains it. With numpy
+    installed a search sums them into scratch arrays in a few vectorized passes.
+    Otherwise each token also keeps its best score, so a top-k search skips most
+    of the postings of frequent tokens: tokens are summed best-scoring first, and
+    once no entry left out can reach the k-th best score, the remaining tokens
+    are only looked up for the entries still in the running (MaxScore pruning).
+    Both give the same ranking and scores as a full evaluation.
+    """
+
+    FIELD_WEIGHTS = (3.0, 1.0, 2.0)  # term, definition, category
+    K1 = 1.2
+    B = 0.75
+    MAX_PREFIX_EXPANSIONS = 20
+    # Tokens in more than this share of the entries are not indexed (from MIN_ENTRIES_FOR_DF_CAP
+    # entries on): their BM25 weight is close to nothing and their postings cover most of the index
+    MAX_DF_RATIO = 0.5
+    MIN_ENTRIES_FOR_DF_CAP = 1000
+    # A longer query (a section draft) is searched on its most specific tokens only
+    MAX_QUERY_TOKENS = 32
+
+    def __init__(self, entries: List[Dict], term_field: str, def_field: str):
+        self.entries = entries
+        # Weighted token frequencies go straight into the postings, then become BM25 scores
+        # once every entry length is known, so no per-entry counts are kept while building
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.term_postings: Dict[str, array] = {}
+        self.term_lengths = array('H')
+        lengths = array('f')
+        for doc_id, entry in enumerate(entries):
+            counts: Dict[str, float] = {}
+            term_tokens = set(tokenize_for_search(entry[term_field] or ''))
+            fields = (entry[term_field], entry[def_field], entry['category'])
+            for text, weight in zip(fields, self.FIELD_WEIGHTS):
+                for token in tokenize_for_search(text or ''):
+                    counts[token] = counts.get(token, 0.0) + weight
+            for token, frequency in counts.items():
+                doc_ids, frequencies = self.postings.get(token) or self.postings.setdefault(token, (array('I'), array('f')))
+                doc_ids.append(doc_id)
+                frequencies.append(frequency)
+            for token in term_tokens:
+                self.term_postings.setdefault(token, array('I')).append(doc_id)
+            self.term_lengths.append(len(term_tokens))
+            lengths.append(sum(counts.values()))
+
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        length_norms = array('d', (self.K1 * (1 - self.B + self.B * length / average_length) if average_length else self.K1
+                                   for length in lengths))
+        total = len(entries)
+        if total >= self.MIN_ENTRIES_FOR_DF_CAP:
+            for token in [token for token, (doc_ids, _) in self.postings.items() if len(doc_ids) > self.MAX_DF_RATIO * total]:
+                del self.postings[token]
+                for doc_id in self.term_postings.pop(token, ()):
+                    self.term_lengths[doc_id] -= 1
+        for token, (doc_ids, frequencies) in self.postings.items():
+            df = len(doc_ids)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            self.postings[token] = (doc_ids, array('f', (idf * frequency * (self.K1 + 1) / (frequency + length_norms[doc_id])
+                                                         for doc_id, frequency in zip(doc_ids, frequencies))))
+        self.max_scores = {token: max(scores) for token, (_, scores) in self.postings.items()}
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, token: str) -> List[str]:
+        """The token itself if indexed, otherwise indexed tokens it is a prefix of"""
+        if token in self.postings:
+            return [token]
+        expansions = []
+        position = bisect.bisect_left(self.vocabulary, token)
+        while (position < len(self.vocabulary) and len(expansions) < self.MAX_PREFIX_EXPANSIONS
+               and self.vocabulary[position].startswith(token)):
+            expansions.append(self.vocabulary[position])
+            position += 1
+        return expansions
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[Dict, float]]:
+        """Return up to ``limit`` (entry, score) pairs, best first; ``None`` returns every hit"""
+        tokens = list({indexed_token for token in set(tokenize_for_search(query)) for indexed_token in self._expand(token)})
+        if len(tokens) > self.MAX_QUERY_TOKENS:
+            # Rarest first: the tokens a draft shares with few entries are the ones that single them out
+            tokens = heapq.nsmallest(self.MAX_QUERY_TOKENS, tokens, key=lambda token: (len(self.postings[token][0]), token))
+        tokens.sort(key=lambda token: (-self.max_scores[token], token))
+        if numpy is not None:
+            return self._search_arrays(tokens, limit)
+        # remaining[i]: the most the tokens from i on can add to one entry
+        remaining = [0.0] * (len(tokens) + 1)
+        for position in range(len(tokens) - 1, -1, -1):
+            remaining[position] = remaining[position + 1] + self.max_scores[tokens[position]]
+
+        scores: Dict[int, float] = {}
+        term_hits: Counter = Counter()
+        position = 0
+        threshold = None
+        checked_bound = math.inf
+        while position < len(tokens):
+            # The boost at most doubles a sum, so this bounds the score of any entry not seen yet
+            bound = 2 * remaining[position]
+            if limit and len(scores) >= limit and bound <= checked_bound / 2:
+                checked_bound = bound
+                # Unboosted sums are lower bounds of the final scores, and much cheaper to rank
+                kth_best = heapq.nlargest(limit, scores.values())[-1]
+                if kth_best > bound:
+                    threshold = kth_best
+                    break
+            doc_ids, token_scores = self.postings[tokens[position]]
+            # Sums every posting at C speed: each entry appears once per token, so it is read before it is written
+            scores.update(zip(doc_ids, map(operator.add, map(scores.get, doc_ids, itertools.repeat(0.0)), token_scores)))
+            term_hits.update(self.term_postings.get(tokens[position], ()))
+            position += 1
+
+        if threshold is None:
+            # Boost by the share of the entry's term words the query covers, at C speed
+            boosts = map(operator.add, itertools.repeat(1.0), map(min, itertools.repeat(1.0), map(
+                operator.truediv, term_hits.values(), map(self.term_lengths.__getitem__, term_hits))))
+            scores.update(zip(term_hits, map(operator.mul, map(scores.__getitem__, term_hits), boosts)))
+        else:
+            # No other entry can make the top: the remaining tokens are only looked up for
+            # the entries whose best possible score still reaches the k-th best one.
+            # Term hits are few, so every boost is settled first.
+            for token in tokens[position:]:
+                term_hits.update(self.term_postings.get(token, ()))
+            boosts: Dict[int, float] = {}
+            for position in range(position, len(tokens) + 1):
+                # Entries that cannot reach the threshold even doubled are dropped at C speed,
+                # then those that cannot with their own boost
+                cutoff = threshold / 2 - remaining[position]
+                scores = dict(itertools.compress(scores.items(), map(cutoff.__le__, scores.values())))
+                for doc_id in scores.keys() - boosts.keys():
+                    hits = term_hits.get(doc_id)
+                    boosts[doc_id] = 1 + min(1.0, hits / self.term_lengths[doc_id]) if hits else 1.0
+                threshold = max(threshold, heapq.nlargest(
+                    limit, (score * boosts[doc_id] for doc_id, score in scores.items()))[-1])
+                scores = {doc_id: score for doc_id, score in scores.items()
+                          if (score + remaining[position]) * boosts[doc_id] >= threshold}
+                if position == len(tokens):
+                    break
+                doc_ids, token_scores = self.postings[tokens[position]]
+                if len(scores) * 20 < len(doc_ids):
+                    for doc_id in scores:
+                        index = bisect.bisect_left(doc_ids, doc_id)
+                        if index < len(doc_ids) and doc_ids[index] == doc_id:
+                            scores[doc_id] += token_scores[index]
+                else:
+                    scores.update((doc_id, scores[doc_id] + score)
+                                  for doc_id, score in zip(doc_ids, token_scores) if doc_id in scores)
+            scores = {doc_id: score * boosts[doc_id] for doc_id, score in scores.items()}
+
+        if limit is None:
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        else:
+            if limit and len(scores) > limit:
+                # Only the entries tied with or above the k-th best score are ordered
+                kth_best = heapq.nlargest(limit, scores.values())[-1]
+                scores = dict(itertools.compress(scores.items(), map(kth_best.__le__, scores.values())))
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.entries[doc_id], score) for doc_id, score in ranked]
+
+    def _search_arrays(self, tokens: List[str], limit: Optional[int]) -> List[Tuple[Dict, float]]:
+        """search() with numpy: the postings are summed into this thread's scratch arrays.
+
+        Tokens are added in the same order as the pure-Python search, so the
+        scores and the ranking are identical.
+        """
+        if not tokens:
+            return []
+        scores, hits, values = _search_scratch(len(self.entries))
+        try:
+            for token in tokens:
+                doc_ids, token_scores = self.postings[token]
+                # Cast to float64 first: numpy.add.at is only fast without casting
+                token_values = values[:len(doc_ids)]
+                token_values[:] = numpy.frombuffer(token_scores, dtype=numpy.float32)
+                numpy.add.at(scores, numpy.frombuffer(doc_ids, dtype=numpy.uint32), token_values)
+            term_docs = [numpy.frombuffer(self.term_postings[token], dtype=numpy.uint32)
+                         for token in tokens if token in self.term_postings]
+            if term_docs:
+                # Boost by the share of the entry's term words the query covers
+                term_docs = numpy.concatenate(term_docs)
+                numpy.add.at(hits, term_docs, 1)
+                term_lengths = numpy.frombuffer(self.term_lengths, dtype=numpy.uint16)[term_docs]
+                scores[term_docs] = scores[term_docs] * (1 + numpy.minimum(1.0, hits[term_docs] / term_lengths))
+
+            matched = scores > 0
+            if limit is not None:
+                hit_scores = scores[matched]
+                if len(hit_scores) > limit:
+                    # Only the entries tied with or above the k-th best score are ordered
+                    matched = scores >= numpy.partition(hit_scores, -limit)[-limit]
+            ranked = numpy.flatnonzero(matched)
+            ranked = ranked[numpy.lexsort((ranked, -scores[ranked]))[:limit]]
+            return [(self.entries[doc_id], score) for doc_id, score in zip(ranked.tolist(), scores[ranked].tolist())]
+        finally:
+            scores.fill(0.0)
+            hits.fill(0)
+
+
+# Per-thread search arrays, reused so that no query allocates (and page-faults) index-sized arrays
+_search_buffers = threading.local()
+
+
+def _search_scratch(size: int) -> Tuple:
+    """This thread's zeroed score and term-hit arrays of size entries, plus a float64 work array"""
+    buffers = getattr(_search_buffers, 'arrays', None)
+    if buffers is None or len(buffers[0]) < size:
+        buffers = _search_buffers.arrays = (numpy.zeros(size), numpy.zeros(size, dtype=numpy.int64), numpy.empty(size))
+    return tuple(buffer[:size] for buffer in buffers)
+
+
+def format_term_line(entry: Dict, language: str = 'arabic', definition_chars: int = 100) -> str:
+    """One prompt line for a glossary entry: the term and the start of its definition"""
+    term = entry['arabic_term' if language == 'arabic' else 'french_term']
+    definition = entry['arabic_def' if language == 'arabic' else 'french_def'] or ''
+    if len(definition) > definition_chars:
+        definition = definition[:definition_chars].rsplit(' ', 1)[0] + '...'
+    return f"- {term}: {definition}"
+
+
+# Bump whenever the pickled index layout changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 7
+SNAPSHOT_SUFFIX = '.snapshot'
+
+# Column order of the glossary CSV, used when the header row is missing or unrecognised
+GLOSSARY_COLUMNS = ['Num', 'Old_Num', 'MOTS_AR', 'MOTS_fr', 'DESIGNATION', 'DESIGNATION_fr', 'chairdappartenance', 'Sous_Chapitre']
+
 
 class TerminologyManager:
-    def __init__(self, csv_path: str):
-        """Initialize with path to military terminology CSV file"""
+    def __init__(self, csv_path: str, use_snapshot: bool = True, compact: bool = False):
+        """Initialize with path to military terminology CSV file.
+
+        With ``use_snapshot`` the parsed indexes are cached in ``<csv_path>.snapshot``
+        and reused until the CSV content changes.
+        With ``compact`` the entries live in a columnar CompactGlossary instead of
+        one dict per entry; lookups work the same, for much less memory on large
+        glossaries.
+        """
         self.csv_path = csv_path
+        self.compact = compact
+        self.snapshot_path = csv_path + ('.compact' if compact else '') + SNAPSHOT_SUFFIX
+        self.use_snapshot = use_snapshot
+        self._store: Optional[CompactGlossary] = None
         self.terminology = {}
         self.arabic_terms = {}
         self.french_terms = {}
         self.categories = {}
+        self.normalized_arabic_terms: Dict[str, str] = {}
+        self._matchers: Dict[str, TermMatcher] = {}
+        self._search_indexes: Dict[str, TermSearchIndex] = {}
+        self._replacement_engines: Dict[frozenset, ReplacementEngine] = {}
+        self._section_terms: Dict[Tuple, List[Dict]] = {}
+        self._recent_matches: Dict[Tuple[str, str], List[TermMatch]] = {}
+        self._term_orders: Dict[str, Dict[str, int]] = {}
+        # Sections may be checked from several threads at once (see section_scheduler):
+        # the bounded caches below are only read and evicted under this lock
+        self._cache_lock = threading.Lock()
         self.load_terminology()
     
     def load_terminology(self) -> None:
-        """Load and process the military terminology CSV file"""
+        """Load the military terminology, from the snapshot when it is current, else from the CSV"""
         print(f"INFO: [TerminologyManager] Attempting to load terminology from: {self.csv_path}")
+        if self.compact:
+            self._store = CompactGlossary()
+            self.terminology = self._store.terminology
+            self.arabic_terms = self._store.arabic_terms
+            self.french_terms = self._store.french_terms
+            self.categories = self._store.categories
+        else:
+            self.terminology, self.arabic_terms, self.french_terms, self.categories = {}, {}, {}, {}
+        self.normalized_arabic_terms = {}
+        self._matchers = {}
+        self._search_indexes = {}
+        self._replacement_engines = {}
+        self._section_terms = {}
+        self._recent_matches = {}
+        self._term_orders = {}
         try:
-            with open(self.csv_path, mode='r', encoding='utf-8') as file:
-                # Use the DictReader with explicit delimiter for the semicolon-separated file
-                reader = csv.DictReader(file, delimiter=';')
-                
-                # Check if the expected columns exist in the CSV file
-                if not reader.fieldnames or 'Num' not in reader.fieldnames:
-                    # The header row might not be recognized correctly - try to fix
-                    file.seek(0)  # Go back to the beginning of the file
-                    header = next(file).strip().split(';')
-                    
-                    # Create a custom reader with the manually extracted headers
-                    file.seek(0)
-                    next(file)  # Skip the header line
-                    
-                    # Use a list reader and convert to dict manually
-                    list_reader = csv.reader(file, delimiter=';')
-                    for row_data in list_reader:
-                        if len(row_data) >= 7:  # Make sure the row has enough columns
-                            row = {
-                                'Num': row_data[0],
-                                'Old_Num': row_data[1],
-                                'MOTS_AR': row_data[2],
-                                'MOTS_fr': row_data[3],
-                                'DESIGNATION': row_data[4],
-                                'DESIGNATION_fr': row_data[5],
-                                'chairdappartenance': row_data[6],
-                                'Sous_Chapitre': row_data[7] if len(row_data) > 7 else ''
-                            }
-                            self._process_term_entry(row)
-                else:
-                    # The header was recognized correctly, process normally
-                    for row in reader:
-                        self._process_term_entry(row)
-                        
+            csv_stat = os.stat(self.csv_path)
+            if self.use_snapshot and self._load_snapshot(csv_stat):
+                print(f"INFO: [TerminologyManager] Loaded {len(self.terminology)} military terms from snapshot {self.snapshot_path}.")
+                return
+
+            # Streamed row by row: a large glossary is never held whole in memory
+            with open(self.csv_path, mode='r', encoding='utf-8-sig', newline='') as file:
+                self._parse_csv(file)
+            self._build_search_indexes()
             print(f"INFO: [TerminologyManager] Successfully loaded {len(self.terminology)} military terms.")
         except Exception as e:
             print(f"ERROR: [TerminologyManager] Error loading terminology file: {e}")
             raise
-    
+
+        if self.use_snapshot:
+            self._write_snapshot(csv_stat, self._hash_csv())
+
+    def _parse_csv(self, lines: Iterable[str]) -> None:
+        """Parse the semicolon-separated glossary in a single pass"""
+        reader = csv.reader(lines, delimiter=';')
+        header = next(reader, [])
+        if all(column in header for column in GLOSSARY_COLUMNS[:7]):
+            positions = {column: header.index(column) for column in GLOSSARY_COLUMNS if column in header}
+        else:
+            # The header row was not recognised - fall back to the standard column order
+            positions = {column: index for index, column in enumerate(GLOSSARY_COLUMNS)}
+
+        for row_data in reader:
+            if len(row_data) >= 7:  # Make sure the row has enough columns
+                row = {column: row_data[index] if index < len(row_data) else '' for column, index in positions.items()}
+                row.setdefault('Sous_Chapitre', '')
+                self._process_term_entry(row)
+
+    def _build_search_indexes(self) -> None:
+        """Index the entries of each language for ranked topic suggestions"""
+        def entries(terms_dict):
+            # A compact index hands out a lazy sequence instead of a list of entry views
+            return terms_dict.entries() if isinstance(terms_dict, CompactTermIndex) else list(terms_dict.values())
+
+        self._search_indexes = {
+            'arabic': TermSearchIndex(entries(self.arabic_terms), 'arabic_term', 'arabic_def'),
+            'french': TermSearchIndex(entries(self.french_terms), 'french_term', 'french_def'),
+        }
+
+    def _load_snapshot(self, csv_stat: os.stat_result) -> bool:
+        """Restore the indexes from the snapshot if it was built from the current CSV content.
+
+        The snapshot holds a small header (format version, CSV mtime, size and
+        SHA-256) followed by the pickled indexes, so a stale snapshot is rejected
+        without unpickling the payload. A matching mtime and size are trusted;
+        otherwise the CSV is hashed and compared.
+        """
+        try:
+            with open(self.snapshot_path, 'rb') as file:
+                header = pickle.load(file)
+                if header.get('version') != SNAPSHOT_VERSION or header.get('size') != csv_stat.st_size:
+                    return False
+                refresh_header = header.get('mtime_ns') != csv_stat.st_mtime_ns
+                if refresh_header and header.get('sha256') != self._hash_csv():
+                    return False
+                payload = pickle.load(file)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"WARNING: [TerminologyManager] Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+            return False
+
+        self.terminology = payload['terminology']
+        self.arabic_terms = payload['arabic_terms']
+        self.french_terms = payload['french_terms']
+        self.categories = payload['categories']
+        self._store = payload['store']
+        self.normalized_arabic_terms = payload['normalized_arabic_terms']
+        self._matchers = payload['matchers']
+        self._search_indexes = payload['search_indexes']
+        if refresh_header:
+            # Same content under a new mtime (checkout, copy): record it to skip hashing next time
+            self._write_snapshot(csv_stat, header['sha256'])
+        return True
+
+    def _write_snapshot(self, csv_stat: os.stat_result, csv_sha256: str) -> None:
+        """Save the indexes and both term matchers next to the CSV"""
+        self.get_matcher('arabic')
+        self.get_matcher('french')
+        self.get_variant_matcher()
+        header = {
+            'version': SNAPSHOT_VERSION,
+            'mtime_ns': csv_stat.st_mtime_ns,
+            'size': csv_stat.st_size,
+            'sha256': csv_sha256,
+        }
+        payload = {
+            'terminology': self.terminology,
+            'arabic_terms': self.arabic_terms,
+            'french_terms': self.french_terms,
+            'categories': self.categories,
+            'store': self._store,
+            'normalized_arabic_terms': self.normalized_arabic_terms,
+            'matchers': self._matchers,
+            'search_indexes': self._search_indexes,
+        }
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+            # Atomic rename, so concurrent readers see either the old or the new snapshot
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"WARNING: [TerminologyManager] Could not write snapshot {self.snapshot_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _hash_csv(self) -> str:
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
     def _process_term_entry(self, row):
         """Process a single row of terminology data"""
         term_entry = {
@@ -67,6 +821,9 @@ class TerminologyManager:
             'category': row['chairdappartenance'],
             'subcategory': row['Sous_Chapitre']
         }
+        if self._store is not None:
+            self._store.add(term_entry)
+            return
         
         # Index by both Arabic and French terms
         self.arabic_terms[row['MOTS_AR']] = term_entry
@@ -81,79 +838,228 @@ class TerminologyManager:
         # Store in main terminology dict
         self.terminology[row['Num']] = term_entry
 
+    def get_matcher(self, language: str = 'arabic') -> TermMatcher:
+        """Return the term matcher for a language, building it on first use"""
+        language_key = 'arabic' if language == 'arabic' else 'french'
+        matcher = self._matchers.get(language_key)
+        if matcher is None:
+            terms_dict = self.arabic_terms if language_key == 'arabic' else self.french_terms
+            matcher = TermMatcher(terms_dict.keys())
+            self._matchers[language_key] = matcher
+        return matcher
+
+    def get_variant_matcher(self) -> TermMatcher:
+        """Return the matcher over normalized Arabic terms, building the normalized index on first use"""
+        matcher = self._matchers.get('arabic_normalized')
+        if matcher is None:
+            normalized_terms = {}
+            for term in self.arabic_terms:
+                # The first glossary entry wins when several normalize to the same form
+                normalized_terms.setdefault(normalize_arabic(term), term)
+            self.normalized_arabic_terms = normalized_terms
+            matcher = TermMatcher(normalized_terms.keys())
+            self._matchers['arabic_normalized'] = matcher
+        return matcher
+
+    def find_term_variants(self, content: str, language: str = 'arabic') -> Dict[str, str]:
+        """Build a replacement map from spelling variants of glossary terms found in the content.
+
+        Content and terms are compared in normalized form (see ``normalize_arabic``),
+        so a variant is found in one pass over the text whatever the glossary size.
+        Each key is the span as written and each value the official glossary term
+        with the definite article of each word kept as written, so an indefinite
+        phrase stays indefinite. Spans that differ from a glossary term by their
+        articles only are left out. Only Arabic is normalized, other languages
+        return an empty map.
+        """
+        if language != 'arabic':
+            return {}
+        matcher = self.get_variant_matcher()
+        normalized, starts, ends = normalize_arabic_with_offsets(content)
+        variants = {}
+        for match in matcher.find_all(normalized):
+            written = content[starts[match.start]:ends[match.end - 1]]
+            if written in self.arabic_terms:
+                continue
+            official = with_definiteness(self.normalized_arabic_terms[match.term], written)
+            if official is not None and official != written:
+                variants[written] = official
+        if variants:
+            print(f"INFO: [TerminologyManager] Found {len(variants)} spelling variants of glossary terms.")
+        return variants
+
+    def find_term_matches(self, content: str, language: str = 'arabic') -> List[TermMatch]:
+        """Find every glossary term in the content with its offsets, in text order"""
+        matches = self.cached_term_matches(content, language)
+        if matches is None:
+            matches = self.get_matcher(language).find_all(content)
+            self._remember_matches(content, language, matches)
+        return sorted(matches, key=lambda match: match.start)
+
+    def cached_term_matches(self, content: str, language: str = 'arabic') -> Optional[List[TermMatch]]:
+        """Matches of a recently checked text, or None if it has not been scanned lately"""
+        return self._recent_matches.get(('arabic' if language == 'arabic' else 'french', content))
+
+    def _remember_matches(self, content: str, language: str, matches: List[TermMatch]) -> None:
+        """Keep the matches of the last checked texts so an assembled document can reuse them"""
+        with self._cache_lock:
+            if len(self._recent_matches) >= 64:
+                self._recent_matches.pop(next(iter(self._recent_matches)), None)
+            self._recent_matches[('arabic' if language == 'arabic' else 'french', content)] = list(matches)
+
+    def _build_suggestions(self, content: str, matches: List[TermMatch], language: str, status: Optional[str] = None) -> List[Dict]:
+        """Turn term matches into suggestion dicts, grouped in glossary order like the per-term scan"""
+        terms_dict = self.arabic_terms if language == 'arabic' else self.french_terms
+        def_field = 'arabic_def' if language == 'arabic' else 'french_def'
+        language_key = 'arabic' if language == 'arabic' else 'french'
+        term_order = self._term_orders.get(language_key)
+        if term_order is None:
+            term_order = {term: index for index, term in enumerate(terms_dict)}
+            self._term_orders[language_key] = term_order
+        suggestions = []
+        for match in sorted(matches, key=lambda m: (term_order[m.term], m.start)):
+            entry = terms_dict[match.term]
+            context_start = max(0, match.start - 50)
+            context_end = min(len(content), match.end + 50)
+            suggestion = {
+                'term': match.term,
+                'definition': entry[def_field],
+                'category': entry['category'],
+                'context': content[context_start:context_end]
+            }
+            if status:
+                suggestion['status'] = status
+            suggestions.append(suggestion)
+        return suggestions
+
     def check_content(self, content: str, language: str = 'arabic') -> Tuple[str, List[Dict]]:
         """Check content against terminology database and return suggestions"""
         print(f"INFO: [TerminologyManager] Checking content for language: {language}. Content length: {len(content)}")
-        terms_dict = self.arabic_terms if language == 'arabic' else self.french_terms
-        suggestions = []
-        modified_content = content
-
-        for term, entry in terms_dict.items():
-            # Create pattern that handles Arabic text direction and variations
-            # print(f"DEBUG: [TerminologyManager] Checking for term: {term}") # Can be very verbose
-            pattern = r'\b' + re.escape(term) + r'\b'
-            matches = re.finditer(pattern, content, re.UNICODE | re.MULTILINE)
-
-            for match in matches:
-                context_start = max(0, match.start() - 50)
-                context_end = min(len(content), match.end() + 50)
-                context = content[context_start:context_end]
-                print(f"DEBUG: [TerminologyManager] Found term '{term}' in content.")
-
-                suggestions.append({
-                    'term': term,
-                    'definition': entry['arabic_def' if language == 'arabic' else 'french_def'],
-                    'category': entry['category'],
-                    'context': context
-                })
+        matches = self.find_term_matches(content, language)
+        for match in matches:
+            print(f"DEBUG: [TerminologyManager] Found term '{match.term}' in content.")
+        suggestions = self._build_suggestions(content, matches, language)
 
         print(f"INFO: [TerminologyManager] Found {len(suggestions)} potential terminology suggestions.")
-        return modified_content, suggestions
+        return content, suggestions
 
-    def check_and_replace_content(self, content: str, language: str = 'arabic', replacement_map: Optional[Dict[str, str]] = None) -> Tuple[str, List[Dict]]:
+    def iter_check_stream(self, source: Union[str, os.PathLike, Iterable[str]], language: str = 'arabic',
+                          chunk_size: int = 1 << 16, context_chars: int = 50) -> Iterator[Dict]:
+        """Check a text of any size for glossary terms in constant memory.
+
+        source: a file path, or an iterable of text chunks (pass ``[text]`` for a
+                string already in memory). Terms split across chunks are found.
+        Yields one suggestion dict per hit, in order of where the hit ends, with
+        the usual 'term', 'definition', 'category' and 'context' keys plus the
+        absolute 'start' and 'end' offsets of the hit in the whole text.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            chunks = self._read_chunks(source, chunk_size)
+        else:
+            chunks = source
+        terms_dict = self.arabic_terms if language == 'arabic' else self.french_terms
+        def_field = 'arabic_def' if language == 'arabic' else 'french_def'
+        scanner = self.get_matcher(language).scanner()
+        lookbehind = scanner.matcher.max_term_length + context_chars
+        window = ''
+        window_start = 0
+        waiting: List[TermMatch] = []
+
+        def suggestion(match: TermMatch) -> Dict:
+            entry = terms_dict[match.term]
+            context_start = max(0, match.start - context_chars) - window_start
+            return {
+                'term': match.term,
+                'definition': entry[def_field],
+                'category': entry['category'],
+                'context': window[context_start:match.end + context_chars - window_start],
+                'start': match.start,
+                'end': match.end
+            }
+
+        for chunk in chunks:
+            waiting.extend(scanner.feed(chunk))
+            window += chunk
+            consumed = scanner.offset
+            # A hit is reported once the text after it covers its context
+            while waiting and waiting[0].end + context_chars <= consumed:
+                yield suggestion(waiting.pop(0))
+            # Keep only what unreported hits and hits still in the automaton can need
+            keep_from = max(0, min([consumed - lookbehind] + [match.start - context_chars for match in waiting]))
+            if keep_from > window_start:
+                window = window[keep_from - window_start:]
+                window_start = keep_from
+        waiting.extend(scanner.close())
+        for match in waiting:
+            yield suggestion(match)
+
+    @staticmethod
+    def _read_chunks(path: Union[str, os.PathLike], chunk_size: int) -> Iterator[str]:
+        with open(path, mode='r', encoding='utf-8-sig') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def write_check_stream_jsonl(self, source: Union[str, os.PathLike, Iterable[str]], output_path: str,
+                                 language: str = 'arabic', chunk_size: int = 1 << 16) -> int:
+        """Stream glossary hits from ``source`` straight into a JSON Lines file; returns the hit count"""
+        print(f"INFO: [TerminologyManager] Streaming terminology check to {output_path}")
+        count = 0
+        with open(output_path, mode='w', encoding='utf-8') as output:
+            for suggestion in self.iter_check_stream(source, language, chunk_size):
+                output.write(json.dumps(suggestion, ensure_ascii=False) + '\n')
+                count += 1
+        print(f"INFO: [TerminologyManager] Wrote {count} terminology hits.")
+        return count
+
+    def compile_replacements(self, replacement_map: Dict[str, str]) -> ReplacementEngine:
+        """Compile a replacement map, reusing the engine when the same map is passed again"""
+        cache_key = frozenset(replacement_map.items())
+        with self._cache_lock:
+            engine = self._replacement_engines.get(cache_key)
+        if engine is None:
+            engine = ReplacementEngine(replacement_map)
+            with self._cache_lock:
+                if len(self._replacement_engines) >= 8:
+                    self._replacement_engines.pop(next(iter(self._replacement_engines)), None)
+                self._replacement_engines[cache_key] = engine
+        return engine
+
+    def check_and_replace_content(self, content: str, language: str = 'arabic', replacement_map: Optional[Union[Dict[str, str], ReplacementEngine]] = None) -> Tuple[str, List[Dict]]:
         """
         Check content against terminology and perform replacements.
         replacement_map: A dictionary where keys are terms to find (potentially incorrect)
-                         and values are the correct glossary terms to replace them with.
+                         and values are the correct glossary terms to replace them with,
+                         or a ReplacementEngine compiled from such a dictionary.
+                         All keys are applied in one pass; where keys overlap the longest wins.
         Returns modified content and a list of corrections made (or glossary suggestions if no replacements).
         """
         print(f"INFO: [TerminologyManager] Checking and replacing content. Language: {language}. Replacement map provided: {bool(replacement_map)}")
-        modified_content = content
         corrections_made = []
+        matcher = self.get_matcher(language)
 
-        # 1. Perform replacements if a map is provided
-        if replacement_map:
-            for term_to_find, correct_term in replacement_map.items():
-                pattern = r'\b' + re.escape(term_to_find) + r'\b'
-                occurrences = len(re.findall(pattern, modified_content, re.UNICODE | re.MULTILINE))
-                if occurrences > 0:
-                    modified_content = re.sub(pattern, correct_term, modified_content, flags=re.UNICODE | re.MULTILINE)
-                    print(f"DEBUG: [TerminologyManager] Replaced '{term_to_find}' with '{correct_term}' ({occurrences} occurrences).")
-                    corrections_made.append({
-                        "found": term_to_find,
-                        "replaced_with": correct_term,
-                        "count": occurrences
-                    })
-
-        # 2. Identify glossary terms present in the (potentially modified) content
-        terms_dict = self.arabic_terms if language == 'arabic' else self.french_terms
-        suggestions_found = []
-        for term, entry in terms_dict.items():
-            pattern = r'\b' + re.escape(term) + r'\b'
-            matches = re.finditer(pattern, modified_content, re.UNICODE | re.MULTILINE)
-            for match in matches:
-                context_start = max(0, match.start() - 50)
-                context_end = min(len(modified_content), match.end() + 50)
-                context = modified_content[context_start:context_end]
-                # print(f"DEBUG: [TerminologyManager] Identified glossary term '{term}' in content post-replacement.") # Can be verbose
-                suggestions_found.append({
-                    'term': term,
-                    'definition': entry['arabic_def' if language == 'arabic' else 'french_def'],
-                    'category': entry['category'],
-                    'context': context,
-                    'status': 'identified_in_text'
+        # Replacements and glossary identification share one pass over the content
+        if isinstance(replacement_map, ReplacementEngine):
+            engine = replacement_map
+        else:
+            engine = self.compile_replacements(replacement_map or {})
+        modified_content, counts, matches = engine.apply(content, matcher)
+        self._remember_matches(modified_content, language, matches)
+
+        for term_to_find, correct_term in engine.replacement_map.items():
+            occurrences = counts.get(term_to_find, 0)
+            if occurrences > 0:
+                print(f"DEBUG: [TerminologyManager] Replaced '{term_to_find}' with '{correct_term}' ({occurrences} occurrences).")
+                corrections_made.append({
+                    "found": term_to_find,
+                    "replaced_with": correct_term,
+                    "count": occurrences
                 })
 
+        suggestions_found = self._build_suggestions(modified_content, matches, language, status='identified_in_text')
+
         final_suggestions = corrections_made if corrections_made else suggestions_found
         if corrections_made:
             print(f"INFO: [TerminologyManager] Made {len(corrections_made)} types of replacements.")
@@ -161,28 +1067,55 @@ class TerminologyManager:
 
         return modified_content, final_suggestions
 
-    def suggest_terms_for_topic(self, topic: str, language: str = 'arabic') -> List[Dict]:
+    def search_terms(self, query: str, language: str = 'arabic', limit: Optional[int] = 10) -> List[Tuple[Dict, float]]:
+        """Rank glossary entries against a free-text query, returning (entry, score) pairs best first"""
+        return self._search_indexes['arabic' if language == 'arabic' else 'french'].search(query, limit)
+
+    def suggest_terms_for_topic(self, topic: str, language: str = 'arabic', limit: Optional[int] = None) -> List[Dict]:
+        """Suggest glossary entries for a topic, most relevant first.
+
+        Topic words are matched against terms, definitions and categories
+        (Arabic in normalized form, a word also matching longer words it
+        prefixes) and entries are ranked by BM25 score.
+        """
         print(f"INFO: [TerminologyManager] Suggesting terms for topic: '{topic}', language: {language}")
-        suggestions = []
-        terms = self.arabic_terms if language == 'arabic' else self.french_terms
-        
-        # Convert topic to lowercase for matching
-        topic_lower = topic.lower()
-        
-        for term, entry in terms.items():
-            # Check if topic appears in term, definition, or category
-            term_matches = topic_lower in term.lower()
-            def_field = 'arabic_def' if language == 'arabic' else 'french_def'
-            def_matches = topic_lower in entry[def_field].lower()
-            category_matches = topic_lower in entry['category'].lower()
-            
-            if term_matches or def_matches or category_matches:
-                suggestions.append(entry)
-                # print(f"DEBUG: [TerminologyManager] Suggested term '{entry['arabic_term' if language == 'arabic' else 'french_term']}' for topic '{topic}'.")
-        
+        suggestions = [entry for entry, _ in self.search_terms(topic, language, limit)]
         print(f"INFO: [TerminologyManager] Found {len(suggestions)} relevant terms for topic '{topic}'.")
         return suggestions
 
+    def select_terms_for_section(self, section_title: str, section_details: str, language: str = 'arabic',
+                                 token_budget: int = 300, max_terms: int = 10) -> List[Dict]:
+        """Pick the glossary entries most relevant to a section that fit a prompt token budget.
+
+        Entries are ranked against the section title and outline details, and
+        each is charged the tokens of its ``format_term_line`` line; entries that
+        would overflow the budget are skipped in favour of cheaper ones further
+        down the ranking. The selection is cached per section and budget.
+        """
+        cache_key = (section_title, section_details, language, token_budget, max_terms)
+        with self._cache_lock:
+            selected = self._section_terms.get(cache_key)
+        if selected is not None:
+            return selected
+
+        selected = []
+        tokens_used = 0
+        for entry, _ in self.search_terms(f"{section_title}\n{section_details}", language, limit=max_terms * 3):
+            line_tokens = count_tokens(format_term_line(entry, language))
+            if tokens_used + line_tokens > token_budget:
+                continue
+            selected.append(entry)
+            tokens_used += line_tokens
+            if len(selected) >= max_terms:
+                break
+        print(f"INFO: [TerminologyManager] Selected {len(selected)} terms ({tokens_used} tokens) for section '{section_title}'.")
+
+        with self._cache_lock:
+            if len(self._section_terms) >= 256:
+                self._section_terms.pop(next(iter(self._section_terms)), None)
+            self._section_terms[cache_key] = selected
+        return selected
+
     def get_category_terms(self, category: str) -> List[Dict]:
         """Get all terms in a specific category"""
         print(f"INFO: [TerminologyManager] Getting terms for category: {category}")
@@ -204,3 +1137,94 @@ class TerminologyManager:
             
         category = terms_dict[term]['category']
         return [t for t in self.categories[category] if t['arabic_term' if language == 'arabic' else 'french_term'] != term]
+
+
+# Process-wide managers, one per glossary file, shared by reference
+_manager_registry: Dict[Tuple[str, bool], TerminologyManager] = {}
+_manager_registry_lock = threading.Lock()
+
+
+def get_terminology_manager(csv_path: str, compact: bool = False) -> TerminologyManager:
+    """Return the shared TerminologyManager for a glossary file, loading it on first use.
+
+    Every caller in the process gets the same instance for the same file, so the
+    glossary indexes are held in memory once however many articles or sections
+    use them.
+    """
+    registry_key = (os.path.abspath(csv_path), compact)
+    with _manager_registry_lock:
+        manager = _manager_registry.get(registry_key)
+        if manager is None:
+            manager = TerminologyManager(csv_path, compact=compact)
+            _manager_registry[registry_key] = manager
+        return manager
+
+
+def clear_terminology_registry() -> None:
+    """Forget all shared managers; the next lookup reloads from disk"""
+    with _manager_registry_lock:
+        _manager_registry.clear()
+
+
+class IncrementalTermVerifier:
+    """Glossary check of a document assembled from parts, reusing the checks of each part.
+
+    Parts checked earlier (for instance each section inside
+    ``generate_article_section``) keep their matches in the manager's recent
+    results; only parts not seen before are scanned. Their matches are shifted
+    to document offsets and just the text around each join is rescanned, since
+    only hits touching a join can appear or disappear when parts are joined.
+    """
+
+    def __init__(self, manager: TerminologyManager, language: str = 'arabic'):
+        self.manager = manager
+        self.language = language
+        self.chars_scanned = 0
+
+    def verify(self, parts: List[str], separator: str = '\n\n') -> Tuple[str, List[TermMatch]]:
+        """Join the parts and return the document with all its glossary matches, in text order"""
+        matcher = self.manager.get_matcher(self.language)
+        reach = matcher.max_term_length
+        document = separator.join(parts)
+        found: Dict[Tuple[str, int], TermMatch] = {}
+        windows: List[List[int]] = []
+        offset = 0
+        for index, part in enumerate(parts):
+            part_matches = self.manager.cached_term_matches(part, self.language)
+            if part_matches is None:
+                part_matches = self.manager.find_term_matches(part, self.language)
+                self.chars_scanned += len(part)
+            for match in part_matches:
+                # Hits touching a part edge are re-judged by the join rescans below
+                if (match.start > 0 or index == 0) and (match.end < len(part) or index == len(parts) - 1):
+                    found[(match.term, match.start + offset)] = TermMatch(match.term, match.start + offset, match.end + offset)
+            if index > 0:
+                window = [max(0, offset - len(separator) - reach), min(len(document), offset + reach)]
+                if windows and window[0] <= windows[-1][1]:
+                    windows[-1][1] = window[1]
+                else:
+                    windows.append(window)
+            offset += len(part) + len(separator)
+
+        for start, end in windows:
+            self.chars_scanned += end - start
+            for match in matcher.find_in_range(document, start, end):
+                found.setdefault((match.term, match.start), match)
+
+        # Occurrences of the same term never overlap, as in a single scan
+        matches = []
+        last_end: Dict[str, int] = {}
+        for match in sorted(found.values(), key=lambda m: (m.start, m.end)):
+            if match.start >= last_end.get(match.term, 0):
+                last_end[match.term] = match.end
+                matches.append(match)
+        return document, matches
+
+    def check_document(self, parts: List[str], separator: str = '\n\n') -> Tuple[str, List[Dict]]:
+        """Like ``check_and_replace_content`` without replacements, over the joined parts"""
+        print(f"INFO: [TerminologyManager] Verifying {len(parts)} document parts incrementally.")
+        document, matches = self.verify(parts, separator)
+        self.manager._remember_matches(document, self.language, matches)
+        suggestions = self.manager._build_suggestions(document, matches, self.language, status='identified_in_text')
+        print(f"INFO: [TerminologyManager] Rescanned {self.chars_scanned} of {len(document)} characters; {len(suggestions)} glossary terms identified.")
+        return document, suggestions
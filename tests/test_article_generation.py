@@ -2,7 +2,7 @@
 import unittest
 import os
 from main import main
-from terminology_handler import TerminologyManager
+from terminology_handler import get_terminology_manager
 from config import get_config
 from agents import create_agents
 from article_generator import generate_article_section
@@ -13,7 +13,7 @@ class TestArticleGeneration(unittest.TestCase):
         """Set up test environment"""
         self.config = get_config()
         self.agents = create_agents(self.config)
-        self.term_manager = TerminologyManager("../glossaire_2022_sample.csv")
+        self.term_manager = get_terminology_manager("../glossaire_2022_sample.csv")
         
         # Test article parameters
         self.test_params = {
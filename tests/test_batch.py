@@ -0,0 +1,70 @@
+"""Test cases for batch article generation"""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from batch import load_jobs, run_batch, format_results
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_load_jobs(self):
+        """JSONL and CSV job files yield the same jobs, with defaults filled in"""
+        jsonl = self.write("jobs.jsonl", '{"topic": "الحرب الإلكترونية", "word_count": 800}\n\n'
+                                         '{"id": "fr-1", "topic": "Défense aérienne", "language": "French"}\n')
+        csv_path = self.write("jobs.csv", "topic;word_count;id;language\nالحرب الإلكترونية;800;;\nDéfense aérienne;;fr-1;French\n")
+        for path in (jsonl, csv_path):
+            jobs = load_jobs(path)
+            self.assertEqual([job["id"] for job in jobs], ["job_0001", "fr-1"])
+            self.assertEqual(jobs[0]["word_count"], "800")
+            self.assertEqual(jobs[0]["tone"], "formal")
+            self.assertEqual(jobs[1]["language"], "french")
+
+        with self.assertRaises(ValueError):
+            load_jobs(self.write("bad.jsonl", '{"tone": "formal"}\n'))
+        with self.assertRaises(ValueError):
+            load_jobs(self.write("dup.jsonl", '{"id": "a", "topic": "x"}\n{"id": "a", "topic": "y"}\n'))
+
+    def test_run_batch_bounded_and_isolated(self):
+        """Jobs run at most max_workers at a time, failures are recorded, results keep job order"""
+        jobs = [{"id": f"job_{i}", "topic": f"topic {i}"} for i in range(5)]
+        running = []
+        peak = []
+        lock = threading.Lock()
+        def generate_job(job, job_dir):
+            with lock:
+                running.append(job["id"])
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(job["id"])
+            if job["id"] == "job_2":
+                raise RuntimeError("rate limited")
+            os.makedirs(job_dir, exist_ok=True)
+            return {"article_path": os.path.join(job_dir, "complete_article.txt"), "llm_calls": 4}
+
+        output_dir = os.path.join(self.temp_dir.name, "out")
+        results = run_batch(jobs, generate_job, output_dir, max_workers=2)
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual([result["id"] for result in results], [job["id"] for job in jobs])
+        self.assertEqual([result["status"] for result in results], ["done", "done", "failed", "done", "done"])
+        self.assertIn("rate limited", results[2]["error"])
+        self.assertTrue(os.path.isdir(os.path.join(output_dir, "job_0")))
+        with open(os.path.join(output_dir, "results.jsonl"), encoding="utf-8") as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 5)
+        self.assertIn("4/5 articles generated", format_results(results))
+
+if __name__ == '__main__':
+    unittest.main()
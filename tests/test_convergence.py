@@ -0,0 +1,82 @@
+"""Test cases for the early-termination policy of drafting chats"""
+import unittest
+from convergence import DraftConvergencePolicy, chat_poster
+
+def message(name, content):
+    return {"name": name, "content": content}
+
+class TestDraftConvergencePolicy(unittest.TestCase):
+    def setUp(self):
+        self.checked = []
+        def check_draft(content):
+            self.checked.append(content)
+            return [] if "good" in content else ["word_count"]
+        self.policy = DraftConvergencePolicy(check_draft)
+
+    def test_converges_on_approval_of_passing_draft(self):
+        """The editor's approval only ends the chat when the latest draft passes the local checks"""
+        messages = [message("ArticleRequester", "prompt"), message("Writer", "short draft"),
+                    message("TerminologyChecker", "ok"), message("Editor", "APPROVED")]
+        self.assertFalse(self.policy.is_converged(messages))
+
+        messages += [message("Writer", "good draft"), message("TerminologyChecker", "ok")]
+        self.assertFalse(self.policy.is_converged(messages))
+        messages.append(message("Editor", "Please add an example"))
+        self.assertFalse(self.policy.is_converged(messages))
+        messages[-1] = message("Editor", "APPROVED")
+        self.assertTrue(self.policy.is_converged(messages))
+        # Each draft is checked once however often the policy is consulted
+        self.assertEqual(self.checked, ["short draft", "good draft"])
+
+    def test_best_draft(self):
+        """The last draft that passes the checks is kept, else the last draft"""
+        messages = [message("Writer", "good draft 1"), message("Editor", "revise"),
+                    message("Writer", "weak rewrite"), message("Editor", "revise again")]
+        self.assertEqual(self.policy.best_draft(messages), "good draft 1")
+        self.assertEqual(self.policy.best_draft(messages[2:]), "weak rewrite")
+        self.assertIsNone(self.policy.best_draft([message("Editor", "APPROVED")]))
+
+    def test_wrap_stops_speaker_selection(self):
+        """The wrapped selection method returns None once converged"""
+        class Chat:
+            messages = [message("Writer", "good draft"), message("Editor", "APPROVED")]
+        select = self.policy.wrap(lambda last_speaker, groupchat: "Writer")
+        self.assertIsNone(select(None, Chat))
+        Chat.messages = Chat.messages[:1]
+        self.assertEqual(select(None, Chat), "Writer")
+
+    def test_rejected_approval_posts_failed_checks(self):
+        """An approval of a failing draft puts the failed checks in the chat before the Writer's turn"""
+        class Agent:
+            def __init__(self, name):
+                self.name = name
+                self.received = []
+        class Manager:
+            def send(self, message, recipient, request_reply=False, silent=False):
+                recipient.received.append(message)
+        writer, checker = Agent("Writer"), Agent("TerminologyChecker")
+        class Chat:
+            agents = [writer, checker]
+            messages = [message("Writer", "short draft"), message("Editor", "APPROVED")]
+        policy = DraftConvergencePolicy(lambda content: ["word_count"],
+                                        check_hints={"word_count": "keep it between 300 and 500 words."})
+        select = policy.wrap(lambda last_speaker, groupchat: writer, chat_poster(Manager(), checker))
+        self.assertIs(select(None, Chat), writer)
+        posted = Chat.messages[-1]
+        self.assertEqual(posted["name"], "TerminologyChecker")
+        self.assertIn("word_count", posted["content"])
+        self.assertIn("300 and 500 words", posted["content"])
+        self.assertEqual([m["content"] for m in writer.received], [posted["content"]])
+        self.assertEqual(checker.received, [])
+        # Posted once: the feedback is now the last message
+        select(None, Chat)
+        self.assertEqual(len(Chat.messages), 3)
+
+        # Nothing is posted when the chat ends anyway
+        Chat.messages = [message("Writer", "short draft"), message("Editor", "APPROVED")]
+        ending = policy.wrap(lambda last_speaker, groupchat: None)
+        self.assertIsNone(ending(None, Chat))
+        self.assertEqual(len(Chat.messages), 2)
+
+if __name__ == '__main__':
+    unittest.main()
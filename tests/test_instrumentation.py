@@ -0,0 +1,87 @@
+"""Test cases for LLM call instrumentation"""
+import json
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from utils.instrumentation import LLMCallRecorder
+from utils.response_cache import ResponseCache
+
+class FakeClient:
+    """Stands in for autogen's OpenAIWrapper, optionally answering from a response cache"""
+    def __init__(self, cache=None, fail=False):
+        self.cache = cache
+        self.fail = fail
+
+    def create(self, messages=None, **kwargs):
+        if self.fail:
+            raise TimeoutError("upstream timeout")
+        key = json.dumps(messages)
+        if self.cache is not None and self.cache.get(key) is not None:
+            return self.cache.get(key)
+        response = SimpleNamespace(model="deepseek-chat", usage=SimpleNamespace(prompt_tokens=10 * len(messages), completion_tokens=7))
+        if self.cache is not None:
+            self.cache.set(key, response)
+        return response
+
+class TestLLMCallRecorder(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.trace_path = os.path.join(self.temp_dir.name, "trace.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_calls_are_traced_per_stage_and_agent(self):
+        """Each call lands in the JSONL trace with its stage, agent, round, tokens and cache status"""
+        recorder = LLMCallRecorder(self.trace_path)
+        cache = ResponseCache(os.path.join(self.temp_dir.name, "cache.sqlite"))
+        writer = SimpleNamespace(name="Writer", client=FakeClient(cache))
+        editor = SimpleNamespace(name="Editor", client=FakeClient())
+        user_proxy = SimpleNamespace(name="ArticleRequester", client=None)
+        for agent in (writer, editor, user_proxy):
+            recorder.instrument(agent, cache)
+
+        messages = [{"role": "user", "content": "اكتب القسم"}]
+        with recorder.stage("outline"):
+            writer.client.create(messages=messages)
+        def section_worker():
+            with recorder.stage("section 1"):
+                writer.client.create(messages=messages)
+                editor.client.create(messages=messages + [{"role": "assistant", "content": "draft"}])
+        thread = threading.Thread(target=section_worker)
+        thread.start()
+        thread.join()
+
+        with open(self.trace_path, encoding="utf-8") as f:
+            trace = [json.loads(line) for line in f]
+        self.assertEqual([(e["stage"], e["agent"], e["round"]) for e in trace],
+                         [("outline", "Writer", 1), ("section 1", "Writer", 1), ("section 1", "Editor", 2)])
+        self.assertEqual([e["cache_hit"] for e in trace], [False, True, False])
+        self.assertEqual(trace[2]["prompt_tokens"], 20)
+
+        summary = recorder.summarize()
+        self.assertEqual(summary[("section 1", "Writer")]["cache_hits"], 1)
+        self.assertIn("total", recorder.format_summary())
+
+    def test_errors_and_prometheus_output(self):
+        """Failed calls are recorded and totals export in Prometheus text format"""
+        recorder = LLMCallRecorder()
+        agent = SimpleNamespace(name="Researcher", client=FakeClient(fail=True))
+        recorder.instrument(agent)
+        recorder.instrument(agent)  # Instrumenting twice does not double-record
+        with recorder.stage("section 2"), self.assertRaises(TimeoutError):
+            agent.client.create(messages=[])
+        self.assertEqual(len(recorder.records), 1)
+        self.assertIn("TimeoutError", recorder.records[0]["error"])
+
+        metrics_path = os.path.join(self.temp_dir.name, "metrics.prom")
+        recorder.write_prometheus(metrics_path)
+        with open(metrics_path, encoding="utf-8") as f:
+            metrics = f.read()
+        self.assertIn("# TYPE article_llm_calls_total counter", metrics)
+        self.assertIn('article_llm_errors_total{stage="section 2",agent="Researcher"} 1', metrics)
+
+if __name__ == '__main__':
+    unittest.main()
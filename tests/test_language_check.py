@@ -0,0 +1,39 @@
+"""Test cases for the script-based language distribution check"""
+import unittest
+from language_check import language_distribution, latin_language, sentence_spans
+
+def no_fallback(sentence):
+    raise AssertionError(f"langdetect called for: {sentence}")
+
+class TestLanguageDistribution(unittest.TestCase):
+    def test_scripts_decide_without_langdetect(self):
+        """Arabic and Latin sentences are told apart by their letters alone"""
+        text = ("تستخدم الحرب الإلكترونية لتعطيل الطائرات المسيرة.\n"
+                "## التشويش على الاتصالات\n"
+                "The jammer disrupts the control link of the drone.")
+        self.assertEqual(len(sentence_spans(text)), 3)
+        self.assertAlmostEqual(language_distribution(text, "ar", fallback=no_fallback), 1 / 3)
+        self.assertEqual(language_distribution("L'ennemi utilise des drones pour la reconnaissance.", "fr",
+                                               fallback=no_fallback), 0.0)
+
+    def test_terms_are_removed_by_offset(self):
+        """A glossary term does not hide the rest of its sentence"""
+        text = "يعمل نظام guerre électronique على تشويش الرادار. This sentence is entirely in English."
+        # Only the English sentence is wrong; the term is cut out, the Arabic sentence still counts
+        self.assertEqual(language_distribution(text, "ar", ["guerre électronique"], fallback=no_fallback), 0.5)
+        spans = [(text.index("guerre"), text.index("guerre") + len("guerre électronique"))]
+        self.assertEqual(language_distribution(text, "ar", exempt_spans=spans, fallback=no_fallback), 0.5)
+        # A sentence made only of a term is ignored
+        self.assertEqual(language_distribution("Brouillage.", "ar", ["Brouillage"], fallback=no_fallback), 0.0)
+
+    def test_langdetect_only_settles_ambiguous_latin(self):
+        calls = []
+        def fallback(sentence):
+            calls.append(sentence)
+            return "en"
+        self.assertEqual(latin_language("The radar detects the drone", fallback), "en")
+        self.assertEqual(latin_language("Radar Thales GM400", fallback), "en")
+        self.assertEqual(calls, ["Radar Thales GM400"])
+
+if __name__ == '__main__':
+    unittest.main()
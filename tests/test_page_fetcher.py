@@ -0,0 +1,107 @@
+"""Test cases for the SearchAgent fetch pipeline, against a local HTTP server"""
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.agents.search_agent.page_fetcher import PageFetcher, PageTextExtractor
+from src.agents.search_agent.search_agent import SearchAgent
+
+ARTICLE = """<html><head><title>Counter-drone
+jamming</title><script>var tracking = 1;</script></head>
+<body><nav>Home | News</nav><article><h1>Jamming drones</h1>
+<p>Jammers cut the control link &amp; the GPS signal.</p><p>Range is limited.</p></article>
+<footer>Copyright</footer></body></html>"""
+
+SEARCH_PAGE = """<html><body>
+<div class="g"><div class="r"><a href="/url?q=http://{host}/page/1&sa=U">One</a></div>
+<span><a href="/search?q=related:{host}/page/1">Similar</a> <a href="http://{host}/cache/1">Cached</a></span></div>
+<div class="g"><a href="http://{host}/page/2">Two</a></div>
+<div class="ads"><a href="http://{host}/ad">Ad</a></div>
+</body></html>"""
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if self.path == "/old":
+                self.send_response(301)
+                self.send_header("Location", "/page/1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            host = f"127.0.0.1:{server.server_address[1]}"
+            body = (SEARCH_PAGE.format(host=host) if self.path.startswith("/search") else ARTICLE).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+class TestPageFetcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.active = self.server.max_active = 0
+        self.server.delay = 0.1
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.fetcher = PageFetcher(max_per_host=4, timeout=5)
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_extraction_skips_boilerplate(self):
+        extractor = PageTextExtractor()
+        for i in range(0, len(ARTICLE), 17):  # Fed in chunks, as read from the socket
+            extractor.feed(ARTICLE[i:i + 17])
+        self.assertEqual(" ".join(extractor.title.split()), "Counter-drone jamming")
+        self.assertEqual(extractor.text, "Jamming drones\nJammers cut the control link & the GPS signal.\nRange is limited.")
+
+    def test_pages_are_fetched_concurrently_with_host_limit_and_cache(self):
+        urls = [f"{self.base}/page/{i}" for i in range(8)]
+        started = time.perf_counter()
+        pages = self.fetcher.fetch_many(urls)
+        elapsed = time.perf_counter() - started
+        self.assertTrue(all(page.status == 200 and page.title == "Counter-drone jamming" for page in pages))
+        self.assertEqual(self.server.max_active, 4)
+        self.assertLess(elapsed, 0.6)  # Two waves of four instead of eight serial requests
+        self.assertLessEqual(self.fetcher.pool.connections_opened, 4)  # Connections are reused
+
+        again = self.fetcher.fetch_many(urls[:2] + [f"{self.base}/old"])
+        self.assertTrue(again[0].from_cache and again[1].from_cache)
+        self.assertEqual(again[2].url, f"{self.base}/page/1")  # Redirect followed
+        self.assertEqual(len(self.server.requests), 10)
+
+    def test_failures_are_reported_per_url(self):
+        self.server.delay = 0
+        pages = self.fetcher.fetch_many([f"{self.base}/page/1", "http://127.0.0.1:1/unreachable", "ftp://example.org/x"])
+        self.assertIsNone(pages[0].error)
+        self.assertIn("ConnectionRefusedError", pages[1].error)
+        self.assertIn("unsupported URL scheme", pages[2].error)
+
+    def test_search_agent_returns_result_links_and_sources(self):
+        self.server.delay = 0
+        agent = SearchAgent("brouillage drones", fetcher=self.fetcher, search_url=self.base + "/search?q={query}")
+        self.assertEqual(agent.search(), [f"{self.base}/page/1", f"{self.base}/page/2"])
+        sources = agent.fetch_sources()
+        self.assertEqual([source["title"] for source in sources], ["Counter-drone jamming"] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Test cases for the shared LLM rate limiter"""
+import unittest
+from types import SimpleNamespace
+from utils.rate_limiter import RateLimiter, TokenBucket, get_rate_limiter, is_retryable
+
+class FakeTime:
+    """Clock whose sleep() just advances it"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeTime()
+
+    def limiter(self, **kwargs):
+        return RateLimiter(clock=self.time.clock, sleep=self.time.sleep, **kwargs)
+
+    def test_budgets_queue_callers(self):
+        """Calls beyond the request or token budget wait for the bucket to refill"""
+        bucket = TokenBucket(60, self.time.clock)
+        self.assertEqual(bucket.reserve(60), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1), 1.0)
+        self.assertAlmostEqual(bucket.reserve(1), 2.0)
+
+        limiter = self.limiter(requests_per_minute=600, tokens_per_minute=1000, expected_completion_tokens=0)
+        limiter.call(lambda: "ok", 1000)
+        limiter.call(lambda: "ok", 500)
+        self.assertAlmostEqual(limiter.last_wait(), 30.0)
+        self.assertAlmostEqual(limiter.stats()["queue_wait_max_s"], 30.0)
+
+    def test_retries_transient_errors_only(self):
+        """429 and 5xx responses are retried with backoff; client errors are raised at once"""
+        self.assertTrue(is_retryable(ProviderError(429)))
+        self.assertTrue(is_retryable(ProviderError(503)))
+        self.assertFalse(is_retryable(ProviderError(400)))
+        self.assertTrue(is_retryable(TimeoutError()))
+
+        limiter = self.limiter(max_retries=3, base_delay=1.0)
+        outcomes = [ProviderError(429), ProviderError(502), "ok"]
+        retries = []
+        def request():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        self.assertEqual(limiter.call(request, 10, on_retry=lambda: retries.append(1)), "ok")
+        self.assertEqual(len(retries), 2)
+        self.assertTrue(0 <= self.time.sleeps[0] <= 1.0 and 0 <= self.time.sleeps[1] <= 2.0)
+
+        def bad_request():
+            raise ProviderError(400)
+        with self.assertRaises(ProviderError):
+            limiter.call(bad_request, 10)
+        self.assertEqual(limiter.stats()["retries"], 2)
+        self.assertEqual(limiter.stats()["failures"], 1)
+
+    def test_wrapped_agents_settle_actual_usage(self):
+        """Wrapped clients are charged the tokens they report, not the estimate"""
+        limiter = self.limiter(tokens_per_minute=1000, expected_completion_tokens=500)
+        response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=40, completion_tokens=60))
+        agent = SimpleNamespace(name="Writer", client=SimpleNamespace(create=lambda **kwargs: response))
+        limiter.wrap(agent)
+        limiter.wrap(agent)  # Wrapping twice does not charge twice
+        self.assertIs(agent.client.create(messages=[{"role": "user", "content": "اكتب"}]), response)
+        self.assertAlmostEqual(limiter.tokens.tokens, 900)
+
+    def test_limiter_is_shared_per_settings(self):
+        settings = {"requests_per_minute": 30, "tokens_per_minute": 5000}
+        self.assertIs(get_rate_limiter(settings), get_rate_limiter(dict(settings)))
+        self.assertIsNot(get_rate_limiter(settings), get_rate_limiter({"requests_per_minute": 31}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Test cases for the persistent LLM response cache"""
+import json
+import os
+import tempfile
+import unittest
+from multiprocessing import Pool
+from utils.response_cache import ResponseCache
+
+def request_key(content, model="deepseek-chat", temperature=0.7):
+    """Same shape as autogen's cache key: the JSON of the request"""
+    return json.dumps({
+        "model": model, "temperature": temperature,
+        "messages": [{"role": "system", "content": "You are an expert military writer."},
+                     {"role": "user", "content": content}]
+    }, sort_keys=True)
+
+def store_responses(args):
+    path, worker = args
+    cache = ResponseCache(path)
+    for i in range(20):
+        cache.set(request_key(f"{worker}-{i}"), {"content": f"answer {worker}-{i}"})
+    return sum(cache.get(request_key(f"{worker}-{i}")) is not None for i in range(20))
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_hits_misses_and_persistence(self):
+        """Responses survive a new cache instance and only exact requests hit"""
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get(request_key("الحرب الإلكترونية")))
+        cache.set(request_key("الحرب الإلكترونية"), {"content": "نص"})
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get(request_key("الحرب الإلكترونية")), {"content": "نص"})
+        self.assertIsNone(reopened.get(request_key("الحرب الإلكترونية", temperature=0.2)))
+        self.assertEqual(reopened.get(request_key("other"), "default"), "default")
+        stats = reopened.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 1))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_lru_eviction_by_size(self):
+        """Least recently used responses are evicted once the size limit is exceeded"""
+        cache = ResponseCache(self.path, max_size_mb=3000 / (1024 * 1024))
+        for i in range(3):
+            cache.set(request_key(str(i)), "x" * 900)
+        cache.get(request_key("0"))  # 0 becomes the most recently used
+        cache.set(request_key("3"), "x" * 900)
+
+        self.assertIsNotNone(cache.get(request_key("0")))
+        self.assertIsNone(cache.get(request_key("1")))
+        self.assertIsNotNone(cache.get(request_key("3")))
+        self.assertLessEqual(cache.stats()["bytes"], 3000)
+
+    def test_concurrent_processes(self):
+        """Several processes can write to and read from the same cache file"""
+        ResponseCache(self.path)
+        with Pool(3) as pool:
+            found = pool.map(store_responses, [(self.path, worker) for worker in range(3)])
+        self.assertEqual(found, [20, 20, 20])
+        self.assertEqual(ResponseCache(self.path).stats()["entries"], 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Test cases for checkpointing and resuming article runs"""
+import os
+import tempfile
+import unittest
+from run_manifest import RunManifest, fingerprint
+
+class TestRunManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest_path = os.path.join(self.temp_dir.name, "run_manifest.json")
+        self.outline_path = os.path.join(self.temp_dir.name, "outline.txt")
+        self.params = {"topic": "الحرب الإلكترونية", "language": "arabic", "word_count": "1500"}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, path, content):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def finish_section(self, manifest, key, input_hash, content):
+        path = os.path.join(self.temp_dir.name, f"{fingerprint(key)[:8]}.txt")
+        self.write(path, content)
+        manifest.mark_section(key, input_hash, "done", output_path=path)
+
+    def test_resume_skips_finished_sections(self):
+        """A rerun with the same parameters reuses the outline and finished sections only"""
+        manifest = RunManifest(self.manifest_path)
+        self.assertFalse(manifest.start(self.params))
+        self.write(self.outline_path, "## مقدمة\nنقاط")
+        manifest.record_outline(self.outline_path, "## مقدمة\nنقاط")
+        self.finish_section(manifest, "## مقدمة", "hash-intro", "نص المقدمة")
+        manifest.mark_section("## القسم الأول", "hash-1", "failed", error="timeout")
+
+        resumed = RunManifest(self.manifest_path)
+        self.assertTrue(resumed.start(self.params))
+        self.assertEqual(resumed.saved_outline(), "## مقدمة\nنقاط")
+        self.assertEqual(resumed.completed_section("## مقدمة", "hash-intro"), "نص المقدمة")
+        self.assertIsNone(resumed.completed_section("## القسم الأول", "hash-1"))
+
+    def test_changed_inputs_invalidate(self):
+        """Changed section inputs, missing outputs and new parameters force regeneration"""
+        manifest = RunManifest(self.manifest_path)
+        manifest.start(self.params)
+        self.finish_section(manifest, "## مقدمة", "hash-intro", "نص المقدمة")
+        self.assertIsNone(manifest.completed_section("## مقدمة", "hash-intro-edited"))
+
+        self.write(self.outline_path, "## مقدمة\nنقاط")
+        manifest.record_outline(self.outline_path, "## مقدمة\nنقاط")
+        self.write(self.outline_path, "## مقدمة\nنقاط معدلة")
+        self.assertEqual(manifest.saved_outline(), "## مقدمة\nنقاط معدلة")
+        # The edited outline becomes the recorded one; sections stay until their own inputs change
+        self.assertEqual(RunManifest(self.manifest_path).data["outline"]["hash"], fingerprint("## مقدمة\nنقاط معدلة"))
+        self.assertEqual(manifest.completed_section("## مقدمة", "hash-intro"), "نص المقدمة")
+
+        os.remove(manifest.data["sections"]["## مقدمة"]["output_path"])
+        self.assertIsNone(manifest.completed_section("## مقدمة", "hash-intro"))
+
+        fresh = RunManifest(self.manifest_path)
+        self.assertFalse(fresh.start(dict(self.params, topic="الدفاع الجوي")))
+        self.assertIsNone(fresh.saved_outline())
+        self.assertEqual(fresh.data["sections"], {})
+
+if __name__ == '__main__':
+    unittest.main()
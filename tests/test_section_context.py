@@ -0,0 +1,55 @@
+"""Test cases for the token-budgeted previous-sections context"""
+import unittest
+from section_context import SectionContextBuilder, extractive_summary
+from utils.tokens import count_tokens
+
+def make_section(number):
+    sentences = " ".join(f"تعمل الوحدة {number} على رصد الإشارات المعادية في المرحلة {i}." for i in range(40))
+    return f"## القسم {number}\n\n{sentences}\n\n- نقطة أولى\n- نقطة ثانية"
+
+class TestSectionContextBuilder(unittest.TestCase):
+    def test_short_history_is_kept_verbatim(self):
+        """Sections that fit the budget are passed unchanged"""
+        builder = SectionContextBuilder(token_budget=5000, recent_sections=2)
+        sections = [make_section(1), make_section(2)]
+        context, tokens = builder.build(sections)
+        self.assertIn(SectionContextBuilder.split_section(sections[0])[1], context)
+        self.assertIn(SectionContextBuilder.split_section(sections[1])[1], context)
+        self.assertEqual(tokens, count_tokens(context))
+
+    def test_budget_holds_as_article_grows(self):
+        """Per-section context cost stays within the budget and keeps every heading"""
+        builder = SectionContextBuilder(token_budget=1500, recent_sections=1, summary_tokens=40)
+        sections = [make_section(number) for number in range(1, 31)]
+        for count in (5, 15, 30):
+            context, tokens = builder.build(sections[:count])
+            self.assertLessEqual(tokens, 1500)
+            for number in range(1, count + 1):
+                self.assertIn(f"## القسم {number}\n", context + "\n")
+            # The latest section is verbatim, the first one summarized or reduced to its heading
+            self.assertIn(SectionContextBuilder.split_section(sections[count - 1])[1], context)
+            self.assertNotIn(SectionContextBuilder.split_section(sections[0])[1], context)
+
+    def test_summaries_are_cached(self):
+        """Each section body is summarized once across prompts"""
+        calls = []
+        def summarizer(body, max_tokens):
+            calls.append(body)
+            return extractive_summary(body, max_tokens)
+
+        builder = SectionContextBuilder(token_budget=1200, recent_sections=1, summarizer=summarizer)
+        sections = [make_section(number) for number in range(1, 5)]
+        builder.build(sections[:3])
+        builder.build(sections)
+        self.assertEqual(len(calls), len(set(calls)))
+
+    def test_extractive_summary_length(self):
+        """Summaries keep leading sentences within the token limit"""
+        body = SectionContextBuilder.split_section(make_section(7))[1]
+        summary = extractive_summary(body, 30)
+        self.assertTrue(summary.startswith("تعمل الوحدة 7"))
+        self.assertLessEqual(count_tokens(summary), 30)
+        self.assertNotIn("نقطة", summary)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Test cases for paragraph-level section repair"""
+import unittest
+from section_repair import SectionRepairer, find_paragraph_issues, paragraph_spans
+
+SECTION = """تستخدم الحرب الإلكترونية لتعطيل الطائرات المسيرة.
+
+The jammer disrupts the control link of the drone. It works at short range.
+
+### الرصد
+يعتمد الرصد على الرادارات وأجهزة الاستشعار."""
+
+class TestSectionRepair(unittest.TestCase):
+    def find_issues(self, text):
+        return find_paragraph_issues(text, "ar", "Arabic", variants={"الرادارت": "الرادارات"})
+
+    def test_offending_paragraphs_are_found(self):
+        self.assertEqual(len(paragraph_spans(SECTION)), 3)
+        text = SECTION.replace("الرادارات", "الرادارت")
+        issues = self.find_issues(text)
+        self.assertEqual([text[issue.start:issue.end][:3] for issue in issues], ["The", "###"])
+        self.assertIn("Arabic", issues[0].problems[0])
+        self.assertIn('"الرادارات"', issues[1].problems[0])
+
+    def test_only_offending_paragraphs_are_rewritten(self):
+        """The fixed paragraph is spliced in; the rest of the section is untouched"""
+        prompts = []
+        def rewrite(prompt):
+            prompts.append(prompt)
+            return "يعطل جهاز التشويش وصلة التحكم في الطائرة المسيرة على مدى قصير."
+        repairer = SectionRepairer(rewrite, self.find_issues, "Arabic", max_attempts=2)
+        repaired, report = repairer.repair(SECTION)
+        self.assertEqual(len(prompts), 1)
+        self.assertIn("The jammer disrupts", prompts[0])
+        self.assertNotIn("الرصد", prompts[0])
+        self.assertEqual(repaired, SECTION.replace(
+            "The jammer disrupts the control link of the drone. It works at short range.",
+            "يعطل جهاز التشويش وصلة التحكم في الطائرة المسيرة على مدى قصير."))
+        self.assertEqual((report["attempts"], report["paragraphs_sent"], report["remaining"]), (1, 1, 0))
+
+    def test_retry_budget_is_bounded(self):
+        calls = []
+        def stubborn_writer(prompt):
+            calls.append(prompt)
+            return "Still English text here."
+        repaired, report = SectionRepairer(stubborn_writer, self.find_issues, "Arabic", max_attempts=2).repair(SECTION)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(report["remaining"], 1)
+        self.assertIn("Still English text here.", repaired)
+
+if __name__ == '__main__':
+    unittest.main()
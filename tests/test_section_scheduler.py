@@ -0,0 +1,69 @@
+"""Test cases for concurrent section scheduling"""
+import threading
+import time
+import unittest
+from section_scheduler import SectionScheduler, section_dependencies
+
+class TestSectionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.sections = [{"title": f"## Section {i}", "number": i} for i in range(6)]
+        self.sections[-1]["number"] = -1
+
+    def test_sections_run_concurrently_in_outline_order(self):
+        """Independent sections overlap and results keep the outline order"""
+        def generate(agents, section, context):
+            # Later sections finish first
+            time.sleep(0.05 * (6 - section["number"] % 6))
+            return f"body of {section['title']}"
+
+        scheduler = SectionScheduler(dict, max_workers=6)
+        started = time.perf_counter()
+        results = scheduler.run(self.sections, generate)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(results, [f"body of {section['title']}" for section in self.sections])
+        # The sum of all sections is 1.05s, the slowest one 0.3s
+        self.assertLess(elapsed, 0.6)
+
+    def test_dependencies_receive_earlier_results(self):
+        """A section only starts once the sections it takes as context are done"""
+        dependencies = section_dependencies([section["number"] for section in self.sections], "conclusion")
+        self.assertEqual(dependencies[:-1], [[]] * 5)
+        self.assertEqual(dependencies[-1], [0, 1, 2, 3, 4])
+        self.assertEqual(section_dependencies([0, 1, 2], "previous"), [[], [0], [0, 1]])
+
+        seen_context = {}
+        def generate(agents, section, context):
+            seen_context[section["number"]] = [(earlier["number"], body) for earlier, body in context]
+            return str(section["number"])
+
+        results = SectionScheduler(dict, max_workers=3).run(self.sections, generate, dependencies)
+        self.assertEqual(results, ["0", "1", "2", "3", "4", "-1"])
+        self.assertEqual(seen_context[-1], [(i, str(i)) for i in range(5)])
+        self.assertEqual(seen_context[2], [])
+
+    def test_each_worker_gets_its_own_agents(self):
+        """Agents are created once per worker thread and never shared between threads"""
+        owners = {}
+        lock = threading.Lock()
+        def factory():
+            return {"owner": threading.get_ident()}
+        def generate(agents, section, context):
+            time.sleep(0.02)
+            with lock:
+                owners.setdefault(id(agents), set()).add(threading.get_ident())
+            return ""
+
+        SectionScheduler(factory, max_workers=3).run(self.sections, generate)
+        self.assertLessEqual(len(owners), 3)
+        self.assertTrue(all(len(threads) == 1 for threads in owners.values()))
+
+    def test_invalid_dependencies(self):
+        """Dependencies on later sections and unknown context modes are rejected"""
+        with self.assertRaises(ValueError):
+            SectionScheduler(dict).run(self.sections[:2], lambda *args: "", [[1], []])
+        with self.assertRaises(ValueError):
+            section_dependencies([0, 1], "everything")
+
+if __name__ == '__main__':
+    unittest.main()
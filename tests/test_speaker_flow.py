@@ -0,0 +1,65 @@
+"""Test cases for deterministic group chat speaker selection"""
+import unittest
+from speaker_flow import SpeakerFlow, SECTION_TRANSITIONS, OUTLINE_TRANSITIONS
+
+class FakeAgent:
+    def __init__(self, name):
+        self.name = name
+
+class FakeGroupChat:
+    """The parts of autogen.GroupChat a speaker selection method uses"""
+    def __init__(self, names):
+        self.agents = [FakeAgent(name) for name in names]
+        self.messages = []
+
+    def agent_by_name(self, name):
+        return next(agent for agent in self.agents if agent.name == name)
+
+def run_chat(flow, groupchat, first_speaker, max_round, replies=None):
+    """Follow autogen's group chat loop and return the speaker names in order"""
+    speaker = groupchat.agent_by_name(first_speaker)
+    for _ in range(max_round):
+        content = (replies or {}).get(len(groupchat.messages), "draft")
+        groupchat.messages.append({"name": speaker.name, "content": content})
+        speaker = flow(speaker, groupchat)
+        if speaker is None:
+            break
+    return [message["name"] for message in groupchat.messages]
+
+class TestSpeakerFlow(unittest.TestCase):
+    names = ["ArticleRequester", "Writer", "Editor", "Researcher", "TerminologyChecker", "WebSearcher"]
+
+    def test_section_flow_is_deterministic(self):
+        """Section chats follow Writer -> TerminologyChecker -> Editor -> Writer and end on a draft"""
+        flow = SpeakerFlow(SECTION_TRANSITIONS, final_speaker="Writer")
+        flow.validate(self.names)
+        max_round = flow.max_rounds("ArticleRequester")
+        expected = ["ArticleRequester", "Writer", "TerminologyChecker", "Editor", "Writer"]
+        for _ in range(2):
+            self.assertEqual(run_chat(flow, FakeGroupChat(self.names), "ArticleRequester", max_round), expected)
+        self.assertEqual(max_round, len(expected))
+
+    def test_more_review_cycles(self):
+        """final_turns sets how many drafts the writer produces"""
+        flow = SpeakerFlow(SECTION_TRANSITIONS, final_speaker="Writer", final_turns=3)
+        speakers = run_chat(flow, FakeGroupChat(self.names), "ArticleRequester", 20)
+        self.assertEqual(speakers.count("Writer"), 3)
+        self.assertEqual(speakers[-1], "Writer")
+        self.assertEqual(len(speakers), flow.max_rounds("ArticleRequester"))
+
+    def test_terminate_message_ends_chat(self):
+        """A TERMINATE message ends the chat early"""
+        flow = SpeakerFlow(SECTION_TRANSITIONS, final_speaker="Writer", final_turns=3)
+        speakers = run_chat(flow, FakeGroupChat(self.names), "ArticleRequester", 20, replies={2: "OK TERMINATE"})
+        self.assertEqual(speakers, ["ArticleRequester", "Writer", "TerminologyChecker"])
+
+    def test_config_and_validation(self):
+        """Flows are built from config and must only name agents in the chat"""
+        flow = SpeakerFlow.from_config({"final_turns": 1}, OUTLINE_TRANSITIONS, "OutlineCreator")
+        self.assertEqual(flow.max_rounds("ArticleRequester"), 2)
+        with self.assertRaises(ValueError):
+            flow.validate(self.names)
+        flow.validate(["ArticleRequester", "OutlineCreator", "Editor", "TerminologyChecker"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,15 @@
 """Test cases for military terminology handling"""
 import unittest
 import os
-from terminology_handler import TerminologyManager
+import re
+import json
+import shutil
+import tempfile
+from unittest import mock
+import terminology_handler
+from terminology_handler import TerminologyManager, TermMatcher, TermSearchIndex, get_terminology_manager, clear_terminology_registry, normalize_arabic, with_definiteness, format_term_line, IncrementalTermVerifier, tokenize_for_search
+from utils.tokens import count_tokens
+from terminology_checker import build_terminology_report, format_terminology_report, draft_language
 
 class TestTerminologyHandler(unittest.TestCase):
     def setUp(self):
@@ -14,6 +22,49 @@ class TestTerminologyHandler(unittest.TestCase):
         self.assertGreater(len(self.term_manager.arabic_terms), 0)
         self.assertGreater(len(self.term_manager.french_terms), 0)
     
+    def test_snapshot_reused_until_csv_changes(self):
+        """Indexes come from the snapshot until the CSV content changes"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "glossary.csv")
+            shutil.copy(self.glossary_path, csv_path)
+            fresh = TerminologyManager(csv_path)
+            self.assertTrue(os.path.exists(csv_path + ".snapshot"))
+
+            cached = TerminologyManager(csv_path)
+            self.assertEqual(cached.terminology, fresh.terminology)
+            self.assertEqual(list(cached.arabic_terms), list(fresh.arabic_terms))
+            self.assertIs(cached.arabic_terms[fresh.terminology['2']['arabic_term']], cached.terminology['2'])
+
+            with open(csv_path, "a", encoding="utf-8") as f:
+                f.write("999;999;مصطلح تجريبي;Terme de test;تعريف;Définition;اختبار;1\n")
+            updated = TerminologyManager(csv_path)
+            self.assertIn("مصطلح تجريبي", updated.arabic_terms)
+            self.assertEqual(len(updated.terminology), len(fresh.terminology) + 1)
+
+    def test_shared_registry(self):
+        """The registry loads each glossary once and hands out the same instance"""
+        clear_terminology_registry()
+        shared = get_terminology_manager(self.glossary_path)
+        self.assertIs(get_terminology_manager(os.path.abspath(self.glossary_path)), shared)
+        clear_terminology_registry()
+        self.assertIsNot(get_terminology_manager(self.glossary_path), shared)
+
+    def test_compact_store(self):
+        """The compact store serves the same lookups as the dict indexes"""
+        compact = TerminologyManager(self.glossary_path, use_snapshot=False, compact=True)
+        self.assertEqual(list(compact.arabic_terms), list(self.term_manager.arabic_terms))
+        self.assertEqual(dict(compact.terminology), self.term_manager.terminology)
+        self.assertEqual(
+            {category: list(entries) for category, entries in compact.categories.items()},
+            self.term_manager.categories
+        )
+        term = "الإستراتيجية العسكرية"
+        self.assertEqual(compact.arabic_terms[term], self.term_manager.arabic_terms[term])
+        self.assertEqual(compact.get_term_definition(term), self.term_manager.get_term_definition(term))
+        self.assertEqual(compact.get_related_terms(term), self.term_manager.get_related_terms(term))
+        content = "الاتجاه الرئيسي و الاتجاه الإستراتيجي"
+        self.assertEqual(compact.check_content(content), self.term_manager.check_content(content))
+
     def test_suggest_terms(self):
         """Test term suggestions for a topic"""
         # Test Arabic suggestions
@@ -24,6 +75,83 @@ class TestTerminologyHandler(unittest.TestCase):
         suggestions_fr = self.term_manager.suggest_terms_for_topic("stratégie", "french")
         self.assertGreater(len(suggestions_fr), 0)
     
+    def test_suggest_terms_ranked(self):
+        """Suggestions are ranked by relevance and cut to the requested limit"""
+        top_fr = self.term_manager.suggest_terms_for_topic("stratégie militaire", "french", limit=3)
+        self.assertEqual(len(top_fr), 3)
+        self.assertEqual(top_fr[0]['french_term'], "Stratégie militaire")
+
+        # Spelling variants and a missing article still reach the glossary term
+        top_ar = self.term_manager.suggest_terms_for_topic("الاستراتيجية العسكرية", "arabic", limit=3)
+        self.assertEqual(top_ar[0]['arabic_term'], "الإستراتيجية العسكرية")
+
+        ranked = self.term_manager.search_terms("stratégie", "french", limit=None)
+        scores = [score for _, score in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_pruned_search_matches_full_ranking(self):
+        """Top-k searches skip frequent tokens but rank exactly like the full ranking"""
+        queries = [("stratégie de la défense", "french"), ("emploi des forces armées en temps de guerre", "french"),
+                   ("الإستراتيجية العسكرية للدولة", "arabic"), ("استخدام القوات المسلحة في الحرب", "arabic")]
+        draft = " ".join(entry['french_def'] for entry in list(self.term_manager.terminology.values())[:5])
+        queries.append((draft, "french"))
+        for query, language in queries:
+            full = self.term_manager.search_terms(query, language, limit=None)
+            for limit in (1, 3, 10):
+                self.assertEqual(self.term_manager.search_terms(query, language, limit=limit), full[:limit])
+
+    def test_search_skips_common_tokens(self):
+        """Function words and tokens found in most entries are not indexed"""
+        self.assertEqual(tokenize_for_search("La stratégie de la défense"), ["stratégie", "défense"])
+        self.assertEqual(tokenize_for_search("الاتجاه الإستراتيجي في الحرب"), ["اتجاه", "استراتيجي", "حرب"])
+        self.assertEqual(self.term_manager.search_terms("de la", "french"), [])
+
+        class SmallCapIndex(TermSearchIndex):
+            MIN_ENTRIES_FOR_DF_CAP = 1
+        entries = list(self.term_manager.terminology.values())
+        index = SmallCapIndex(entries, 'french_term', 'french_def')
+        self.assertNotIn("استراتيجيه", index.postings)
+        self.assertIn("stratégie", index.postings)
+        self.assertTrue(all(index.term_lengths[doc_id] <= len(tokenize_for_search(entry['french_term']))
+                            for doc_id, entry in enumerate(entries)))
+
+    @unittest.skipIf(terminology_handler.numpy is None, "numpy not installed")
+    def test_numpy_search_matches_pure_python(self):
+        """The numpy search returns the same entries and scores as the pure-Python one"""
+        draft = " ".join(entry['arabic_def'] for entry in list(self.term_manager.terminology.values())[:8])
+        for query, language in [("stratégie de la défense", "french"), ("الإستراتيجية العسكرية", "arabic"),
+                                (draft, "arabic"), ("inconnu", "french")]:
+            for limit in (1, 10, None):
+                vectorized = self.term_manager.search_terms(query, language, limit=limit)
+                with mock.patch.object(terminology_handler, "numpy", None):
+                    self.assertEqual(self.term_manager.search_terms(query, language, limit=limit), vectorized)
+
+    def test_select_terms_for_section(self):
+        """Section terms are relevant, fit the token budget and are cached"""
+        title = "## 2. الإستراتيجية البحرية"
+        details = "- أعالي البحار\n- استخدام القوات البحرية"
+        selected = self.term_manager.select_terms_for_section(title, details, "arabic", token_budget=150)
+        self.assertGreater(len(selected), 0)
+        self.assertIn("أعالي البحار", [entry['arabic_term'] for entry in selected])
+        used = sum(count_tokens(format_term_line(entry, "arabic")) for entry in selected)
+        self.assertLessEqual(used, 150)
+        self.assertIs(self.term_manager.select_terms_for_section(title, details, "arabic", token_budget=150), selected)
+        self.assertEqual(self.term_manager.select_terms_for_section(title, details, "arabic", token_budget=0), [])
+
+    def test_caches_evict_safely_across_threads(self):
+        """Sections checked concurrently can fill and evict the shared caches"""
+        import io
+        import contextlib
+        from concurrent.futures import ThreadPoolExecutor
+        def worker(n):
+            for i in range(40):
+                self.term_manager.compile_replacements({f"variant {n} {i}": "official"})
+                self.term_manager.select_terms_for_section(f"section {n} {i}", "", "arabic", token_budget=20, max_terms=1)
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(worker, range(8)))
+        self.assertLessEqual(len(self.term_manager._replacement_engines), 8)
+        self.assertLessEqual(len(self.term_manager._section_terms), 256)
+
     def test_check_content(self):
         """Test content checking for terminology"""
         # Test Arabic content
@@ -36,6 +164,137 @@ class TestTerminologyHandler(unittest.TestCase):
         modified_fr, suggestions_fr = self.term_manager.check_content(content_fr, "french")
         self.assertIsInstance(suggestions_fr, list)
     
+    def test_check_content_matches_regex_scan(self):
+        """Single-pass matcher returns the same suggestions as one regex scan per term"""
+        content = "الاتجاه الرئيسي و الاتجاه الإستراتيجي، ثم الاتجاه الرئيسي مرة أخرى. الاتجاه الرئيسيون"
+        expected = []
+        for term, entry in self.term_manager.arabic_terms.items():
+            for match in re.finditer(r'\b' + re.escape(term) + r'\b', content):
+                expected.append({
+                    'term': term,
+                    'definition': entry['arabic_def'],
+                    'category': entry['category'],
+                    'context': content[max(0, match.start() - 50):match.end() + 50]
+                })
+        _, suggestions = self.term_manager.check_content(content, "arabic")
+        self.assertEqual(suggestions, expected)
+        self.assertEqual(len(suggestions), 3)
+
+    def test_term_matcher_boundaries(self):
+        """Matcher respects word boundaries and never overlaps hits of the same term"""
+        matcher = TermMatcher(["aa", "a-b", "-b"])
+        matches = [(m.term, m.start, m.end) for m in matcher.find_all("aaaa a-b x-b aa")]
+        self.assertEqual(matches, [("a-b", 5, 8), ("-b", 6, 8), ("-b", 10, 12), ("aa", 13, 15)])
+
+    def test_check_and_replace_content(self):
+        """Replacements run in one pass, longest key first, and report per-key counts"""
+        content = "الاتجاه الرئيسى هو الإتجاه الرئيسى للجهد. الإتجاه"
+        replacement_map = {
+            "الإتجاه": "الاتجاه",
+            "الإتجاه الرئيسى": "الاتجاه الرئيسي",
+            "الاتجاه الرئيسى": "الاتجاه الرئيسي",
+        }
+        modified, corrections = self.term_manager.check_and_replace_content(content, "arabic", replacement_map)
+        self.assertEqual(modified, "الاتجاه الرئيسي هو الاتجاه الرئيسي للجهد. الاتجاه")
+        self.assertEqual(corrections, [
+            {"found": "الإتجاه", "replaced_with": "الاتجاه", "count": 1},
+            {"found": "الإتجاه الرئيسى", "replaced_with": "الاتجاه الرئيسي", "count": 1},
+            {"found": "الاتجاه الرئيسى", "replaced_with": "الاتجاه الرئيسي", "count": 1},
+        ])
+
+        # Without replacements the glossary hits in the text are reported
+        _, suggestions = self.term_manager.check_and_replace_content(modified, "arabic", {})
+        self.assertEqual([s['term'] for s in suggestions], ["الاتجاه الرئيسي", "الاتجاه الرئيسي"])
+        self.assertTrue(all(s['status'] == 'identified_in_text' for s in suggestions))
+
+    def test_normalize_arabic(self):
+        """Alef forms, ta marbuta, tashkeel, tatweel and the article normalize away"""
+        self.assertEqual(normalize_arabic("الإستراتيجية"), normalize_arabic("استراتيجية"))
+        self.assertEqual(normalize_arabic("الاتجاه"), normalize_arabic("الإتجاه"))
+        self.assertEqual(normalize_arabic("العَسْكَـرِيَّة"), normalize_arabic("عسكريه"))
+
+    def test_find_term_variants(self):
+        """Variants of glossary terms map to the official spelling and feed check_and_replace_content"""
+        content = "الإتجاه الرئيسي و الاتجاه الاستراتيجي ثم الاتجاه الرئيسي"
+        variants = self.term_manager.find_term_variants(content, "arabic")
+        self.assertEqual(variants, {
+            "الإتجاه الرئيسي": "الاتجاه الرئيسي",
+            "الاتجاه الاستراتيجي": "الاتجاه الإستراتيجي",
+        })
+        modified, _ = self.term_manager.check_and_replace_content(content, "arabic", variants)
+        self.assertEqual(modified, "الاتجاه الرئيسي و الاتجاه الإستراتيجي ثم الاتجاه الرئيسي")
+        self.assertEqual(self.term_manager.find_term_variants(content, "french"), {})
+
+    def test_variants_keep_definiteness_as_written(self):
+        """An indefinite occurrence is corrected without gaining the article of the glossary form"""
+        content = "يجب وضع استراتيجية عسكرية واضحة تخدم الاستراتيجية العسكرية للدولة"
+        variants = self.term_manager.find_term_variants(content, "arabic")
+        self.assertEqual(variants, {
+            "استراتيجية عسكرية": "إستراتيجية عسكرية",
+            "الاستراتيجية العسكرية": "الإستراتيجية العسكرية",
+        })
+        modified, _ = self.term_manager.check_and_replace_content(content, "arabic", variants)
+        self.assertEqual(modified, "يجب وضع إستراتيجية عسكرية واضحة تخدم الإستراتيجية العسكرية للدولة")
+        # Differences in the article alone are not variants
+        self.assertEqual(self.term_manager.find_term_variants("وضع إستراتيجية عسكرية واضحة", "arabic"), {})
+        self.assertEqual(with_definiteness("الاتجاه الإستراتيجي", "اتجاه الاستراتيجي"), "اتجاه الإستراتيجي")
+
+    def test_terminology_report(self):
+        """The local checker reports glossary terms used and the spellings to correct"""
+        draft = "يحدد الإتجاه الرئيسي و الاتجاه الاستراتيجي مسار العمليات"
+        self.assertEqual(draft_language(draft), "arabic")
+        self.assertEqual(draft_language("La stratégie militaire"), "french")
+        report = build_terminology_report(self.term_manager, draft, min_terms=3)
+        self.assertEqual(report["glossary_terms_used"], ["الاتجاه الرئيسي", "الاتجاه الإستراتيجي"])
+        self.assertEqual(
+            [(c["found"], c["replaced_with"]) for c in report["corrections"]],
+            [("الإتجاه الرئيسي", "الاتجاه الرئيسي"), ("الاتجاه الاستراتيجي", "الاتجاه الإستراتيجي")]
+        )
+        self.assertFalse(report["meets_minimum"])
+        self.assertNotIn("الاتجاه الرئيسي", report["suggested_terms"])
+        message = format_terminology_report(report)
+        self.assertIn("'الإتجاه الرئيسي' -> 'الاتجاه الرئيسي' (1x)", message)
+        self.assertIn("at least 3", message)
+
+    def test_iter_check_stream(self):
+        """Streaming check finds terms split across chunks, with absolute offsets"""
+        content = "مقدمة. الاتجاه الرئيسي ثم الاتجاه الإستراتيجي. " * 3
+        expected = [(m.start, m.end, m.term) for m in self.term_manager.find_term_matches(content, "arabic")]
+        chunks = [content[i:i + 5] for i in range(0, len(content), 5)]
+        streamed = list(self.term_manager.iter_check_stream(chunks, "arabic"))
+        self.assertEqual([(s['start'], s['end'], s['term']) for s in streamed], expected)
+        for suggestion in streamed:
+            self.assertEqual(suggestion['context'], content[max(0, suggestion['start'] - 50):suggestion['end'] + 50])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            text_path = os.path.join(temp_dir, "chapter.txt")
+            jsonl_path = os.path.join(temp_dir, "hits.jsonl")
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            count = self.term_manager.write_check_stream_jsonl(text_path, jsonl_path, "arabic", chunk_size=16)
+            with open(jsonl_path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(count, len(expected))
+        self.assertEqual([(r['start'], r['end'], r['term']) for r in rows], expected)
+
+    def test_incremental_verifier(self):
+        """Joined sections give the same matches as a full scan while reusing section results"""
+        filler = " يتناول هذا القسم مفاهيم عامة في التخطيط العسكري." * 4
+        sections = ["## المقدمة", "نص عن الاتجاه الرئيسي" + filler, "## الاتجاه", "الإستراتيجي و الاتجاه الرئيسي" + filler]
+        for section in sections:
+            self.term_manager.check_and_replace_content(section, "arabic", {})
+        verifier = IncrementalTermVerifier(self.term_manager, "arabic")
+        document, matches = verifier.verify(sections, separator=" ")
+        self.assertEqual(document, " ".join(sections))
+        self.assertEqual(matches, self.term_manager.get_matcher("arabic").find_all(document))
+        # "الاتجاه الإستراتيجي" only exists across the join of the last two parts
+        self.assertIn("الاتجاه الإستراتيجي", [m.term for m in matches])
+        self.assertLess(verifier.chars_scanned, len(document))
+
+        _, suggestions = verifier.check_document(sections, separator=" ")
+        _, expected = self.term_manager.check_and_replace_content(document, "arabic", {})
+        self.assertEqual(suggestions, expected)
+
     def test_get_related_terms(self):
         """Test finding related terms"""
         # Test Arabic related terms
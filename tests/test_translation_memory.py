@@ -0,0 +1,105 @@
+"""Test cases for the TranslationAgent translation memory pipeline"""
+import os
+import tempfile
+import unittest
+from terminology_handler import get_terminology_manager
+from src.agents.translation_agent.translation_agent import TranslationAgent
+from src.agents.translation_agent.translation_memory import TranslationMemory, TranslationPipeline
+
+class RecordingBackend:
+    """Offline backend that tags each segment and records every batch it receives"""
+    def __init__(self):
+        self.batches = []
+
+    def translate_batch(self, segments, source_lang, target_lang):
+        self.batches.append(list(segments))
+        return [f"<{target_lang}>{segment}" for segment in segments]
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = get_terminology_manager("../glossaire_2022_sample.csv")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_segments_are_deduplicated_and_batched(self):
+        backend = RecordingBackend()
+        pipeline = TranslationPipeline(backend, batch_size=2)
+        texts = ["Le drone approche. Le radar le détecte.\nLe drone approche.", "Le radar le détecte. Fin."]
+        translated = pipeline.translate_texts(texts, "fr", "ar")
+        self.assertEqual(translated[0], "<ar>Le drone approche. <ar>Le radar le détecte.\n<ar>Le drone approche.")
+        self.assertEqual(backend.batches, [["Le drone approche.", "Le radar le détecte."], ["Fin."]])
+        self.assertEqual((pipeline.stats["segments"], pipeline.stats["backend_segments"]), (5, 3))
+
+        # Exact and normalized repeats are answered by the memory
+        pipeline.translate_texts(["le drone approche", "LE RADAR  le détecte."], "fr", "ar")
+        self.assertEqual(len(backend.batches), 2)
+        self.assertEqual(pipeline.stats["memory_hits"], 2)
+
+    def test_glossary_terms_keep_their_official_translation(self):
+        """Glossary pairs answer whole segments and replace terms inside sentences sent to the backend"""
+        backend = RecordingBackend()
+        agent = TranslationAgent(
+            ["Direction Stratégique", "La Direction Stratégique est menacée."], "ar", source_language="fr",
+            backend=backend, memory=TranslationMemory(), terminology_manager=self.manager
+        )
+        translated = agent.translate()
+        self.assertEqual(translated[0], "الاتجاه الإستراتيجي")
+        self.assertEqual(backend.batches, [["La [[0]] est menacée."]])
+        self.assertEqual(translated[1], "<ar>La الاتجاه الإستراتيجي est menacée.")
+
+    def test_default_agent_memory_is_seeded_on_disk_and_source_is_detected(self):
+        """Without source_language, segments reach the backend as 'auto' and are keyed by their own language"""
+        class SourceRecordingBackend(RecordingBackend):
+            def translate_batch(self, segments, source_lang, target_lang):
+                self.batches.append((source_lang, list(segments)))
+                return [f"<{target_lang}>{segment}" for segment in segments]
+        backend = SourceRecordingBackend()
+        path = os.path.join(self.temp_dir.name, "memory", "tm.sqlite")
+        texts = ["The drone is approaching the base.", "La Direction Stratégique est menacée.", "الاتجاه الإستراتيجي"]
+        agent = TranslationAgent(texts, "ar", backend=backend, memory_path=path,
+                                 glossary_path="../glossaire_2022_sample.csv")
+        translated = agent.translate()
+        agent.memory.close()
+        self.assertEqual(backend.batches, [("auto", ["The drone is approaching the base.", "La [[0]] est menacée."])])
+        self.assertEqual(translated[2], texts[2])
+        reopened = TranslationMemory(path)
+        self.assertEqual(reopened.lookup("Direction Stratégique", "fr", "ar"), "الاتجاه الإستراتيجي")
+        self.assertEqual(reopened.lookup(texts[0], "en", "ar"), "<ar>The drone is approaching the base.")
+        self.assertEqual(reopened.lookup(texts[1], "fr", "ar"), "<ar>La الاتجاه الإستراتيجي est menacée.")
+        reopened.close()
+
+    def test_mangled_placeholders_are_not_kept(self):
+        """Spaced placeholders are restored; broken ones send the sentence again without protection"""
+        class ManglingBackend(RecordingBackend):
+            def translate_batch(self, segments, source_lang, target_lang):
+                self.batches.append(list(segments))
+                return [segment.replace("[[0]]", "[[ 0 ]]").replace("[[1]]", "]]1[[") for segment in segments]
+        backend = ManglingBackend()
+        memory = TranslationMemory()
+        pipeline = TranslationPipeline(backend, memory, self.manager)
+        memory.seed_from_glossary(self.manager)
+        texts = ["La Direction Stratégique est menacée.", "Direction Stratégique et Débarquement naval démonstratif ici."]
+        translated = pipeline.translate_texts(texts, "fr", "ar")
+        self.assertEqual(translated[0], "La الاتجاه الإستراتيجي est menacée.")
+        self.assertEqual(translated[1], texts[1])
+        self.assertEqual(backend.batches[1], [texts[1]])
+        self.assertEqual(pipeline.stats["unprotected_retries"], 1)
+        self.assertNotIn("[[", memory.lookup(texts[1], "fr", "ar"))
+
+    def test_memory_persists_and_glossary_wins(self):
+        path = os.path.join(self.temp_dir.name, "tm.sqlite")
+        memory = TranslationMemory(path)
+        memory.seed_from_glossary(self.manager)
+        memory.add([("Direction Stratégique", "ترجمة حرة")], "fr", "ar")
+        memory.add([("Bonjour", "مرحبا")], "fr", "ar")
+        memory.close()
+        reopened = TranslationMemory(path)
+        self.assertEqual(reopened.lookup("Direction Stratégique", "fr", "ar"), "الاتجاه الإستراتيجي")
+        self.assertEqual(reopened.lookup("bonjour !", "fr", "ar"), "مرحبا")
+        self.assertEqual(reopened.lookup("الاتجاه الاستراتيجي", "ar", "fr"), "Direction Stratégique")
+        reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
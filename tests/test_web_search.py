@@ -0,0 +1,105 @@
+"""Test cases for the cached, concurrent web search layer"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from utils.web_search import CorpusBackend, FixtureBackend, WebSearch, normalize_query, perform_web_search
+import utils.web_search as web_search_module
+
+RESULTS = {
+    "counter-drone jamming": [
+        {"title": "Jamming drones", "href": "https://example.org/jamming", "body": "How jammers cut control links."},
+        {"title": "C-UAS overview", "href": "https://example.org/cuas", "body": "Layered counter-drone defence."},
+    ],
+    "الحرب الإلكترونية": [
+        {"title": "الحرب الإلكترونية", "href": "https://example.org/ew", "body": "تعريف الحرب الإلكترونية."},
+    ],
+}
+
+class SlowBackend(FixtureBackend):
+    """Fixture backend that counts calls and takes a while, like a network round-trip"""
+    def __init__(self):
+        super().__init__(results=RESULTS)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def search(self, query, num_results):
+        with self.lock:
+            self.calls.append(query)
+        time.sleep(0.05)
+        return super().search(query, num_results)
+
+class TestWebSearch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "search.sqlite")
+
+    def tearDown(self):
+        web_search_module._web_search = None
+        self.temp_dir.cleanup()
+
+    def test_results_are_cached_per_normalized_query(self):
+        backend = SlowBackend()
+        search = WebSearch(backend, cache_path=self.cache_path)
+        self.assertEqual(len(search.search("Counter-Drone  Jamming", 2)), 2)
+        # Same query written differently, and a later run with a new WebSearch on the same cache file
+        self.assertEqual(search.search("counter-drone jamming", 1)[0]["title"], "Jamming drones")
+        self.assertEqual(WebSearch(backend, cache_path=self.cache_path).search("COUNTER-DRONE JAMMING", 2), RESULTS["counter-drone jamming"])
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(normalize_query("  ＡＢＣ  Def "), "abc def")
+
+        expired = WebSearch(backend, cache_path=self.cache_path, ttl_seconds=0)
+        time.sleep(0.01)
+        expired.search("counter-drone jamming", 2)
+        self.assertEqual(len(backend.calls), 2)
+
+    def test_concurrent_queries_are_deduplicated(self):
+        """Identical in-flight queries share one backend call; distinct ones run in parallel"""
+        backend = SlowBackend()
+        search = WebSearch(backend, max_workers=4)
+        started = time.perf_counter()
+        results = search.search_many(["counter-drone jamming", "Counter-drone jamming", "الحرب الإلكترونية", "unknown"], 2)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[2][0]["href"], "https://example.org/ew")
+        self.assertEqual(results[3], [])
+        self.assertEqual(sorted(backend.calls), sorted(["counter-drone jamming", "الحرب الإلكترونية", "unknown"]))
+        self.assertLess(elapsed, 0.15)
+
+    def test_search_many_reuses_its_threads(self):
+        """Every fan-out runs on the same worker threads, so per-thread backend sessions are reused"""
+        class ThreadBackend(SlowBackend):
+            closed = False
+            def search(self, query, num_results):
+                with self.lock:
+                    self.calls.append(threading.current_thread())
+                return FixtureBackend.search(self, query, num_results)
+            def close(self):
+                self.closed = True
+
+        backend = ThreadBackend()
+        search = WebSearch(backend, max_workers=2)
+        for round_number in range(3):
+            search.search_many([f"query {round_number} {index}" for index in range(4)], 1)
+        self.assertEqual(len(backend.calls), 12)
+        self.assertLessEqual(len(set(backend.calls)), 2)
+        search.close()
+        self.assertTrue(backend.closed)
+
+    def test_corpus_backend_and_tool_output(self):
+        with open(os.path.join(self.temp_dir.name, "jamming.md"), "w", encoding="utf-8") as f:
+            f.write("# Jamming\nJammers disrupt drone control links at short range.\n")
+        with open(os.path.join(self.temp_dir.name, "radar.html"), "w", encoding="utf-8") as f:
+            f.write("<html><title>Radar</title><p>Radars detect drones.</p></html>")
+        backend = CorpusBackend(self.temp_dir.name)
+        results = backend.search("drone jamming", 3)
+        self.assertEqual([r["title"] for r in results], ["Jamming", "Radar"])
+
+        web_search_module._web_search = WebSearch(backend)
+        output = perform_web_search("drone jamming\nradars", 1)
+        self.assertIn("Search results for 'drone jamming'", output)
+        self.assertIn("Search results for 'radars'", output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,11 @@
 import os
 import re
 from typing import List, Dict
-from terminology_handler import TerminologyManager
+from terminology_handler import get_terminology_manager
 
 class ContentConverter:
     def __init__(self, glossary_path: str):
-        self.term_manager = TerminologyManager(glossary_path)
+        self.term_manager = get_terminology_manager(glossary_path)
         
     def convert_chapter_to_article(self, chapter_path: str, language: str = 'arabic') -> Dict:
         """Convert a book chapter to an article format with terminology checks"""
@@ -30,6 +30,11 @@ class ContentConverter:
             
         return processed_sections
     
+    def check_chapter_stream(self, chapter_path: str, output_path: str, language: str = 'arabic') -> int:
+        """Check a chapter or corpus file of any size, writing glossary hits to a JSONL file.
+        Unlike convert_chapter_to_article, the file is read in chunks and never held in memory."""
+        return self.term_manager.write_check_stream_jsonl(chapter_path, output_path, language)
+
     def _extract_sections(self, content: str) -> Dict[str, str]:
         """Extract main sections from chapter content"""
         sections = {}
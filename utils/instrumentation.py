@@ -0,0 +1,161 @@
+"""Per-agent, per-round instrumentation of LLM calls: JSONL trace, summary table, Prometheus metrics"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Metrics written to the Prometheus text file: (name, record field, help)
+_PROMETHEUS_METRICS = [
+    ("article_llm_calls_total", "calls", "LLM calls"),
+    ("article_llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent"),
+    ("article_llm_completion_tokens_total", "completion_tokens", "Completion tokens received"),
+    ("article_llm_latency_seconds_total", "latency_s", "Wall time spent in LLM calls"),
+    ("article_llm_queue_wait_seconds_total", "queue_wait_s", "Time LLM calls waited for the rate limiter"),
+    ("article_llm_cache_hits_total", "cache_hits", "LLM calls answered from the response cache"),
+    ("article_llm_retries_total", "retries", "Retried LLM calls"),
+    ("article_llm_errors_total", "errors", "Failed LLM calls"),
+]
+
+
+class LLMCallRecorder:
+    """Record every model call made through instrumented agents.
+
+    instrument(agent) wraps ``agent.client.create``; each call is appended to
+    the JSONL trace with the current stage (see stage()), agent name, round
+    (number of messages in the request), prompt/completion tokens, latency,
+    whether the response cache answered it, retries, time spent waiting for
+    the rate limiter and any error.
+    Stages are tracked per thread, so concurrently generated sections are
+    attributed correctly.
+    """
+
+    def __init__(self, trace_path: Optional[str] = None):
+        self.trace_path = trace_path
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if trace_path:
+            os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+            # One trace per run
+            open(trace_path, "w", encoding="utf-8").close()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attribute the calls made by this thread inside the block to a stage (outline, section 2, ...)"""
+        previous = getattr(self._local, "stage", None)
+        self._local.stage = name
+        try:
+            yield
+        finally:
+            self._local.stage = previous
+
+    def add_retry(self) -> None:
+        """Count a retry of the call in progress on this thread"""
+        self._local.retries = getattr(self._local, "retries", 0) + 1
+
+    def instrument(self, agent, response_cache=None, rate_limiter=None) -> None:
+        """Wrap the agent's LLM client so every create() call is recorded; agents without a client are skipped
+
+        Instrument after rate_limiter.wrap(agent) so latency includes queueing and retries.
+        """
+        client = getattr(agent, "client", None)
+        if client is None or getattr(client, "_instrumented_by", None) is self:
+            return
+        create = client.create
+
+        def instrumented_create(*args, **kwargs):
+            messages = kwargs.get("messages") or []
+            self._local.retries = 0
+            if response_cache is not None:
+                response_cache.reset_last_lookup()
+            started = time.perf_counter()
+            error = None
+            response = None
+            try:
+                response = create(*args, **kwargs)
+                return response
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                usage = getattr(response, "usage", None)
+                self.record({
+                    "stage": getattr(self._local, "stage", None),
+                    "agent": agent.name,
+                    "round": len(messages),
+                    "model": getattr(response, "model", None),
+                    "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                    "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                    "latency_s": round(time.perf_counter() - started, 4),
+                    "cache_hit": bool(response_cache is not None and response_cache.last_lookup_hit()),
+                    "retries": getattr(self._local, "retries", 0),
+                    "queue_wait_s": round(rate_limiter.last_wait(), 4) if rate_limiter is not None else 0.0,
+                    "error": error,
+                })
+
+        client.create = instrumented_create
+        client._instrumented_by = self
+
+    def record(self, event: Dict) -> None:
+        event = dict(event, timestamp=time.time())
+        with self._lock:
+            self.records.append(event)
+            if self.trace_path:
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def summarize(self) -> Dict[Tuple[str, str], Dict]:
+        """Totals per (stage, agent), in order of first call"""
+        totals: Dict[Tuple[str, str], Dict] = {}
+        with self._lock:
+            records = list(self.records)
+        for event in records:
+            key = (event["stage"] or "-", event["agent"])
+            row = totals.setdefault(key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                          "latency_s": 0.0, "queue_wait_s": 0.0, "cache_hits": 0, "retries": 0,
+                                          "errors": 0})
+            row["calls"] += 1
+            row["prompt_tokens"] += event["prompt_tokens"]
+            row["completion_tokens"] += event["completion_tokens"]
+            row["latency_s"] += event["latency_s"]
+            row["queue_wait_s"] += event.get("queue_wait_s", 0.0)
+            row["cache_hits"] += int(event["cache_hit"])
+            row["retries"] += event["retries"]
+            row["errors"] += int(event["error"] is not None)
+        return totals
+
+    def format_summary(self) -> str:
+        """Summary table of calls, tokens and latency per stage and agent"""
+        header = f"{'stage':<14} {'agent':<20} {'calls':>5} {'prompt tok':>10} {'compl tok':>9} {'latency s':>9} {'queued s':>8} {'cached':>6} {'retries':>7} {'errors':>6}"
+        lines = [header, "-" * len(header)]
+        grand = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_s": 0.0,
+                 "queue_wait_s": 0.0, "cache_hits": 0, "retries": 0, "errors": 0}
+        for (stage, agent), row in self.summarize().items():
+            lines.append(f"{stage[:14]:<14} {agent[:20]:<20} {row['calls']:>5} {row['prompt_tokens']:>10} {row['completion_tokens']:>9} "
+                         f"{row['latency_s']:>9.1f} {row['queue_wait_s']:>8.1f} {row['cache_hits']:>6} {row['retries']:>7} {row['errors']:>6}")
+            for field in grand:
+                grand[field] += row[field]
+        lines.append("-" * len(header))
+        lines.append(f"{'total':<14} {'':<20} {grand['calls']:>5} {grand['prompt_tokens']:>10} {grand['completion_tokens']:>9} "
+                     f"{grand['latency_s']:>9.1f} {grand['queue_wait_s']:>8.1f} {grand['cache_hits']:>6} {grand['retries']:>7} {grand['errors']:>6}")
+        return "\n".join(lines)
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the per-stage, per-agent totals in the Prometheus text exposition format"""
+        totals = self.summarize()
+        lines = []
+        for name, field, help_text in _PROMETHEUS_METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (stage, agent), row in totals.items():
+                labels = f'stage="{_escape_label(stage)}",agent="{_escape_label(agent)}"'
+                lines.append(f"{name}{{{labels}}} {row[field]}")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,205 @@
+"""Process-wide rate limiting and retry with backoff for LLM calls"""
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from utils.tokens import count_tokens
+
+# Exception class names of transient provider errors (openai and httpx clients)
+_RETRYABLE_ERRORS = {
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+    "ServiceUnavailableError", "Timeout", "TimeoutError", "ConnectionError", "ReadTimeout",
+}
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limiting (429), server errors (5xx), timeouts and dropped connections"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return type(error).__name__ in _RETRYABLE_ERRORS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding at most one minute of budget"""
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount from the bucket and return how long to wait before it is covered.
+
+        The balance may go negative, so callers queue in order: each later
+        caller waits for the budget already promised to earlier ones.
+        """
+        self._refill()
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate) if self.rate > 0 else 0.0
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or take (negative) tokens once the actual usage is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits plus retry with exponential backoff and jitter.
+
+    One limiter is shared by every agent of the process (see get_rate_limiter):
+    wrap(agent) routes ``agent.client.create`` through call(). Each call reserves
+    one request and its estimated tokens (prompt plus expected completion),
+    sleeps until both budgets cover it, and corrects the token budget with the
+    usage the response reports. Transient errors (429, 5xx, timeouts) are
+    retried up to max_retries times, waiting base_delay * 2**attempt seconds
+    (capped at max_delay) with full jitter.
+    """
+
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 100_000,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 expected_completion_tokens: int = 800,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_completion_tokens = expected_completion_tokens
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.metrics = {"requests": 0, "retries": 0, "failures": 0,
+                        "queue_wait_total_s": 0.0, "queue_wait_max_s": 0.0}
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """Wait until a request of estimated_tokens fits both budgets; returns the queueing delay"""
+        with self._lock:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            self.metrics["requests"] += 1
+            self.metrics["queue_wait_total_s"] += wait
+            self.metrics["queue_wait_max_s"] = max(self.metrics["queue_wait_max_s"], wait)
+        if wait > 0:
+            self.sleep(wait)
+        self._local.wait = getattr(self._local, "wait", 0.0) + wait
+        return wait
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Correct the token budget once the real usage of a call is known"""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, request: Callable[[], Any], estimated_tokens: int,
+             on_retry: Optional[Callable[[], None]] = None,
+             usage_of: Optional[Callable[[Any], Optional[int]]] = None,
+             served_from_cache: Optional[Callable[[], bool]] = None) -> Any:
+        """Run request() within the limits, retrying transient errors.
+
+        usage_of(response) gives the tokens the call actually used, to correct the
+        estimate; when served_from_cache() is true the call never reached the
+        provider and its request and tokens are given back.
+        """
+        self._local.wait = 0.0
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            try:
+                response = request()
+            except Exception as e:
+                # The failed request still counts against the request budget, not the token budget
+                self.settle(estimated_tokens, 0)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    with self._lock:
+                        self.metrics["failures"] += 1
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                with self._lock:
+                    self.metrics["retries"] += 1
+                print(f"WARNING: [RateLimiter] {type(e).__name__}; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                if on_retry is not None:
+                    on_retry()
+                self.sleep(delay)
+                continue
+            if served_from_cache is not None and served_from_cache():
+                with self._lock:
+                    self.requests.adjust(1)
+                    self.tokens.adjust(estimated_tokens)
+            else:
+                self.settle(estimated_tokens, usage_of(response) if usage_of else None)
+            return response
+
+    def last_wait(self) -> float:
+        """Queueing delay of this thread's last call, across its retries"""
+        return getattr(self._local, "wait", 0.0)
+
+    def estimate_tokens(self, messages) -> int:
+        prompt = sum(count_tokens(str(message.get("content") or "")) for message in messages or [])
+        return prompt + self.expected_completion_tokens
+
+    def wrap(self, agent, response_cache=None, on_retry: Optional[Callable[[], None]] = None) -> None:
+        """Route the agent's LLM calls through this limiter; agents without a client are skipped"""
+        client = getattr(agent, "client", None)
+        if client is None or getattr(client, "_rate_limited_by", None) is self:
+            return
+        create = client.create
+
+        def usage_of(response) -> Optional[int]:
+            usage = getattr(response, "usage", None)
+            if usage is None:
+                return None
+            return (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+
+        def rate_limited_create(*args, **kwargs):
+            estimated = self.estimate_tokens(kwargs.get("messages"))
+            if response_cache is not None:
+                response_cache.reset_last_lookup()
+            served_from_cache = (lambda: bool(response_cache.last_lookup_hit())) if response_cache is not None else None
+            return self.call(lambda: create(*args, **kwargs), estimated, on_retry, usage_of, served_from_cache)
+
+        client.create = rate_limited_create
+        client._rate_limited_by = self
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self.metrics)
+        stats["queue_wait_avg_s"] = stats["queue_wait_total_s"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+
+_limiter_registry: Dict[Tuple, RateLimiter] = {}
+_limiter_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(rate_limit_config: Dict) -> RateLimiter:
+    """Process-wide limiter for these settings, shared by every agent and article in the process"""
+    settings = (
+        rate_limit_config.get("requests_per_minute", 60),
+        rate_limit_config.get("tokens_per_minute", 100_000),
+        rate_limit_config.get("max_retries", 5),
+        rate_limit_config.get("base_delay", 1.0),
+        rate_limit_config.get("max_delay", 60.0),
+        rate_limit_config.get("expected_completion_tokens", 800),
+    )
+    with _limiter_registry_lock:
+        limiter = _limiter_registry.get(settings)
+        if limiter is None:
+            limiter = RateLimiter(*settings)
+            _limiter_registry[settings] = limiter
+        return limiter
@@ -0,0 +1,136 @@
+"""Disk-backed, content-addressed cache of LLM responses shared by all agents"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with size-based LRU eviction.
+
+    Implements the get/set interface autogen expects from ``agent.client_cache``.
+    autogen's key is the JSON of the full request (model, temperature and the
+    message history, system message included); it is hashed into the SQLite
+    key, so a request is only answered from the cache when all of these match.
+    Several threads and processes can share one cache file: every thread uses
+    its own connection and SQLite serializes writers (WAL journal).
+    Hit and miss counters are kept per ResponseCache instance.
+    """
+
+    def __init__(self, path: str, max_size_mb: float = 200):
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _count(self, hit: bool) -> None:
+        self._local.last_hit = hit
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached response for a request, or default"""
+        digest = self._hash(key)
+        connection = self._connection()
+        with connection:
+            row = connection.execute("SELECT value FROM responses WHERE key = ?", (digest,)).fetchone()
+            if row is not None:
+                connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), digest))
+        if row is None:
+            self._count(False)
+            return default
+        try:
+            value = pickle.loads(row[0])
+        except Exception as e:
+            print(f"WARNING: [ResponseCache] Dropping unreadable cache entry: {e}")
+            self.delete(key)
+            self._count(False)
+            return default
+        self._count(True)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a response, then evict least recently used entries beyond the size limit"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (self._hash(key), sqlite3.Binary(blob), len(blob), time.time())
+            )
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for digest, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM responses WHERE key = ?", (digest,))
+            total -= size
+            evicted += 1
+        print(f"INFO: [ResponseCache] Evicted {evicted} least recently used responses.")
+
+    def delete(self, key: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM responses WHERE key = ?", (self._hash(key),))
+
+    def last_lookup_hit(self) -> Optional[bool]:
+        """Whether this thread's last lookup was a hit (None before any lookup)"""
+        return getattr(self._local, "last_hit", None)
+
+    def reset_last_lookup(self) -> None:
+        self._local.last_hit = None
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters of this instance and the current size of the shared cache"""
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        """Close this thread's connection; the cache reconnects on next use"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # autogen wraps every lookup in ``with cache:``; the cache stays usable afterwards
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return None
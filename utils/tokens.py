@@ -0,0 +1,39 @@
+"""Token counting for prompt budgets"""
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based estimate
+    tiktoken = None
+
+_encoding = None
+
+
+def _get_encoding():
+    """Load the cl100k_base encoding once; None when tiktoken or its data file is unavailable"""
+    global _encoding, tiktoken
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"WARNING: [tokens] tiktoken encoding unavailable, estimating token counts: {e}")
+            tiktoken = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens a prompt fragment will use.
+    Uses tiktoken's cl100k_base when installed. Otherwise estimates about four
+    characters per token for ASCII and two for other scripts, since Arabic
+    tokenizes more densely than English.
+    Args:
+        text (str): The text to measure.
+    Returns:
+        int: The (estimated) token count.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return max(1, round(ascii_chars / 4 + (len(text) - ascii_chars) / 2))
@@ -1,24 +1,250 @@
-from duckduckgo_search import DDGS
+"""Web search tool for the agents: pluggable backends, TTL disk cache and concurrent queries"""
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from utils.response_cache import ResponseCache
+
+# A search result, as returned by duckduckgo_search: {"title", "href", "body"}
+SearchResults = List[Dict[str, str]]
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: Unicode-normalized, case-folded, single-spaced"""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class DuckDuckGoBackend:
+    """DuckDuckGo text search; each thread keeps its own session until close()"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def search(self, query: str, num_results: int) -> SearchResults:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            from duckduckgo_search import DDGS
+            session = self._local.session = DDGS()
+            with self._lock:
+                self._sessions.append(session)
+        return list(session.text(query, max_results=num_results) or [])
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.__exit__(None, None, None)
+
+
+class FixtureBackend:
+    """Canned results from a JSON file mapping queries to result lists, for tests and offline runs"""
+
+    def __init__(self, path: Optional[str] = None, results: Optional[Dict[str, SearchResults]] = None):
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                results = json.load(f)
+        self.results = {normalize_query(query): hits for query, hits in (results or {}).items()}
+
+    def search(self, query: str, num_results: int) -> SearchResults:
+        return list(self.results.get(normalize_query(query), []))[:num_results]
+
+
+class CorpusBackend:
+    """Search a directory of .txt, .md and .html documents by query word frequency"""
+
+    EXTENSIONS = (".txt", ".md", ".html", ".htm")
+
+    def __init__(self, directory: str, snippet_chars: int = 300):
+        self.snippet_chars = snippet_chars
+        self.documents = []
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.lower().endswith(self.EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+                title = None
+                if name.lower().endswith((".html", ".htm")):
+                    title_match = re.search(r"<title[^>]*>(.*?)</title>", text, re.IGNORECASE | re.DOTALL)
+                    title = title_match.group(1).strip() if title_match else None
+                    text = re.sub(r"<title[^>]*>.*?</title>", " ", text, flags=re.IGNORECASE | re.DOTALL)
+                    text = re.sub(r"<[^>]+>", " ", text)
+                lines = [line.strip() for line in text.splitlines() if line.strip()]
+                title = title or (lines[0].lstrip("# ") if lines else name)
+                text = " ".join(lines)
+                self.documents.append((title, "file://" + os.path.abspath(path), text, text.casefold()))
+
+    def search(self, query: str, num_results: int) -> SearchResults:
+        words = [word for word in re.findall(r"\w+", normalize_query(query)) if len(word) > 2]
+        scored = []
+        for index, (_, _, _, folded) in enumerate(self.documents):
+            score = sum(folded.count(word) for word in words)
+            if score:
+                scored.append((-score, index))
+        results = []
+        for _, index in sorted(scored)[:num_results]:
+            title, href, text, folded = self.documents[index]
+            # The snippet starts a little before the first query word
+            position = max(0, min(folded.find(word) for word in words if word in folded) - 50)
+            results.append({"title": title, "href": href, "body": text[position:position + self.snippet_chars]})
+        return results
+
+
+class WebSearch:
+    """Cached, deduplicated and concurrent search over a backend.
+
+    Results are cached on disk per normalized query for ttl_seconds; a request
+    for more results than were cached goes to the backend again. Identical
+    queries in flight at the same time share one backend call, and
+    search_many() fans several queries out over a pool of max_workers threads
+    that lives as long as the WebSearch, so backend sessions kept per thread
+    are reused from one call to the next.
+    """
+
+    def __init__(self, backend, cache_path: Optional[str] = None, ttl_seconds: float = 24 * 3600,
+                 max_workers: int = 4):
+        self.backend = backend
+        self.cache = ResponseCache(cache_path) if cache_path else None
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self.backend_calls = 0
+
+    def _cached(self, key: str, num_results: int) -> Optional[SearchResults]:
+        if self.cache is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is None or time.time() - entry["stored"] > self.ttl_seconds:
+            return None
+        # Fewer results than asked are enough if the backend had no more
+        if len(entry["results"]) < num_results and entry["num_results"] < num_results:
+            return None
+        return entry["results"][:num_results]
+
+    def search(self, query: str, num_results: int = 3) -> SearchResults:
+        key = normalize_query(query)
+        cached = self._cached(key, num_results)
+        if cached is not None:
+            return cached
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            results = future.result()
+            if len(results) >= num_results:
+                return results[:num_results]
+            return self.search(query, num_results)
+        try:
+            with self._lock:
+                self.backend_calls += 1
+            results = self.backend.search(query, num_results)
+            if self.cache is not None:
+                self.cache.set(key, {"stored": time.time(), "num_results": num_results, "results": results})
+        except Exception as e:
+            self._release(key)
+            future.set_exception(e)
+            raise
+        # Released before waiters wake up, so a waiter needing more results starts a new call
+        self._release(key)
+        future.set_result(results)
+        return results
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def search_many(self, queries: Sequence[str], num_results: int = 3) -> List[SearchResults]:
+        """Run several queries concurrently; results are in query order"""
+        if len(queries) <= 1:
+            return [self.search(query, num_results) for query in queries]
+        return list(self._executor.map(lambda query: self.search(query, num_results), queries))
+
+    def close(self) -> None:
+        """Stop the worker threads and close the backend's sessions"""
+        self._executor.shutdown(wait=True)
+        if hasattr(self.backend, "close"):
+            self.backend.close()
+
+
+def create_web_search(web_search_config: Dict) -> WebSearch:
+    """WebSearch from the web_search config section"""
+    backend_name = web_search_config.get("backend", "duckduckgo")
+    if backend_name == "fixture":
+        backend = FixtureBackend(web_search_config["fixture_path"])
+    elif backend_name == "corpus":
+        backend = CorpusBackend(web_search_config["corpus_dir"])
+    elif backend_name == "duckduckgo":
+        backend = DuckDuckGoBackend()
+    else:
+        raise ValueError(f"Unknown web search backend '{backend_name}'")
+    return WebSearch(
+        backend,
+        cache_path=web_search_config.get("cache_path") if web_search_config.get("cache", True) else None,
+        ttl_seconds=web_search_config.get("ttl_hours", 24) * 3600,
+        max_workers=web_search_config.get("max_parallel_queries", 4),
+    )
+
+
+_web_search: Optional[WebSearch] = None
+_web_search_lock = threading.Lock()
+
+
+def configure_web_search(web_search_config: Dict) -> WebSearch:
+    """Set the WebSearch used by perform_web_search, closing the one it replaces"""
+    global _web_search
+    with _web_search_lock:
+        if _web_search is not None:
+            _web_search.close()
+        _web_search = create_web_search(web_search_config)
+        return _web_search
+
+
+def get_web_search() -> WebSearch:
+    """The configured WebSearch, or an uncached DuckDuckGo search if none was configured"""
+    global _web_search
+    with _web_search_lock:
+        if _web_search is None:
+            _web_search = WebSearch(DuckDuckGoBackend())
+        return _web_search
+
+
+def format_results(query: str, results: SearchResults) -> str:
+    if not results:
+        return f"No results found for '{query}'."
+    output = f"Search results for '{query}':\n"
+    for i, r in enumerate(results):
+        output += f"{i+1}. Title: {r['title']}\n   Link: {r['href']}\n   Snippet: {r['body']}\n---\n"
+    return output
+
 
 def perform_web_search(query: str, num_results: int = 3) -> str:
     """
-    Performs a web search using DuckDuckGo and returns a formatted string of results.
+    Performs a web search and returns a formatted string of results.
     Args:
-        query (str): The search query.
-        num_results (int): The number of results to return.
+        query (str): The search query. Several queries can be given on separate lines;
+            they are searched concurrently.
+        num_results (int): The number of results to return per query.
     Returns:
         str: A string containing the search results (title, link, snippet).
     """
-    print(f"Performing web search for: {query}")
+    queries = [line.strip() for line in query.splitlines() if line.strip()] or [query]
+    print(f"Performing web search for: {' | '.join(queries)}")
+    web_search = get_web_search()
     try:
-        with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=num_results)
-            if not results:
-                return "No results found."
-
-            output = f"Search results for '{query}':\n"
-            for i, r in enumerate(results):
-                output += f"{i+1}. Title: {r['title']}\n   Link: {r['href']}\n   Snippet: {r['body']}\n---\n"
-            return output
+        if len(queries) == 1:
+            return format_results(queries[0], web_search.search(queries[0], num_results))
+        results = web_search.search_many(queries, num_results)
+        return "\n".join(format_results(q, r) for q, r in zip(queries, results))
     except Exception as e:
         return f"Error during web search: {str(e)}"